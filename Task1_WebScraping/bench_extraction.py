@@ -0,0 +1,82 @@
+"""
+bench_extraction.py
+Micro-benchmark of the chart extraction backends over saved pages.
+
+    python bench_extraction.py                 # all *.html in fixtures/
+    python bench_extraction.py page1.html -n 20
+    python bench_extraction.py --save          # save the live chart to fixtures/chart_top.html
+
+For every page it times each DOM backend and each embedded-payload
+source, and reports ms per page and the number of rows extracted.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+# fetcher.py imports common/ (for --save)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extraction import BACKENDS, EXTRACTORS, extract_dom, get_backend
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def save_live_chart(path):
+    from fetcher import DEFAULT_HEADERS
+    import requests
+    response = requests.get("https://www.imdb.com/chart/top/", headers=DEFAULT_HEADERS, timeout=15)
+    response.raise_for_status()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(response.content)
+    print(f"✓ Saved {path} ({len(response.content) / 1024:.0f} KB)")
+
+
+def bench(fn, html, repeat):
+    rows = fn(html)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    return (time.perf_counter() - start) / repeat * 1000, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*")
+    parser.add_argument("-n", "--repeat", type=int, default=10)
+    parser.add_argument("--save", action="store_true")
+    args = parser.parse_args()
+
+    if args.save:
+        save_live_chart(os.path.join(FIXTURE_DIR, "chart_top.html"))
+
+    pages = args.pages or sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+    if not pages:
+        print(f"No fixture pages found in {FIXTURE_DIR} (use --save or pass paths).")
+        return
+
+    candidates = []
+    for name in BACKENDS:
+        try:
+            backend = get_backend(name)
+        except ImportError:
+            print(f"  (skipping {name}: not installed)")
+            continue
+        candidates.append((f"dom/{name}", lambda html, b=backend: extract_dom(html, b)))
+    for name, fn in EXTRACTORS.items():
+        candidates.append((name, fn))
+
+    for page in pages:
+        with open(page, 'rb') as f:
+            html = f.read()
+        print(f"\n{os.path.basename(page)} ({len(html) / 1024:.0f} KB), {args.repeat} runs")
+        print(f"  {'source':<20}{'ms/page':>10}{'rows':>8}")
+        for label, fn in candidates:
+            ms, rows = bench(fn, html, args.repeat)
+            print(f"  {label:<20}{ms:>10.2f}{rows:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+extraction.py
+Pluggable extraction engine for the IMDb Top 250 chart.
+
+Rows are described by a declarative spec (field -> list of simple
+"tag.class" or "tag.class@attr" selectors). Each row node is walked once
+and every field takes the first matching element in document order, so
+adding a field costs nothing extra per row.
+
+Parser backends:
+    html.parser  BeautifulSoup + Python's html.parser (always available)
+    lxml         lxml.html (pip install lxml)
+    selectolax   selectolax Lexbor engine (pip install selectolax)
+
+Besides the DOM, the chart page embeds its data as __NEXT_DATA__ and
+JSON-LD payloads. These are found with a plain string search and parsed
+with json, which is much cheaper than building a DOM, and are used when
+the DOM gives no rows (or first, if listed first in `sources`).
+"""
+
+import html as html_lib
+import json
+import re
+
+IMDB_BASE_URL = "https://www.imdb.com"
+
+CHART_SPEC = {
+    'item': 'li.ipc-metadata-list-summary-item',
+    'fields': {
+        'title': ['h3.ipc-title__text'],
+        # first metadata item is the year; sc-b189961a-8 is the older markup
+        'year': ['span.cli-title-metadata-item', 'span.sc-b189961a-8'],
+        'rating': ['span.ipc-rating-star--rating', 'span.ipc-rating-star'],
+        'votes': ['span.ipc-rating-star--voteCount', 'span.ipc-rating-star'],
+        'href': ['a.ipc-title-link-wrapper@href'],
+    },
+}
+
+DEFAULT_SOURCES = ('dom', 'next_data', 'json_ld')
+# Bumped when the rows extract_chart() returns change, so cached parses
+# (http_cache.py) made by an older version are not reused
+PARSE_VERSION = 1
+
+# ------------- Field cleaning -------------
+YEAR_RE = re.compile(r'\b(1[89]\d{2}|20\d{2})\b')
+FLOAT_RE = re.compile(r'\d+(?:\.\d+)?')
+VOTES_RE = re.compile(r'\(?\s*([\d.,]+)\s*([KMB]?)\s*\)', re.I)
+SCALE = {'': 1, 'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+
+
+def clean_title(text):
+    # "1. The Shawshank Redemption" -> "The Shawshank Redemption"
+    return text.split('. ', 1)[1] if '. ' in text else text
+
+
+def parse_year(text):
+    m = YEAR_RE.search(text or '')
+    return int(m.group(1)) if m else 'N/A'
+
+
+def parse_rating(text):
+    m = FLOAT_RE.search(text or '')
+    return float(m.group(0)) if m else 'N/A'
+
+
+def parse_votes(text):
+    m = VOTES_RE.search(text or '')
+    if not m:
+        return 'N/A'
+    return int(float(m.group(1).replace(',', '')) * SCALE[m.group(2).upper()])
+
+
+# Keys of the rows make_row() returns, in output column order
+CHART_COLUMNS = ('rank', 'title', 'year', 'rating', 'votes', 'imdb_id', 'url')
+
+
+def make_row(rank, title, year, rating, votes, href):
+    if href and href != 'N/A':
+        url = href if href.startswith('http') else f"{IMDB_BASE_URL}{href}"
+    else:
+        url = 'N/A'
+    movie_id = 'N/A'
+    if '/title/' in url:
+        movie_id = url.split('/title/')[1].split('/')[0]
+    return {
+        'rank': rank,
+        'title': title or 'N/A',
+        'year': year,
+        'rating': rating,
+        'votes': votes,
+        'imdb_id': movie_id,
+        'url': url
+    }
+
+
+# ------------- Parser backends -------------
+def _split_selector(selector):
+    attr = None
+    if '@' in selector:
+        selector, attr = selector.split('@', 1)
+    tag, _, cls = selector.partition('.')
+    return tag or None, cls or None, attr
+
+
+class SoupBackend:
+    name = 'html.parser'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    def items(self, html, selector):
+        tag, cls, _ = _split_selector(selector)
+        return self._soup(html, 'html.parser').find_all(tag, class_=cls)
+
+    def walk(self, node):
+        for el in node.find_all(True):
+            yield el.name, el.get('class') or (), el
+
+    def text(self, el):
+        return el.get_text(strip=True)
+
+    def attr(self, el, name):
+        return el.get(name)
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    def __init__(self):
+        import lxml.html
+        self._lxml = lxml.html
+
+    def items(self, html, selector):
+        tag, cls, _ = _split_selector(selector)
+        root = self._lxml.fromstring(html)
+        return root.xpath(f"//{tag or '*'}[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]")
+
+    def walk(self, node):
+        for el in node.iterdescendants():
+            if isinstance(el.tag, str):   # skip comments / processing instructions
+                yield el.tag, (el.get('class') or '').split(), el
+
+    def text(self, el):
+        return ''.join(s.strip() for s in el.itertext())
+
+    def attr(self, el, name):
+        return el.get(name)
+
+
+class SelectolaxBackend:
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def items(self, html, selector):
+        return self._parser(html).css(selector)
+
+    def walk(self, node):
+        it = node.traverse(include_text=False)
+        next(it, None)   # traverse() starts with the node itself
+        for el in it:
+            yield el.tag, (el.attributes.get('class') or '').split(), el
+
+    def text(self, el):
+        return el.text(strip=True)
+
+    def attr(self, el, name):
+        return el.attributes.get(name)
+
+
+BACKENDS = {
+    'html.parser': SoupBackend,
+    'lxml': LxmlBackend,
+    'selectolax': SelectolaxBackend,
+}
+
+
+def get_backend(name='auto'):
+    """
+    Return a backend instance. 'auto' picks the fastest one installed.
+    """
+    if name != 'auto':
+        return BACKENDS[name]()
+    for candidate in ('selectolax', 'lxml', 'html.parser'):
+        try:
+            return BACKENDS[candidate]()
+        except ImportError:
+            continue
+
+
+def backend_name(name='auto'):
+    """
+    Name of the backend get_backend(name) returns.
+    """
+    backend = get_backend(name)
+    return next(key for key, cls in BACKENDS.items() if isinstance(backend, cls))
+
+
+# ------------- DOM extraction -------------
+def compile_spec(spec):
+    """
+    Flatten the field spec into (field, tag, class, attr) matchers
+    """
+    matchers = []
+    for field, selectors in spec['fields'].items():
+        for selector in selectors:
+            matchers.append((field, *_split_selector(selector)))
+    return matchers
+
+
+def extract_item(backend, item, matchers):
+    """
+    Walk one row node once; each field takes its first matching element.
+    """
+    values = {}
+    remaining = len({m[0] for m in matchers})
+    for tag, classes, el in backend.walk(item):
+        for field, m_tag, m_cls, m_attr in matchers:
+            if field in values:
+                continue
+            if (m_tag is None or m_tag == tag) and (m_cls is None or m_cls in classes):
+                values[field] = backend.attr(el, m_attr) if m_attr else backend.text(el)
+                remaining -= 1
+        if remaining == 0:
+            break
+    return values
+
+
+def extract_dom(html, backend='auto', spec=CHART_SPEC):
+    if isinstance(backend, str):
+        backend = get_backend(backend)
+    matchers = compile_spec(spec)
+    movies = []
+    for idx, item in enumerate(backend.items(html, spec['item']), 1):
+        v = extract_item(backend, item, matchers)
+        movies.append(make_row(
+            idx,
+            clean_title(v['title']) if v.get('title') else 'N/A',
+            parse_year(v.get('year')),
+            parse_rating(v.get('rating')),
+            parse_votes(v.get('votes')),
+            v.get('href')
+        ))
+    return movies
+
+
+# ------------- Embedded payloads -------------
+NEXT_DATA_RE = re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+JSON_LD_RE = re.compile(r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', re.S)
+
+
+def _as_text(html):
+    return html.decode('utf-8', errors='replace') if isinstance(html, bytes) else html
+
+
+def extract_next_data(html):
+    m = NEXT_DATA_RE.search(_as_text(html))
+    if not m:
+        return []
+    try:
+        data = json.loads(m.group(1))
+        edges = data['props']['pageProps']['pageData']['chartTitles']['edges']
+    except (ValueError, KeyError, TypeError):
+        return []
+
+    movies = []
+    for idx, edge in enumerate(edges, 1):
+        node = edge.get('node') or {}
+        ratings = node.get('ratingsSummary') or {}
+        year = (node.get('releaseYear') or {}).get('year')
+        rating = ratings.get('aggregateRating')
+        votes = ratings.get('voteCount')
+        movies.append(make_row(
+            edge.get('currentRank') or idx,
+            (node.get('titleText') or {}).get('text'),
+            year if year is not None else 'N/A',
+            float(rating) if rating is not None else 'N/A',
+            int(votes) if votes is not None else 'N/A',
+            f"/title/{node['id']}/" if node.get('id') else None
+        ))
+    return movies
+
+
+def extract_json_ld(html):
+    for m in JSON_LD_RE.finditer(_as_text(html)):
+        try:
+            data = json.loads(m.group(1))
+        except ValueError:
+            continue
+        if not isinstance(data, dict) or data.get('@type') != 'ItemList':
+            continue
+
+        movies = []
+        for idx, element in enumerate(data.get('itemListElement', []), 1):
+            item = element.get('item') or {}
+            agg = item.get('aggregateRating') or {}
+            rating = agg.get('ratingValue')
+            votes = agg.get('ratingCount')
+            movies.append(make_row(
+                element.get('position') or idx,
+                html_lib.unescape(item.get('name') or '') or None,
+                'N/A',   # JSON-LD carries no release year
+                float(rating) if rating is not None else 'N/A',
+                int(votes) if votes is not None else 'N/A',
+                item.get('url')
+            ))
+        return movies
+    return []
+
+
+EXTRACTORS = {
+    'next_data': extract_next_data,
+    'json_ld': extract_json_ld,
+}
+
+
+def extract_chart(html, backend='auto', sources=DEFAULT_SOURCES):
+    """
+    Extract chart rows, trying each source in order until one yields rows.
+    """
+    for source in sources:
+        if source == 'dom':
+            movies = extract_dom(html, backend)
+        else:
+            movies = EXTRACTORS[source](html)
+        if movies:
+            return movies
+    return []
@@ -0,0 +1,153 @@
+"""
+fetcher.py
+Concurrent page fetching for the IMDb scraper.
+
+All requests go through one shared keep-alive requests.Session, so the
+TCP/TLS connection to a host is reused instead of reopened per page.
+A per-host rate limiter keeps us polite and 429/5xx responses are
+retried with exponential backoff (honouring Retry-After when sent).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.instrumentation import stage
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9'
+}
+
+# Status codes worth retrying: rate limited or transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """
+    Allow at most `rate` requests per second to each host.
+    rate=None (or 0) disables limiting.
+    """
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        if not self.interval:
+            return
+        # Reserve the next free slot under the lock, sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def make_session(pool_size=16, headers=None):
+    """
+    Build a keep-alive session whose connection pool is large enough
+    for `pool_size` concurrent workers.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(headers or DEFAULT_HEADERS)
+    return session
+
+
+def _retry_delay(response, attempt, backoff):
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff * (2 ** attempt)
+
+
+def fetch(session, url, limiter=None, retries=3, backoff=1.0, timeout=10, cache=None):
+    """
+    GET `url` through `session`, retrying connection errors and
+    429/5xx responses up to `retries` times. Returns the response or
+    raises the last error.
+
+    With an HTTPCache, fresh entries are returned without a request and
+    stale ones are revalidated with a conditional GET.
+    """
+    with stage("http fetch", url=url) as st:
+        response = _fetch(session, url, limiter, retries, backoff, timeout, cache, st)
+        st.set(status=response.status_code)
+        return response
+
+
+def _fetch(session, url, limiter, retries, backoff, timeout, cache, st):
+    headers = None
+    if cache is not None:
+        hit = cache.lookup(url)
+        if hit is not None:
+            st.set(cache="fresh")
+            return hit
+        headers = cache.conditional_headers(url)
+
+    host = urlparse(url).netloc
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.wait(host)
+        try:
+            response = session.get(url, timeout=timeout, headers=headers)
+        except requests.exceptions.RequestException:
+            if attempt == retries:
+                raise
+            time.sleep(_retry_delay(None, attempt, backoff))
+            continue
+
+        if response.status_code in RETRY_STATUSES and attempt < retries:
+            st.set(retries=attempt + 1)
+            time.sleep(_retry_delay(response, attempt, backoff))
+            continue
+
+        response.raise_for_status()
+        if cache is not None:
+            response = cache.store(url, response)
+        return response
+
+
+def fetch_many(urls, parse, max_workers=8, rate_limit=4.0, retries=3, backoff=1.0,
+               timeout=10, session=None, cache=None, parse_key=''):
+    """
+    Fetch `urls` with a bounded thread pool over one shared session and
+    run `parse(response)` on each page. With an HTTPCache, pages are
+    revalidated instead of re-downloaded and unchanged pages are not
+    parsed again by the parser `parse_key` names (see HTTPCache.parsed).
+
+    Returns a list aligned with `urls`; failed pages give None.
+    """
+    own_session = session is None
+    if own_session:
+        session = make_session(pool_size=max_workers)
+    limiter = HostRateLimiter(rate_limit)
+
+    def worker(url):
+        try:
+            response = fetch(session, url, limiter=limiter, retries=retries,
+                             backoff=backoff, timeout=timeout, cache=cache)
+            if cache is not None:
+                return cache.parsed(response, parse, parse_key)
+            return parse(response)
+        except Exception as e:
+            print(f"  ⚠ Error fetching {url}: {e}")
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # map() keeps results in input order
+            return list(pool.map(worker, urls))
+    finally:
+        if own_session:
+            session.close()
@@ -0,0 +1,185 @@
+"""
+http_cache.py
+Persistent on-disk HTTP response cache for the IMDb scraper (SQLite).
+
+- Responses are keyed by URL and stored with their ETag / Last-Modified.
+- Entries younger than `ttl` seconds are served without touching the network.
+- Older entries are revalidated with If-None-Match / If-Modified-Since;
+  a 304 reuses the stored body.
+- Parsed results are stored next to the body, keyed by the parser and the
+  body's hash, so a page that has not changed is never parsed twice by the
+  same parser.
+- The total body size is capped at `max_bytes`, evicting least recently
+  used entries first.
+- offline=True serves only from the cache and never opens a connection.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import requests
+
+
+class CacheMiss(requests.exceptions.RequestException):
+    """Raised in offline mode when a URL is not in the cache."""
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for requests.Response as returned by HTTPCache.
+    from_cache is True when no body was downloaded (fresh hit or 304).
+    """
+
+    def __init__(self, url, status_code, headers, content, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.from_cache = from_cache
+        self.body_hash = hashlib.sha256(content).hexdigest()
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+
+class HTTPCache:
+    def __init__(self, path='.imdb_cache.sqlite', ttl=24 * 3600, max_bytes=200 * 1024 * 1024, offline=False):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.stats = {'fresh': 0, 'revalidated': 0, 'downloaded': 0, 'parse_reused': 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                body_hash TEXT,
+                size INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                validated_at REAL,
+                last_access REAL,
+                parsed_hash TEXT,
+                parsed TEXT
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self._db.commit()
+
+    def _row(self, url):
+        return self._db.execute(
+            "SELECT status, headers, body, etag, last_modified, validated_at FROM responses WHERE url = ?",
+            (url,)).fetchone()
+
+    def _response(self, url, row):
+        status, headers, body, *_ = row
+        with self._lock:
+            self._db.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        return CachedResponse(url, status, json.loads(headers), body, from_cache=True)
+
+    def lookup(self, url):
+        """
+        Return a CachedResponse if the entry can be used without the network
+        (fresh, or any entry in offline mode). Raises CacheMiss when offline
+        and the URL was never fetched.
+        """
+        with self._lock:
+            row = self._row(url)
+        if row is None:
+            if self.offline:
+                raise CacheMiss(f"offline and not cached: {url}")
+            return None
+        if self.offline or time.time() - row[5] < self.ttl:
+            self.stats['fresh'] += 1
+            return self._response(url, row)
+        return None
+
+    def conditional_headers(self, url):
+        with self._lock:
+            row = self._row(url)
+        headers = {}
+        if row is not None:
+            if row[3]:
+                headers['If-None-Match'] = row[3]
+            if row[4]:
+                headers['If-Modified-Since'] = row[4]
+        return headers
+
+    def store(self, url, response):
+        """
+        Record a network response. A 304 refreshes the stored entry and
+        returns it; a 200 replaces it. Other statuses are passed through.
+        """
+        now = time.time()
+        if response.status_code == 304:
+            with self._lock:
+                row = self._row(url)
+                if row is not None:
+                    self._db.execute("UPDATE responses SET validated_at = ? WHERE url = ?", (now, url))
+                    self._db.commit()
+            if row is not None:
+                self.stats['revalidated'] += 1
+                return self._response(url, row)
+            return response
+
+        if response.status_code != 200:
+            return response
+
+        self.stats['downloaded'] += 1
+        headers = dict(response.headers)
+        cached = CachedResponse(url, 200, headers, response.content, from_cache=False)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, status, headers, body, body_hash, size, etag, last_modified, validated_at, last_access, parsed_hash, parsed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, "
+                "(SELECT parsed_hash FROM responses WHERE url = ?), (SELECT parsed FROM responses WHERE url = ?))",
+                (url, 200, json.dumps(headers), response.content, cached.body_hash, len(response.content),
+                 response.headers.get('ETag'), response.headers.get('Last-Modified'), now, now, url, url))
+            self._evict()
+            self._db.commit()
+        return cached
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def parsed(self, response, parse, key=''):
+        """
+        Return parse(response), reusing the stored result when this URL's
+        body has not changed since it was last parsed with the same `key`
+        (the parser's name, version and backend; anything else is a miss).
+        """
+        body_hash = getattr(response, 'body_hash', None)
+        if body_hash is None:
+            return parse(response)
+        parse_key = f"{key}:{body_hash}"
+        with self._lock:
+            row = self._db.execute("SELECT parsed_hash, parsed FROM responses WHERE url = ?",
+                                   (response.url,)).fetchone()
+        if row is not None and row[0] == parse_key:
+            self.stats['parse_reused'] += 1
+            return json.loads(row[1])
+        result = parse(response)
+        with self._lock:
+            self._db.execute("UPDATE responses SET parsed_hash = ?, parsed = ? WHERE url = ?",
+                             (parse_key, json.dumps(result), response.url))
+            self._db.commit()
+        return result
+
+    def close(self):
+        self._db.close()
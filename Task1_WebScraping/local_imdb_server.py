@@ -0,0 +1,112 @@
+"""
+local_imdb_server.py
+Local stand-in for www.imdb.com that serves saved pages from a directory.
+
+Layout of the pages directory:
+    chart_top.html          -> /chart/top/
+    title_<imdb_id>.html    -> /title/<imdb_id>/
+
+Useful for exercising scrape_imdb_top250() / enrich_movies() without
+touching the real site:
+
+    python local_imdb_server.py pages/ --port 8000
+    # then in Python:
+    # movies = scrape_imdb_top250(base_url="http://127.0.0.1:8000")
+    # movies = enrich_movies(movies, base_url="http://127.0.0.1:8000")
+
+Pages are served with ETag / Last-Modified and answer If-None-Match
+with 304, like the real site. --fail-every N answers every Nth request with a 503 so the retry path
+can be checked; --latency adds a fixed delay per request.
+"""
+
+import argparse
+import hashlib
+import itertools
+import os
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TITLE_RE = re.compile(r'^/title/(tt\d+)/?')
+
+
+def make_handler(pages_dir, latency=0.0, fail_every=0):
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'   # keep-alive, like the real site
+
+        def do_GET(self):
+            with lock:
+                n = next(counter)
+            if latency:
+                time.sleep(latency)
+            if fail_every and n % fail_every == 0:
+                self._send(503, b'temporarily unavailable', {'Retry-After': '0'})
+                return
+
+            path = self.path.split('?', 1)[0]
+            if path.rstrip('/') == '/chart/top':
+                fname = 'chart_top.html'
+            else:
+                m = TITLE_RE.match(path)
+                fname = f"title_{m.group(1)}.html" if m else None
+
+            fpath = os.path.join(pages_dir, fname) if fname else None
+            if not fpath or not os.path.exists(fpath):
+                self._send(404, b'not found')
+                return
+            with open(fpath, 'rb') as f:
+                body = f.read()
+            validators = {
+                'ETag': '"%s"' % hashlib.sha1(body).hexdigest(),
+                'Last-Modified': formatdate(os.path.getmtime(fpath), usegmt=True),
+            }
+            if self.headers.get('If-None-Match') == validators['ETag']:
+                self._send(304, b'', validators)
+                return
+            validators['Content-Type'] = 'text/html; charset=utf-8'
+            self._send(200, body, validators)
+
+        def _send(self, status, body, headers=None):
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def serve(pages_dir, port=0, latency=0.0, fail_every=0):
+    """
+    Start the stand-in server on a background thread.
+    Returns (server, base_url); call server.shutdown() when done.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(pages_dir, latency, fail_every))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve saved IMDb pages locally")
+    parser.add_argument("pages_dir")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server, base_url = serve(args.pages_dir, args.port, args.latency, args.fail_every)
+    print(f"Serving {args.pages_dir} at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
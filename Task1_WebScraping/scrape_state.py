@@ -0,0 +1,156 @@
+"""
+scrape_state.py
+Persistent scrape state for incremental runs (SQLite, keyed by imdb_id).
+
+For every title we keep the latest rank / rating / vote count, the fetched
+details and when they were fetched, plus a history row each time the rank,
+rating or vote count changes. A run diffs the new chart against this
+snapshot and only fetches details for titles that are new, whose chart
+entry changed (title, year or rating), or whose details are older than
+`max_age` seconds. Vote counts move every day, so they are tracked in the
+history but do not trigger a refetch on their own. Storing a changed chart
+entry clears its details' fetch time, so a title whose refetch fails is
+fetched again on the next run.
+"""
+
+import json
+import sqlite3
+import time
+
+DETAIL_FIELDS = ('director', 'plot', 'runtime')
+
+
+class ScrapeState:
+    def __init__(self, path='imdb_state.sqlite', max_age=30 * 24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS titles (
+                imdb_id TEXT PRIMARY KEY,
+                rank INTEGER,
+                title TEXT,
+                year TEXT,
+                rating TEXT,
+                votes TEXT,
+                url TEXT,
+                first_seen REAL,
+                last_seen REAL,
+                details TEXT,
+                details_fetched_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS history (
+                imdb_id TEXT,
+                observed_at REAL,
+                rank INTEGER,
+                rating TEXT,
+                votes TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_history_id ON history(imdb_id, observed_at);
+        """)
+
+    def _snapshot(self):
+        rows = self._db.execute(
+            "SELECT imdb_id, rank, title, year, rating, votes, details_fetched_at FROM titles").fetchall()
+        return {r[0]: r[1:] for r in rows}
+
+    def diff(self, movies, now=None):
+        """
+        Compare a freshly scraped chart with the stored snapshot.
+        Returns lists of imdb_ids: new, changed, stale, moved, dropped.
+        """
+        now = now or time.time()
+        snapshot = self._snapshot()
+        result = {'new': [], 'changed': [], 'stale': [], 'moved': [], 'dropped': []}
+        seen = set()
+        for m in movies:
+            key = m['imdb_id']
+            if key == 'N/A':
+                continue
+            seen.add(key)
+            if key not in snapshot:
+                result['new'].append(key)
+                continue
+            rank, title, year, rating, votes, fetched_at = snapshot[key]
+            if (title, year, rating) != (str(m['title']), str(m['year']), str(m['rating'])):
+                result['changed'].append(key)
+            elif fetched_at is None or now - fetched_at > self.max_age:
+                result['stale'].append(key)
+            if rank != m['rank']:
+                result['moved'].append(key)
+        result['dropped'] = sorted(set(snapshot) - seen)
+        return result
+
+    def needs_details(self, movies, changes=None):
+        """
+        The movies whose details should be (re)fetched this run.
+        """
+        changes = changes or self.diff(movies)
+        todo = set(changes['new']) | set(changes['changed']) | set(changes['stale'])
+        return [m for m in movies if m['imdb_id'] in todo]
+
+    def update_chart(self, movies, now=None):
+        """
+        Store the new chart and append history rows for titles whose
+        rank, rating or vote count moved. Call after diff(). A changed
+        title, year or rating marks the stored details as unfetched until
+        record_details() stores new ones.
+        """
+        now = now or time.time()
+        snapshot = self._snapshot()
+        with self._db:
+            for m in movies:
+                key = m['imdb_id']
+                if key == 'N/A':
+                    continue
+                values = (m['rank'], str(m['rating']), str(m.get('votes', 'N/A')))
+                prev = snapshot.get(key)
+                if prev is None or (prev[0], prev[3], prev[4]) != values:
+                    self._db.execute("INSERT INTO history VALUES (?, ?, ?, ?, ?)", (key, now, *values))
+                self._db.execute("""
+                    INSERT INTO titles (imdb_id, rank, title, year, rating, votes, url, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(imdb_id) DO UPDATE SET
+                        rank = excluded.rank, title = excluded.title, year = excluded.year,
+                        rating = excluded.rating, votes = excluded.votes, url = excluded.url,
+                        last_seen = excluded.last_seen,
+                        details_fetched_at = CASE
+                            WHEN (title, year, rating) IS (excluded.title, excluded.year, excluded.rating)
+                            THEN details_fetched_at END
+                """, (key, m['rank'], str(m['title']), str(m['year']), values[1], values[2],
+                      m['url'], now, now))
+
+    def record_details(self, movies, now=None):
+        """
+        Store details for movies that were fetched successfully.
+        """
+        now = now or time.time()
+        with self._db:
+            for m in movies:
+                if m['imdb_id'] == 'N/A' or 'director' not in m:
+                    continue
+                details = {k: m[k] for k in DETAIL_FIELDS if k in m}
+                self._db.execute("UPDATE titles SET details = ?, details_fetched_at = ? WHERE imdb_id = ?",
+                                 (json.dumps(details), now, m['imdb_id']))
+
+    def merge_details(self, movies):
+        """
+        Fill in stored details for movies that were not fetched this run.
+        """
+        stored = dict(self._db.execute(
+            "SELECT imdb_id, details FROM titles WHERE details IS NOT NULL").fetchall())
+        for m in movies:
+            if 'director' not in m and m['imdb_id'] in stored:
+                m.update(json.loads(stored[m['imdb_id']]))
+        return movies
+
+    def history(self, imdb_id):
+        """
+        [(observed_at, rank, rating, votes), ...] for one title, oldest first
+        """
+        return self._db.execute(
+            "SELECT observed_at, rank, rating, votes FROM history WHERE imdb_id = ? ORDER BY observed_at",
+            (imdb_id,)).fetchall()
+
+    def close(self):
+        self._db.close()
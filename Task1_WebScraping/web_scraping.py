@@ -1,14 +1,53 @@
 import requests
 from bs4 import BeautifulSoup
-import pandas as pd
-import json
+import os
+import sys
 import time
 
-def scrape_imdb_top250():
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.instrumentation import configure, finish, section, stage
+from fetcher import fetch, fetch_many, make_session
+from http_cache import HTTPCache
+from extraction import CHART_COLUMNS, IMDB_BASE_URL, PARSE_VERSION, backend_name, extract_chart
+from scrape_state import DETAIL_FIELDS, ScrapeState
+from writers import COLUMNAR, export_excel, make_sinks, pa, write_stream
+
+# Chart parser backend: 'auto', 'html.parser', 'lxml' or 'selectolax'
+PARSER_BACKEND = "auto"
+
+# Version of the parse_movie_details() output; cached parses of other versions are not reused
+DETAILS_VERSION = 1
+DETAILS_PARSE_KEY = f"details:{DETAILS_VERSION}"
+
+# On-disk HTTP cache (set OFFLINE = True to serve only from the cache)
+CACHE_PATH = ".imdb_cache.sqlite"
+CACHE_TTL = 24 * 3600
+OFFLINE = False
+
+# Output formats written by save_results(format='all'); Excel is optional
+# and built from the Parquet file afterwards
+ALL_FORMATS = ['csv', 'json', 'ndjson', 'parquet', 'feather']
+EXPORT_EXCEL = True
+# Columns of the CSV/columnar outputs after enrich_movies()
+DETAIL_COLUMNS = CHART_COLUMNS + DETAIL_FIELDS
+
+# Incremental state: details are refetched only for new/changed titles
+# or when older than DETAILS_MAX_AGE seconds
+STATE_PATH = "imdb_state.sqlite"
+DETAILS_MAX_AGE = 30 * 24 * 3600
+
+# Per-stage timing/memory trace in trace.jsonl (also switched on by
+# TASK_TRACE=1; see common/instrumentation.py)
+TRACE = False
+
+def scrape_imdb_top250(base_url=IMDB_BASE_URL, cache=None):
     """
     Scrape IMDb Top 250 movies list
+    (base_url can point at a local stand-in server, see local_imdb_server.py)
+    With an HTTPCache the chart is revalidated instead of re-downloaded,
+    and not re-parsed when unchanged.
     """
-    url = "https://www.imdb.com/chart/top/"
+    url = f"{base_url}/chart/top/"
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -18,114 +57,112 @@ def scrape_imdb_top250():
     print("🎬 Scraping IMDb Top 250 Movies...")
     
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        movies = []
-        
-        # Find all movie items in the list
-        # IMDb uses <li> elements with class containing 'ipc-metadata-list'
-        movie_items = soup.find_all('li', class_='ipc-metadata-list-summary-item')
-        
-        print(f"Found {len(movie_items)} movies")
-        
-        for idx, item in enumerate(movie_items, 1):
-            try:
-                # Extract movie title
-                title_elem = item.find('h3', class_='ipc-title__text')
-                if title_elem:
-                    title_text = title_elem.get_text(strip=True)
-                    # Remove ranking number (e.g., "1. The Shawshank Redemption" -> "The Shawshank Redemption")
-                    title = title_text.split('. ', 1)[1] if '. ' in title_text else title_text
-                else:
-                    title = 'N/A'
-                
-                # Extract year
-                year_elem = item.find('span', class_='sc-b189961a-8')
-                year = year_elem.get_text(strip=True) if year_elem else 'N/A'
-                
-                # Extract rating
-                rating_elem = item.find('span', class_='ipc-rating-star')
-                if rating_elem:
-                    rating_text = rating_elem.get_text(strip=True)
-                    rating = rating_text.split()[0] if rating_text else 'N/A'
-                else:
-                    rating = 'N/A'
-                
-                # Extract IMDb link
-                link_elem = item.find('a', class_='ipc-title-link-wrapper')
-                movie_link = f"https://www.imdb.com{link_elem['href']}" if link_elem and 'href' in link_elem.attrs else 'N/A'
-                
-                # Extract movie ID from URL
-                movie_id = 'N/A'
-                if movie_link != 'N/A':
-                    try:
-                        movie_id = movie_link.split('/title/')[1].split('/')[0]
-                    except:
-                        pass
-                
-                movies.append({
-                    'rank': idx,
-                    'title': title,
-                    'year': year,
-                    'rating': rating,
-                    'imdb_id': movie_id,
-                    'url': movie_link
-                })
-                
-                # Progress indicator
-                if idx % 50 == 0:
-                    print(f"  Processed {idx} movies...")
-                
-            except Exception as e:
-                print(f"  ⚠ Error parsing movie {idx}: {e}")
-                continue
+        if cache is None:
+            response = requests.get(url, headers=headers, timeout=15)
+            response.raise_for_status()
+            return parse_chart(response.content)
         
-        return movies
+        with make_session(pool_size=1, headers=headers) as session:
+            response = fetch(session, url, timeout=15, cache=cache)
+        return cache.parsed(response, lambda r: parse_chart(r.content),
+                            f"chart:{PARSE_VERSION}:{backend_name(PARSER_BACKEND)}")
         
     except requests.exceptions.RequestException as e:
         print(f"✗ Error fetching IMDb: {e}")
         return []
 
-def save_results(movies, format='all'):
+def parse_chart(html, backend=PARSER_BACKEND):
+    """
+    Parse the Top 250 chart page into a list of movie dicts
+    (see extraction.py for the field spec and parser backends)
+    """
+    with stage("parse chart") as st:
+        movies = extract_chart(html, backend=backend)
+        st.rows = len(movies)
+    print(f"Found {len(movies)} movies")
+    return movies
+
+def save_results(movies, format='all', excel=EXPORT_EXCEL, columns=CHART_COLUMNS):
     """
     Save scraped data in multiple formats
+    `movies` can be any iterable (e.g. a generator) - records are streamed
+    to all writers in parallel, see writers.py. `columns` are the CSV and
+    columnar columns (DETAIL_COLUMNS for enriched movies). Excel is built
+    afterwards from the columnar file when excel=True.
     """
-    if not movies:
-        print("No data to save!")
-        return
+    if format == 'all':
+        formats = list(ALL_FORMATS)
+    else:
+        formats = [format] if isinstance(format, str) else list(format)
+    if 'excel' in formats:
+        formats.remove('excel')
+        excel = True
+    if excel and pa is None and 'csv' not in formats:
+        formats.append('csv')
+    elif excel and pa is not None and not any(f in formats for f in COLUMNAR):
+        formats.append('parquet')
     
-    df = pd.DataFrame(movies)
+    sinks = make_sinks(formats)
+    top = []
     
-    # CSV
-    if format in ['all', 'csv']:
-        csv_file = 'imdb_top250.csv'
-        df.to_csv(csv_file, index=False, encoding='utf-8')
-        print(f"✓ Saved to {csv_file}")
+    def track(records):
+        for movie in records:
+            if len(top) < 5:
+                top.append(movie)
+            yield movie
     
-    # JSON
-    if format in ['all', 'json']:
-        json_file = 'imdb_top250.json'
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(movies, f, indent=2, ensure_ascii=False)
-        print(f"✓ Saved to {json_file}")
+    count, errors = write_stream(track(movies), sinks, columns)
+    if count == 0:
+        print("No data to save!")
+        return
+    
+    for sink in sinks:
+        if sink.path in errors:
+            print(f"✗ Failed to write {sink.path}: {errors[sink.path]}")
+        else:
+            print(f"✓ Saved to {sink.path}")
     
-    # Excel
-    if format in ['all', 'excel']:
-        excel_file = 'imdb_top250.xlsx'
-        df.to_excel(excel_file, index=False, engine='openpyxl')
-        print(f"✓ Saved to {excel_file}")
+    # Excel (built from the columnar file, not from the records; the CSV without pyarrow)
+    if excel:
+        source_formats = COLUMNAR if pa is not None else ('csv',)
+        source = next((s.path for s in sinks
+                       if s.path not in errors and s.path.rsplit('.', 1)[1] in source_formats), None)
+        if source is None:
+            print(f"✗ Skipped Excel: no {'/'.join(source_formats)} file was written")
+        else:
+            excel_file = export_excel(source)
+            print(f"✓ Saved to {excel_file}")
     
     # Display summary
     print(f"\n📊 Summary:")
-    print(f"   Total movies: {len(movies)}")
+    print(f"   Total movies: {count}")
     print(f"   Top 5 movies:")
-    for movie in movies[:5]:
+    for movie in top:
         print(f"   {movie['rank']}. {movie['title']} ({movie['year']}) - ⭐ {movie['rating']}")
 
-def get_movie_details(movie_url):
+def parse_movie_details(html):
+    """
+    Extract director, plot and runtime from a movie page
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    details = {}
+    
+    # Extract director
+    director_elem = soup.find('a', class_='ipc-metadata-list-item__list-content-item')
+    details['director'] = director_elem.get_text(strip=True) if director_elem else 'N/A'
+    
+    # Extract plot summary
+    plot_elem = soup.find('span', class_='sc-466bb6c-2')
+    details['plot'] = plot_elem.get_text(strip=True) if plot_elem else 'N/A'
+    
+    # Extract runtime
+    runtime_elem = soup.find('li', class_='ipc-inline-list__item', string=lambda x: x and 'h' in str(x))
+    details['runtime'] = runtime_elem.get_text(strip=True) if runtime_elem else 'N/A'
+    
+    return details
+
+def get_movie_details(movie_url, cache=None):
     """
     Optional: Get additional details for a specific movie
     """
@@ -134,29 +171,55 @@ def get_movie_details(movie_url):
     }
     
     try:
-        response = requests.get(movie_url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        details = {}
+        if cache is None:
+            response = requests.get(movie_url, headers=headers, timeout=10)
+            return parse_movie_details(response.content)
         
-        # Extract director
-        director_elem = soup.find('a', class_='ipc-metadata-list-item__list-content-item')
-        details['director'] = director_elem.get_text(strip=True) if director_elem else 'N/A'
-        
-        # Extract plot summary
-        plot_elem = soup.find('span', class_='sc-466bb6c-2')
-        details['plot'] = plot_elem.get_text(strip=True) if plot_elem else 'N/A'
-        
-        # Extract runtime
-        runtime_elem = soup.find('li', class_='ipc-inline-list__item', string=lambda x: x and 'h' in str(x))
-        details['runtime'] = runtime_elem.get_text(strip=True) if runtime_elem else 'N/A'
-        
-        return details
+        with make_session(pool_size=1, headers=headers) as session:
+            response = fetch(session, movie_url, cache=cache)
+        return cache.parsed(response, lambda r: parse_movie_details(r.content), DETAILS_PARSE_KEY)
         
     except Exception as e:
         print(f"Error getting movie details: {e}")
         return {}
 
+def enrich_movies(movies, max_workers=8, rate_limit=4.0, retries=3, base_url=IMDB_BASE_URL, cache=None):
+    """
+    Fetch details for many movies at once and merge them into `movies`.
+    Pages are fetched by a bounded thread pool over one keep-alive session,
+    at most `rate_limit` requests/second, with retries on 429/5xx.
+    Returns the movies sorted by rank.
+    """
+    movies = sorted(movies, key=lambda m: m['rank'])
+    todo = [m for m in movies if m['url'] != 'N/A']
+    urls = [m['url'].replace(IMDB_BASE_URL, base_url, 1) for m in todo]
+    
+    print(f"🔍 Fetching details for {len(urls)} movies ({max_workers} workers, {rate_limit} req/s)...")
+    results = fetch_many(urls, lambda r: parse_movie_details(r.content),
+                         max_workers=max_workers, rate_limit=rate_limit, retries=retries, cache=cache,
+                         parse_key=DETAILS_PARSE_KEY)
+    
+    failed = 0
+    for movie, details in zip(todo, results):
+        if details is None:
+            failed += 1
+            continue
+        movie.update(details)
+    print(f"✓ Enriched {len(todo) - failed} movies ({failed} failed)")
+    
+    return movies
+
+def enrich_changed(movies, state, changes=None, **kwargs):
+    """
+    Incremental enrich_movies(): fetch details only for titles that are new,
+    changed or stale in `state`, and reuse stored details for the rest.
+    """
+    todo = state.needs_details(movies, changes)
+    print(f"🔍 {len(todo)} of {len(movies)} movies need fresh details")
+    if todo:
+        state.record_details(enrich_movies(todo, **kwargs))
+    return state.merge_details(sorted(movies, key=lambda m: m['rank']))
+
 # ============================================
 # MAIN EXECUTION
 # ============================================
@@ -166,31 +229,48 @@ if __name__ == "__main__":
     print("IMDb TOP 250 MOVIES SCRAPER")
     print("=" * 60)
     
+    configure("web_scraping", enabled=TRACE)
+    
+    # Responses are cached on disk and revalidated on later runs
+    cache = HTTPCache(CACHE_PATH, ttl=CACHE_TTL, offline=OFFLINE)
+    
+    state = ScrapeState(STATE_PATH, max_age=DETAILS_MAX_AGE)
+    
     # Scrape the top 250 list
-    movies = scrape_imdb_top250()
+    section("scrape chart")
+    movies = scrape_imdb_top250(cache=cache)
     
     if movies:
+        # Diff against the previous run and record rank/rating history
+        section("update state", rows=len(movies))
+        changes = state.diff(movies)
+        print(f"📈 Since last run: {len(changes['new'])} new, {len(changes['changed'])} changed, "
+              f"{len(changes['moved'])} moved, {len(changes['dropped'])} dropped")
+        state.update_chart(movies)
+        
         # Save in all formats
+        section("save results", rows=len(movies))
         save_results(movies, format='all')
         
         print("\n" + "=" * 60)
         print("✅ Scraping completed successfully!")
         print("=" * 60)
         
-        # Optional: Get detailed info for top 5 movies
+        # Optional: Get detailed info (director, plot, runtime) for every movie
         # Uncomment the code below if you want detailed information
-        # print("\n🔍 Getting detailed information for top 5 movies...")
-        # for movie in movies[:5]:
-        #     if movie['url'] != 'N/A':
-        #         print(f"\nFetching details for: {movie['title']}")
-        #         details = get_movie_details(movie['url'])
-        #         movie.update(details)
-        #         time.sleep(2)  # Be respectful with delays
+        # (only new, changed or stale titles are fetched again)
+        # movies = enrich_changed(movies, state, changes, max_workers=8, rate_limit=4.0, cache=cache)
+        # save_results(movies, format='all', columns=DETAIL_COLUMNS)
         
     else:
         print("\n❌ Failed to scrape movies. Please check your internet connection.")
         print("Note: IMDb may have updated their HTML structure.")
         print("Try using Selenium for JavaScript-rendered content.")
+    
+    print(f"HTTP cache: {cache.stats}")
+    cache.close()
+    state.close()
+    finish()
 
 # ============================================
 # ALTERNATIVE: Using Selenium for Dynamic Content
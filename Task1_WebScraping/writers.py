@@ -0,0 +1,283 @@
+"""
+writers.py
+Streaming, parallel output writers for the scraped movie list.
+
+Records are pushed in batches to every sink; each sink runs on its own
+thread behind a small bounded queue, so slow writers overlap with each
+other and with parsing instead of running one after another.
+
+Sinks:
+    csv      imdb_top250.csv       (same layout as before)
+    json     imdb_top250.json      (same indent=2 array as before)
+    ndjson   imdb_top250.ndjson    one JSON object per line
+    parquet  imdb_top250.parquet   typed columns (needs pyarrow)
+    feather  imdb_top250.feather   typed columns (needs pyarrow)
+
+The columnar files use proper types (int rank/year/votes, float rating,
+nulls for 'N/A'). Excel is an optional export built afterwards from the
+Parquet/Feather file (see export_excel).
+"""
+
+import csv
+import json
+import os
+import queue
+import threading
+
+from common.instrumentation import stage
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Columns with a numeric type in the columnar outputs; everything else is a string
+TYPED_COLUMNS = {
+    'rank': 'int',
+    'year': 'int',
+    'rating': 'float',
+    'votes': 'int',
+}
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_str(value):
+    return None if value is None else str(value)
+
+
+CONVERTERS = {'int': _to_int, 'float': _to_float}
+
+
+def arrow_schema(columns):
+    types = {'int': pa.int64(), 'float': pa.float64()}
+    return pa.schema([(c, types.get(TYPED_COLUMNS.get(c), pa.string())) for c in columns])
+
+
+def record_batch(records, columns, schema):
+    arrays = []
+    for c in columns:
+        convert = CONVERTERS.get(TYPED_COLUMNS.get(c), _to_str)
+        arrays.append([convert(r.get(c)) for r in records])
+    return pa.RecordBatch.from_arrays([pa.array(a, type=schema.field(c).type) for a, c in zip(arrays, columns)],
+                                      schema=schema)
+
+
+# ------------- Sinks -------------
+class CSVSink:
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, columns):
+        self._f = open(self.path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._f, fieldnames=columns, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write(self, records):
+        self._writer.writerows(records)
+
+    def close(self):
+        self._f.close()
+
+
+class JSONSink:
+    """Streams the same output as json.dump(movies, f, indent=2)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, columns):
+        self._f = open(self.path, 'w', encoding='utf-8')
+        self._first = True
+
+    def write(self, records):
+        for r in records:
+            item = json.dumps(r, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+            self._f.write(('[\n  ' if self._first else ',\n  ') + item)
+            self._first = False
+
+    def close(self):
+        self._f.write('[]' if self._first else '\n]')
+        self._f.close()
+
+
+class NDJSONSink:
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, columns):
+        self._f = open(self.path, 'w', encoding='utf-8')
+
+    def write(self, records):
+        self._f.writelines(json.dumps(r, ensure_ascii=False) + '\n' for r in records)
+
+    def close(self):
+        self._f.close()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, columns):
+        self._columns = columns
+        self._schema = arrow_schema(columns)
+        self._writer = pq.ParquetWriter(self.path, self._schema)
+
+    def write(self, records):
+        self._writer.write_batch(record_batch(records, self._columns, self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class FeatherSink:
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, columns):
+        self._columns = columns
+        self._schema = arrow_schema(columns)
+        self._writer = pa.ipc.new_file(self.path, self._schema)
+
+    def write(self, records):
+        self._writer.write_batch(record_batch(records, self._columns, self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+SINKS = {
+    'csv': ('imdb_top250.csv', CSVSink),
+    'json': ('imdb_top250.json', JSONSink),
+    'ndjson': ('imdb_top250.ndjson', NDJSONSink),
+    'parquet': ('imdb_top250.parquet', ParquetSink),
+    'feather': ('imdb_top250.feather', FeatherSink),
+}
+COLUMNAR = ('parquet', 'feather')
+
+
+def make_sinks(formats, base_name=None):
+    """
+    Build sinks for the requested formats; columnar ones are skipped
+    (with a warning) when pyarrow is not installed.
+    """
+    sinks = []
+    for fmt in formats:
+        if fmt in COLUMNAR and pa is None:
+            print(f"  ⚠ Skipping {fmt}: pip install pyarrow")
+            continue
+        path, cls = SINKS[fmt]
+        if base_name:
+            path = f"{base_name}.{path.rsplit('.', 1)[1]}"
+        sinks.append(cls(path))
+    return sinks
+
+
+# ------------- Parallel fan-out -------------
+class _SinkThread(threading.Thread):
+    def __init__(self, sink, columns, depth):
+        super().__init__(daemon=True)
+        self.sink = sink
+        self.columns = columns
+        self.batches = queue.Queue(maxsize=depth)
+        self.error = None
+
+    def run(self):
+        done = False
+        try:
+            with stage(f"write {self.sink.path}") as st:
+                self.sink.open(self.columns)
+                while True:
+                    batch = self.batches.get()
+                    if batch is None:
+                        done = True
+                        break
+                    self.sink.write(batch)
+                    st.rows = (st.rows or 0) + len(batch)
+                self.sink.close()
+        except Exception as e:
+            self.error = e
+            self._discard()
+            # keep draining so the producer never blocks on a dead sink
+            while not done:
+                done = self.batches.get() is None
+
+
+    def _discard(self):
+        # close the failed sink and remove its partial file
+        try:
+            self.sink.close()
+        except Exception:
+            pass
+        try:
+            os.remove(self.sink.path)
+        except OSError:
+            pass
+
+
+def write_stream(records, sinks, columns=(), batch_size=100, queue_depth=4):
+    """
+    Stream `records` (any iterable) to all sinks in parallel.
+    The CSV and columnar files get the declared `columns`, then any other
+    keys of the first batch; keys first seen in a later batch are not in
+    them. Returns the number of records written and a dict of sink
+    path -> error for failed sinks.
+    """
+    threads = []
+    batch = []
+    count = 0
+
+    def dispatch(batch):
+        nonlocal threads
+        if not threads:
+            keys = list(dict.fromkeys([*columns, *(k for r in batch for k in r)]))
+            threads = [_SinkThread(s, keys, queue_depth) for s in sinks]
+            for t in threads:
+                t.start()
+        for t in threads:
+            t.batches.put(batch)
+
+    for record in records:
+        batch.append(record)
+        count += 1
+        if len(batch) >= batch_size:
+            dispatch(batch)
+            batch = []
+    if batch:
+        dispatch(batch)
+
+    for t in threads:
+        t.batches.put(None)
+    for t in threads:
+        t.join()
+    return count, {t.sink.path: t.error for t in threads if t.error}
+
+
+def export_excel(columnar_path, excel_path='imdb_top250.xlsx'):
+    """
+    Build the Excel export from a Parquet or Feather file
+    (or the CSV when pyarrow is not installed).
+    """
+    import pandas as pd
+    if columnar_path.endswith('.parquet'):
+        df = pd.read_parquet(columnar_path)
+    elif columnar_path.endswith('.feather'):
+        df = pd.read_feather(columnar_path)
+    else:
+        df = pd.read_csv(columnar_path)
+    df.to_excel(excel_path, index=False, engine='openpyxl')
+    return excel_path
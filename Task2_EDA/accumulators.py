@@ -0,0 +1,226 @@
+"""
+accumulators.py
+Mergeable accumulators for chunked (out-of-core) EDA.
+
+Each accumulator is updated chunk by chunk, can be merged with another
+instance built from a different part of the data (merge order does not
+change the result), and holds state bounded by the number of distinct
+keys / columns, never by the number of rows:
+
+    GroupedSum      per-key sums or counts (value counts, groupby sums)
+    Moments         count / mean / variance / min / max per column
+    CoMoments       pairwise-complete co-moments -> correlation matrix
+    QuantileSketch  quantiles; exact up to `capacity` distinct values
+
+Approximation bounds (vs. the same statistic on the full frame):
+- GroupedSum, counts, min/max: exact. Key order follows first appearance,
+  so ties in value counts come out as in pandas.
+- mean: exact for integer columns, float rounding (~1e-15 relative) otherwise
+- std / correlation: computed from merged moments instead of pandas'
+  two-pass formula; agree to ~1e-12 relative
+- quantiles: exact while a column has <= capacity distinct values; past
+  that, values are merged into `capacity` equal-weight centroids and the
+  rank error is at most ~1/capacity
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class GroupedSum:
+    """
+    Per-key sums of a Series (or of each column of a DataFrame) indexed by
+    key; keys stay in order of first appearance across updates.
+    """
+
+    def __init__(self):
+        self.values = None
+
+    def add(self, partial):
+        if self.values is None or len(self.values) == 0:
+            self.values = partial
+        elif len(partial):
+            levels = list(range(partial.index.nlevels))
+            self.values = pd.concat([self.values, partial]).groupby(level=levels, sort=False, dropna=False).sum()
+        return self
+
+    def merge(self, other):
+        return self.add(other.values) if other.values is not None else self
+
+    def result(self, sort_index=False):
+        values = self.values if self.values is not None else pd.Series(dtype="int64")
+        return values.sort_index() if sort_index else values
+
+    def most_common(self):
+        """
+        Like Series.value_counts(): descending, ties in order of first appearance.
+        """
+        return self.result().sort_values(ascending=False, kind="stable")
+
+
+class Moments:
+    """
+    count, sum, M2 (sum of squared deviations), min and max per column,
+    merged with Chan et al.'s parallel update.
+    """
+
+    def __init__(self):
+        self.n = self.total = self.m2 = self.min = self.max = None
+
+    def update(self, frame):
+        n = frame.count()
+        total = frame.sum()
+        mean = total / n.where(n > 0)
+        m2 = ((frame - mean) ** 2).sum()
+        return self._combine(n, total, m2, frame.min(), frame.max())
+
+    def merge(self, other):
+        if other.n is None:
+            return self
+        return self._combine(other.n, other.total, other.m2, other.min, other.max)
+
+    def _combine(self, n, total, m2, mn, mx):
+        if self.n is None:
+            self.n, self.total, self.m2, self.min, self.max = n, total, m2, mn, mx
+            return self
+        cols = self.n.index.union(n.index, sort=False)
+        n_a, n_b = self.n.reindex(cols, fill_value=0), n.reindex(cols, fill_value=0)
+        t_a, t_b = self.total.reindex(cols, fill_value=0), total.reindex(cols, fill_value=0)
+        n_ab = n_a + n_b
+        delta = t_b / n_b.where(n_b > 0) - t_a / n_a.where(n_a > 0)
+        cross = (delta ** 2 * n_a * n_b / n_ab.where(n_ab > 0)).fillna(0)
+        self.m2 = self.m2.reindex(cols, fill_value=0) + m2.reindex(cols, fill_value=0) + cross
+        self.n, self.total = n_ab, t_a + t_b
+        self.min = pd.concat([self.min.reindex(cols), mn.reindex(cols)], axis=1).min(axis=1)
+        self.max = pd.concat([self.max.reindex(cols), mx.reindex(cols)], axis=1).max(axis=1)
+        return self
+
+    def mean(self):
+        return self.total / self.n.where(self.n > 0)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.m2 / (self.n - ddof).where(self.n > ddof))
+
+
+class CoMoments:
+    """
+    Pairwise-complete sums for a correlation matrix (same missing-value
+    handling as DataFrame.corr()). Values are shifted by the first chunk's
+    column means to keep the sums well conditioned.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((k, k))
+        self.sx = np.zeros((k, k))    # sx[i, j]: sum of x_i where x_i and x_j are both present
+        self.sxx = np.zeros((k, k))
+        self.sxy = np.zeros((k, k))
+
+    def update(self, frame):
+        x = frame[self.columns].to_numpy(dtype=np.float64)
+        if self.shift is None:
+            with np.errstate(all="ignore"):
+                self.shift = np.nan_to_num(np.nanmean(x, axis=0)) if len(x) else np.zeros(len(self.columns))
+        present = ~np.isnan(x)
+        m = present.astype(np.float64)
+        z = np.where(present, x - self.shift, 0.0)
+        self.n += m.T @ m
+        self.sx += z.T @ m
+        self.sxx += (z * z).T @ m
+        self.sxy += z.T @ z
+        return self
+
+    def merge(self, other):
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+            self.n, self.sx, self.sxx, self.sxy = other.n.copy(), other.sx.copy(), other.sxx.copy(), other.sxy.copy()
+            return self
+        # re-express other's sums around this instance's shift: z = z_other + d
+        d = other.shift - self.shift
+        di, dj = d[:, None], d[None, :]
+        self.sxx += other.sxx + 2 * di * other.sx + other.n * di ** 2
+        self.sxy += other.sxy + dj * other.sx + di * other.sx.T + other.n * di * dj
+        self.sx += other.sx + other.n * di
+        self.n += other.n
+        return self
+
+    def corr(self):
+        n = np.where(self.n > 1, self.n, np.nan)
+        sx, sy = self.sx, self.sx.T
+        cov = self.sxy - sx * sy / n
+        var_x = self.sxx - sx * sx / n
+        var_y = self.sxx.T - sy * sy / n
+        with np.errstate(all="ignore"):
+            corr = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+        corr[(var_x <= 0) | (var_y <= 0)] = np.nan
+        diag = np.diag_indices(len(self.columns))
+        corr[diag] = np.where(np.isnan(corr[diag]), np.nan, 1.0)
+        # beyond the accuracy bound; also turns rounding noise around 0 into 0.0 (not -0.0)
+        corr = np.round(corr, 12) + 0.0
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+class QuantileSketch:
+    """
+    Sorted (value, count) pairs; exact until there are more than `capacity`
+    distinct values, then compressed into `capacity` equal-weight centroids.
+    Quantiles use linear interpolation, like Series.quantile().
+    """
+
+    def __init__(self, capacity=100_000):
+        self.capacity = capacity
+        self.values = np.empty(0)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.exact = True
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            v, c = np.unique(values, return_counts=True)
+            self._add(v, c)
+        return self
+
+    def merge(self, other):
+        self.exact &= other.exact
+        if len(other.values):
+            self._add(other.values, other.counts)
+        return self
+
+    def _add(self, values, counts):
+        v, inverse = np.unique(np.concatenate([self.values, values]), return_inverse=True)
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts]),
+                                  minlength=len(v)).astype(np.int64)
+        self.values = v
+        if len(v) > self.capacity:
+            self._compress()
+
+    def _compress(self):
+        total = self.counts.sum()
+        before = np.cumsum(self.counts) - self.counts
+        bucket = (before * self.capacity // total).astype(np.int64)
+        counts = np.bincount(bucket, weights=self.counts)
+        sums = np.bincount(bucket, weights=self.values * self.counts)
+        keep = counts > 0
+        self.values = sums[keep] / counts[keep]
+        self.counts = counts[keep].astype(np.int64)
+        self.exact = False
+
+    def count(self):
+        return int(self.counts.sum())
+
+    def quantile(self, q):
+        n = self.count()
+        if n == 0:
+            return np.nan
+        pos = q * (n - 1)
+        lo = int(np.floor(pos))
+        cum = np.cumsum(self.counts)
+        idx = np.searchsorted(cum, [lo + 1, min(lo + 2, n)])
+        a, b = self.values[idx[0]], self.values[idx[1]]
+        # same interpolation formula as numpy/pandas
+        return float(np.quantile(np.array([a, b]), pos - lo))
@@ -0,0 +1,84 @@
+"""
+aggregates.py
+Per-match and per-innings aggregates of a deliveries (ball-by-ball) frame.
+
+One grouped pass over (match, inning) with named aggregations computes
+total runs, batsman runs, extras, wickets, balls and boundaries; per-match
+totals are then summed from the (much smaller) per-innings table. The
+runs-per-match, runs-vs-wickets and innings t-test outputs of ipl_eda.py
+all read from these two tables.
+
+The grouped partials are plain sums, so chunks of a file can be aggregated
+separately and combined (streaming_eda.py).
+"""
+
+BOUNDARY_RUNS = (4, 6)
+
+
+def innings_partials(deliveries, match_id_col, inning_col=None, batsman_runs_col=None,
+                     extra_runs_col=None, total_runs_col=None, dismissal_col=None):
+    """
+    The grouped pass: sums per (match, inning) - or per match when there is
+    no inning column - indexed by those keys, missing keys included.
+    Partials of different chunks or files can be concatenated and summed
+    again by key (see accumulators.GroupedSum) before finalize_aggregates().
+    """
+    aggs = {"balls": (match_id_col, "size")}
+    if total_runs_col is not None:
+        aggs["total_runs"] = (total_runs_col, "sum")
+    if batsman_runs_col is not None:
+        aggs["batsman_runs"] = (batsman_runs_col, "sum")
+        aggs["boundaries"] = ("_boundary", "sum")
+    if extra_runs_col is not None:
+        aggs["extras"] = (extra_runs_col, "sum")
+    if dismissal_col is not None:
+        aggs["total_wickets"] = (dismissal_col, "count")
+
+    keys = [match_id_col] + ([inning_col] if inning_col is not None else [])
+    used = list(dict.fromkeys(keys + [src for src, _ in aggs.values() if src != "_boundary"]))
+    frame = deliveries[used]
+    if batsman_runs_col is not None:
+        frame = frame.assign(_boundary=deliveries[batsman_runs_col].isin(BOUNDARY_RUNS))
+    return frame.groupby(keys, observed=True, dropna=False, sort=False).agg(**aggs)
+
+
+def finalize_aggregates(partials, match_id_col, inning_col=None):
+    """
+    (per_match, per_innings) from innings_partials() output.
+    """
+    per_innings = partials.sort_index().reset_index()
+    per_innings = per_innings[per_innings[match_id_col].notna()]
+    if "total_runs" not in per_innings.columns and "batsman_runs" in per_innings.columns:
+        # sum of batsman runs + sum of extras (missing values count as 0 in both)
+        per_innings = per_innings.assign(total_runs=per_innings["batsman_runs"] + per_innings.get("extras", 0))
+
+    keys = [match_id_col] + ([inning_col] if inning_col is not None else [])
+    per_match = (per_innings.drop(columns=keys[1:])
+                 .groupby(match_id_col, observed=True, sort=True)
+                 .sum()
+                 .reset_index())
+    if inning_col is not None:
+        per_innings = per_innings[per_innings[inning_col].notna()]
+    return per_match, per_innings.reset_index(drop=True)
+
+
+def match_aggregates(deliveries, match_id_col, inning_col=None, batsman_runs_col=None,
+                     extra_runs_col=None, total_runs_col=None, dismissal_col=None):
+    """
+    Returns (per_match, per_innings) DataFrames.
+
+    per_innings has one row per (match, inning) - or per match when there is
+    no inning column - and per_match one row per match, with whichever of
+    these columns the input allows:
+        total_runs      total_runs_col, else batsman runs + extras, else batsman runs
+        batsman_runs    sum of batsman_runs_col
+        extras          sum of extra_runs_col
+        total_wickets   non-null dismissal_col entries
+        balls           deliveries
+        boundaries      deliveries with batsman runs of 4 or 6
+    Rows with a missing match id are dropped, as in a plain groupby; rows
+    with a missing inning still count towards their match.
+    """
+    partials = innings_partials(deliveries, match_id_col, inning_col, batsman_runs_col,
+                                extra_runs_col, total_runs_col, dismissal_col)
+    return finalize_aggregates(partials, match_id_col, inning_col)
@@ -0,0 +1,73 @@
+"""
+batch_eda.py
+Map-reduce EDA over a dataset split into many CSVs with the same header
+(one file per season or per match), named by a directory or glob pattern.
+
+    paths = expand_paths(FILE_PATH)     # common/map_reduce.py
+    state = batch_eda(paths, mode, OUTPUT_DIR, chunk_size=500_000, workers=None)
+
+Map: runs of consecutive files (common/map_reduce.map_files) are streamed
+in a process pool, each run into its own EdaState (streaming_eda.py), its
+rows with missing values written to a temporary directory. Reduce: the
+states are merged in file order with EdaState.merge - grouped sums,
+moments, co-moments and quantile sketches are associative - and the row
+files are concatenated. The result is the state stream_eda() builds for
+the files concatenated in name order, so ipl_eda.py writes the same tables
+and plots from it, within the bounds listed in accumulators.py (counts and
+sums exact, means, std and correlations to float rounding). The runs do
+not depend on the number of workers, so neither do the results.
+"""
+
+import shutil
+import tempfile
+
+import pandas as pd
+
+from common.map_reduce import map_files
+from streaming_eda import EdaState, finish_row_writers, fold_chunks, open_row_writers, read_chunks
+
+
+def _stream_run(paths, mode, columns, chunk_size, quantile_capacity, tmp_dir):
+    """
+    Map task: (number of files, EdaState of `paths`, {writer key: (path,
+    rows, format signatures)} of their rows with missing values).
+    """
+    state = EdaState(columns, mode, quantile_capacity)
+    writers = open_row_writers(tempfile.mkdtemp(dir=tmp_dir), mode, columns)
+    fold_chunks(state, read_chunks(list(paths), chunk_size), writers, verbose=False)
+    return len(paths), state, {key: (w.path, w.rows, w.signatures) for key, w in writers.items()}
+
+
+def _append_rows(writer, path, rows, signatures):
+    # one run's rows after the writer's, the header written once
+    if rows == 0:
+        return
+    with open(path, "rb") as src, open(writer.path, "ab" if writer.rows else "wb") as dst:
+        if writer.rows:
+            src.readline()
+        shutil.copyfileobj(src, dst)
+    writer.rows += rows
+    writer.signatures |= signatures
+
+
+def batch_eda(paths, mode, output_dir, chunk_size=500_000, workers=None, quantile_capacity=100_000):
+    """
+    Merged EdaState of the CSVs in `paths` (same header, taken in this
+    order); writes the rows-with-missing-values CSVs to output_dir.
+    workers=None uses all cores.
+    """
+    columns = pd.read_csv(paths[0], nrows=0).columns
+    state = EdaState(columns, mode, quantile_capacity)
+    writers = open_row_writers(output_dir, mode, columns)
+    done = 0
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        for files, part, rows in map_files(_stream_run, paths, workers, mode=mode, columns=columns,
+                                           chunk_size=chunk_size, quantile_capacity=quantile_capacity,
+                                           tmp_dir=tmp_dir):
+            state.merge(part)
+            for key, w in writers.items():
+                _append_rows(w, *rows[key])
+            done += files
+            print(f"  {done}/{len(paths)} files: {state.n_rows} rows")
+    finish_row_writers(paths, state, writers, chunk_size)
+    return state
@@ -0,0 +1,100 @@
+"""
+bench_aggregates.py
+Benchmark: fused match_aggregates() vs the previous separate groupbys.
+
+    python bench_aggregates.py                      # 10M synthetic deliveries
+    python bench_aggregates.py --rows 2000000
+    python bench_aggregates.py --csv deliveries.csv # time a real file instead
+
+The previous code grouped the deliveries by match three times (runs per
+match with a per-group lambda, wickets per match with another lambda, and
+runs per innings for the t-test). Both versions are timed on the same
+frame and their results are checked to be identical.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregates import match_aggregates
+
+BALLS_PER_MATCH = 240
+
+
+def synthetic_deliveries(n_rows, seed=0):
+    """
+    Ball-by-ball frame with the classic deliveries.csv columns.
+    """
+    rng = np.random.default_rng(seed)
+    n_matches = max(n_rows // BALLS_PER_MATCH, 1)
+    match_id = np.sort(rng.integers(1, n_matches + 1, n_rows))
+    inning = np.where(rng.random(n_rows) < 0.5, 1, 2)
+    batsman_runs = rng.choice([0, 1, 2, 3, 4, 6], n_rows, p=[0.4, 0.35, 0.08, 0.02, 0.11, 0.04])
+    extra_runs = rng.choice([0, 1, 4], n_rows, p=[0.93, 0.06, 0.01])
+    dismissal = pd.Categorical.from_codes(
+        np.where(rng.random(n_rows) < 0.05, rng.integers(0, 4, n_rows), -1),
+        categories=["bowled", "caught", "lbw", "run out"])
+    return pd.DataFrame({
+        "match_id": match_id.astype(np.int32),
+        "inning": inning.astype(np.int8),
+        "batsman_runs": batsman_runs.astype(np.int8),
+        "extra_runs": extra_runs.astype(np.int8),
+        "dismissal_kind": dismissal,
+    })
+
+
+def legacy(deliveries):
+    """
+    The per-match / per-innings code ipl_eda.py used before match_aggregates.
+    """
+    rpm = deliveries.groupby("match_id").apply(lambda g: g["batsman_runs"].sum() + g["extra_runs"].sum())
+    rpm_df = rpm.reset_index(name="total_runs")
+    wpm = deliveries.groupby("match_id")["dismissal_kind"].apply(lambda s: s.notnull().sum()).reset_index(name="total_wickets")
+    rp = rpm_df.merge(wpm, on="match_id", how="left")
+    innings = deliveries.groupby(["match_id", "inning"])["batsman_runs"].sum().reset_index()
+    pivot = innings.pivot(index="match_id", columns="inning", values="batsman_runs").dropna()
+    return rp, pivot
+
+
+def fused(deliveries):
+    per_match, per_innings = match_aggregates(deliveries, "match_id", "inning", "batsman_runs",
+                                              "extra_runs", None, "dismissal_kind")
+    rp = per_match[["match_id", "total_runs", "total_wickets"]]
+    pivot = per_innings.pivot(index="match_id", columns="inning", values="batsman_runs").dropna()
+    return rp, pivot
+
+
+def timed(fn, deliveries):
+    start = time.perf_counter()
+    result = fn(deliveries)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--csv", default=None, help="deliveries CSV (classic column names) instead of synthetic data")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.csv:
+        deliveries = pd.read_csv(args.csv, usecols=["match_id", "inning", "batsman_runs", "extra_runs", "dismissal_kind"])
+    else:
+        deliveries = synthetic_deliveries(args.rows, args.seed)
+    print(f"{len(deliveries)} deliveries, {deliveries['match_id'].nunique()} matches")
+
+    (rp_new, pivot_new), t_new = timed(fused, deliveries)
+    print(f"fused:  {t_new:8.2f}s")
+    (rp_old, pivot_old), t_old = timed(legacy, deliveries)
+    print(f"legacy: {t_old:8.2f}s")
+    print(f"speedup: {t_old / max(t_new, 1e-9):.1f}x")
+
+    pd.testing.assert_frame_equal(rp_old.reset_index(drop=True), rp_new.reset_index(drop=True), check_dtype=False)
+    pd.testing.assert_frame_equal(pivot_old, pivot_new, check_dtype=False)
+    print("✓ results identical")
+
+
+if __name__ == "__main__":
+    main()
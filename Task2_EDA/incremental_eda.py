@@ -0,0 +1,212 @@
+"""
+incremental_eda.py
+Incremental EDA for a CSV that grows by appended rows (a new season, a
+daily export). The streaming EdaState of the last run (streaming_eda.py)
+is kept in eda_state.pkl next to summary.json, and the next run folds in
+only the rows added since then.
+
+New rows are found by:
+- row count / byte offset: the file still starts with the bytes read last
+  time (it is at least as long and sampled blocks of the old part, up to
+  its last line, are unchanged), so only the bytes after the old end are
+  parsed
+- high-water mark: otherwise, if the file has a numeric match_id column
+  (or a date column), it is read again and only the rows past the largest
+  match_id/date seen so far are folded in; the rows up to the mark must be
+  exactly as many as before. The same pass rebuilds the outputs that follow
+  row order (head, rows with missing values, outliers) from the current file
+Anything else (rows removed, different columns or settings) rebuilds the
+state from scratch. In-place edits that keep every byte offset are only
+noticed if they fall in a sampled block: delete eda_state.pkl after
+editing old rows. The state file is written after all outputs, so an
+interrupted run is redone in full next time.
+"""
+
+import os
+import pickle
+
+import pandas as pd
+
+from common.dataset_cache import ends_with_newline, prefix_fingerprint
+from streaming_eda import (EdaState, _extend_head, finish_row_writers, fold_chunks, full_file_dtypes,
+                           open_row_writers, parse_dates, read_chunks, write_outliers)
+
+STATE_FILE = "eda_state.pkl"
+SUMMARY_FILE = "summary.json"
+FORMAT_VERSION = 2
+
+
+class IncrementalEda:
+    """
+    state = IncrementalEda(path, mode, output_dir).update() ... .save()
+    """
+
+    def __init__(self, path, mode, output_dir, chunk_size=500_000, quantile_capacity=100_000):
+        self.path = path
+        self.mode = mode
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.quantile_capacity = quantile_capacity
+        self.state_path = os.path.join(output_dir, STATE_FILE)
+        self.state = None
+        self.writers = None
+        self.outliers = {}            # column -> (upper fence, rows written)
+        self.size = None              # bytes covered by the state
+        self.new_rows = 0             # rows folded in by update()
+        self.new_rows_offset = None   # byte where those rows start (byte-offset updates only)
+        self.up_to_date = False       # saved state loaded and nothing new to fold in
+
+    # ---------- saved state ----------
+    def _load(self, columns):
+        try:
+            with open(self.state_path, "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+        if (saved.get("version") != FORMAT_VERSION
+                or saved["path"] != os.path.abspath(self.path)
+                or saved["columns"] != columns
+                or saved["state"].mode != self.mode
+                or saved["state"].quantile_capacity != self.quantile_capacity):
+            return None
+        self.writers = open_row_writers(self.output_dir, self.mode, columns)
+        if not all(os.path.exists(w.path) for w in self.writers.values()) \
+                or not os.path.exists(os.path.join(self.output_dir, SUMMARY_FILE)):
+            return None
+        for key, w in self.writers.items():
+            w.rows, w.signatures = saved["writers"][key]
+        self.state, self.outliers = saved["state"], saved["outliers"]
+        return saved
+
+    def save(self):
+        """
+        Persist the state; call once every output of the run is written.
+        """
+        saved = {
+            "version": FORMAT_VERSION,
+            "path": os.path.abspath(self.path),
+            "columns": self.state.columns,
+            "size": self.size,
+            "fingerprint": prefix_fingerprint(self.path, self.size),
+            "state": self.state,
+            "writers": {key: (w.rows, w.signatures) for key, w in self.writers.items()},
+            "outliers": self.outliers,
+        }
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.state_path)
+
+    # ---------- update ----------
+    def update(self):
+        """
+        Bring the state up to date with the CSV and return it (an EdaState).
+        """
+        self.size = os.path.getsize(self.path)
+        columns = list(pd.read_csv(self.path, nrows=0).columns)
+        saved = self._load(columns)
+        if saved is not None:
+            if self._is_append(saved):
+                self._fold_from_offset(saved["size"])
+                return self.state
+            print("⚠ CSV changed other than by appended rows")
+            if self._fold_past_high_water_mark():
+                return self.state
+        print("Building EDA state from scratch...")
+        self._rebuild(columns)
+        return self.state
+
+    def _is_append(self, saved):
+        old = saved["size"]
+        return (self.size >= old and ends_with_newline(self.path, old)
+                and prefix_fingerprint(self.path, old) == saved["fingerprint"])
+
+    def _fold_from_offset(self, offset):
+        if self.size == offset:
+            print("✓ no new rows since the last run")
+            self.up_to_date = True
+            return
+        print(f"Appended rows found after byte {offset}; reading only those")
+        before = self.state.n_rows
+        chunks = read_chunks(self.path, self.chunk_size, offset=offset, columns=self.state.columns)
+        fold_chunks(self.state, chunks, self.writers)
+        finish_row_writers(self.path, self.state, self.writers, self.chunk_size)
+        self.new_rows = self.state.n_rows - before
+        self.new_rows_offset = offset
+
+    def _fold_past_high_water_mark(self):
+        state = self.state
+        col = state.match_id_col or state.col_map.get('date')
+        kind = state.column_kind(col) if col is not None else None
+        if kind not in ("numeric", "datetime") or pd.isna(state.moments.max.get(col)):
+            return False
+        mark = state.moments.max[col]
+        if kind == "datetime":
+            mark = pd.Timestamp(int(mark), unit=state.datetime_units[col])
+        print(f"Folding in rows with {col} > {mark}")
+
+        # the old rows may have moved: head and missing rows come from the whole current file
+        delta = EdaState(state.columns, state.mode, state.quantile_capacity)
+        writers = open_row_writers(self.output_dir, state.mode, state.columns)
+        head, seen = None, 0
+        try:
+            for chunk in read_chunks(self.path, self.chunk_size):
+                parsed = parse_dates(chunk)
+                new = (parsed[col] if kind == "datetime" else chunk[col]) > mark
+                seen += int((~new).sum())
+                head = _extend_head(head, parsed)
+                missing = chunk.isnull().any(axis=1)
+                writers["raw"].write(chunk[missing])
+                writers["parsed"].write(parsed[missing])
+                if new.any():
+                    delta.update(chunk[new])
+        except TypeError:   # key column no longer comparable (text values)
+            return False
+        if seen != state.n_rows:
+            print(f"⚠ {seen} rows up to the high-water mark, {state.n_rows} before")
+            return False
+        state.merge(delta)
+        state.head = head
+        self.writers = writers
+        finish_row_writers(self.path, state, self.writers, self.chunk_size)
+        self.outliers = {}            # rescanned in the current file's order
+        self.new_rows = delta.n_rows
+        return True
+
+    def _rebuild(self, columns):
+        self.state = EdaState(columns, self.mode, self.quantile_capacity)
+        self.writers = open_row_writers(self.output_dir, self.mode, columns)
+        self.outliers = {}
+        fold_chunks(self.state, read_chunks(self.path, self.chunk_size), self.writers)
+        finish_row_writers(self.path, self.state, self.writers, self.chunk_size)
+        self.new_rows = self.state.n_rows
+
+    # ---------- outputs ----------
+    def write_outliers(self, col, limit=20):
+        """
+        streaming_eda.write_outliers, skipped when the fence is unchanged and
+        the file already holds `limit` rows; otherwise only appended rows are
+        scanned when possible.
+        """
+        q1, _, q3 = self.state.quantiles(col)
+        upper = q3 + 1.5 * (q3 - q1)
+        path = os.path.join(self.output_dir, f"outliers_by_{col}.csv")
+        prev = self.outliers.get(col)
+        if prev is not None and prev[0] == upper and os.path.exists(path):
+            if prev[1] >= limit or self.new_rows == 0:
+                return
+            if self.new_rows_offset is not None:
+                found, n = [pd.read_csv(path)], prev[1]
+                for chunk in read_chunks(self.path, self.chunk_size, offset=self.new_rows_offset,
+                                         columns=self.state.columns, dtype=full_file_dtypes(self.state)):
+                    rows = chunk[chunk[col] > upper]
+                    found.append(rows)
+                    n += len(rows)
+                    if n >= limit:
+                        break
+                outliers = pd.concat(found).head(limit)
+                outliers.to_csv(path, index=False)
+                self.outliers[col] = (upper, len(outliers))
+                return
+        self.outliers[col] = (upper, write_outliers(self.path, self.state, col, self.output_dir,
+                                                    self.chunk_size, limit))
@@ -4,63 +4,129 @@ Runs Exploratory Data Analysis (EDA) on a single CSV IPL dataset.
 Handles both match-level and deliveries-level CSVs (auto-detection).
 Outputs CSV summaries, PNG plots and a summary.json into ./output/
 
-Update FILE_PATH to point to your CSV file (use r"..." on Windows).
+Update FILE_PATH to point to your CSV file (use r"..." on Windows), or
+set BATCH and point it at a directory or glob pattern of CSVs.
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from scipy import stats
 import json
+import shutil
 import warnings
 warnings.filterwarnings("ignore")
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.analysis_graph import AnalysisGraph, file_fingerprint
+from common.dataset_cache import DatasetCache
+from common.instrumentation import add_rows, configure, finish, section, stage
+from common.ipl_loader import load_ipl_csv, uncategorize
+from common.ipl_metrics import (category_counts, group_sizes, iqr_outliers, null_summary, numeric_correlation,
+                                parsed_null_summary, runs_by_player, toss_outcomes, wickets_by_bowler,
+                                with_parsed_dates)
+from common.map_reduce import common_header, expand_paths
+from common.player_cube import PlayerCube
+from common.plot_render import PlotJob, render_plots
+from aggregates import match_aggregates
+from batch_eda import batch_eda
+from profiling import profile_frame
+from resampling import ci_records, innings_differences, match_attributes, resample_breakdowns, toss_outcomes_by_match
+from streaming_eda import stream_eda, write_outliers
+from incremental_eda import IncrementalEda
+
 # ------------- CONFIG -------------
 # Update this path to your CSV file (use raw string r"..." on Windows)
 FILE_PATH = r"C:\Users\Asus\Desktop\IPL.csv"
 OUTPUT_DIR = "output"
+# Columns to load; None loads all of them (the describe and missing-row
+# outputs cover every column). Names are read as categoricals either way.
+EDA_COLUMNS = None
+# Reuse the parsed dataset from .ipl_cache/ (shared with ipl_visualization.py; needs pyarrow)
+USE_DATASET_CACHE = True
+# Out-of-core mode for files larger than RAM: read the CSV in chunks of
+# CHUNK_SIZE rows and keep only running aggregates (see streaming_eda.py)
+STREAMING = False
+CHUNK_SIZE = 500_000
+# Keep the streaming state in OUTPUT_DIR/eda_state.pkl and, on later runs,
+# only fold in the rows appended to the CSV since then (see incremental_eda.py)
+INCREMENTAL = False
+# Batch mode: FILE_PATH is a directory or glob pattern of CSVs with the same
+# header (one per season or match), analysed as if concatenated in name
+# order. Runs of files are streamed in BATCH_WORKERS processes (None = all
+# cores) and their states merged (see batch_eda.py and common/map_reduce.py)
+BATCH = False
+BATCH_WORKERS = None
+# Processes for rendering the figures (None = all cores, 1 = this process);
+# figures whose data did not change since the last run are not redrawn
+PLOT_WORKERS = None
+# Pre-aggregate large figures in NumPy before drawing them: binned histograms,
+# hexbin counts instead of big scatters, min/max-downsampled long lines
+# (see common/plot_aggregate.py)
+AGGREGATE_PLOTS = True
+# *_describe.csv: "exact" (full describe) or, opt-in, "fast" (quantiles and
+# text-column unique/top/freq estimated from PROFILE_SAMPLE_SIZE sampled rows,
+# plus an `approximate` column; see profiling.py)
+PROFILE_MODE = "exact"
+PROFILE_SAMPLE_SIZE = 100_000
+# Threads for the analysis graph (None = all cores), and whether its results
+# are cached in .ipl_cache/analysis/ (shared with ipl_visualization.py)
+GRAPH_WORKERS = None
+USE_ANALYSIS_CACHE = True
+# Top batsmen and bowlers come from a player cube over (player, season, venue,
+# team, inning), cached in .ipl_cache/cube/ and extended with appended rows
+# (shared with ipl_visualization.py; see common/player_cube.py)
+USE_PLAYER_CUBE = True
+# Bootstrap CIs and permutation p-values of the toss advantage and of the
+# innings 1 - innings 2 run difference, overall and by season, venue and team
+# (see resampling.py). Replicates are split across RESAMPLE_WORKERS processes
+# (None = all cores); the same RESAMPLE_SEED gives the same intervals.
+RESAMPLES = 10_000
+RESAMPLE_SEED = 0
+RESAMPLE_WORKERS = None
+CI_LEVEL = 0.95
+# Per-stage timing/memory trace in OUTPUT_DIR/trace.jsonl, summed up in
+# summary.json (also switched on by TASK_TRACE=1; see common/instrumentation.py)
+TRACE = False
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+configure("ipl_eda", OUTPUT_DIR, enabled=TRACE)
 
 # ------------- Helpers -------------
-def save_fig(plt, fname):
-    path = os.path.join(OUTPUT_DIR, fname)
-    plt.tight_layout()
-    plt.savefig(path, bbox_inches='tight')
-    plt.close()
-    print(f"Saved plot: {path}")
-
-def df_overview(df, name):
+def write_overview(name, shape, columns, missing, desc, head):
     print(f"\n--- {name} overview ---")
-    print("shape:", df.shape)
-    print("columns:", list(df.columns))
-    missing = df.isnull().sum()
+    print("shape:", shape)
+    print("columns:", list(columns))
     print("missing values (top 10):")
     print(missing[missing>0].sort_values(ascending=False).head(10))
-    desc = df.describe(include='all').T
     desc.to_csv(os.path.join(OUTPUT_DIR, f"{name}_describe.csv"))
-    df.head(8).to_csv(os.path.join(OUTPUT_DIR, f"{name}_head.csv"), index=False)
+    head.to_csv(os.path.join(OUTPUT_DIR, f"{name}_head.csv"), index=False)
+
+def state_overview(state, name):
+    write_overview(name, state.shape(), state.columns, state.missing_counts(), state.describe().T, state.head)
 
-def try_parse_dates(df, colnames):
-    for col in colnames:
-        if col in df.columns:
-            try:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-            except Exception:
-                pass
-    return df
+def resampled_cis(frame, value_col, null, name):
+    # overall and by season/venue/team; one table in <name>_ci.csv
+    with stage(f"resample {name}", rows=len(frame)):
+        table = resample_breakdowns(frame, value_col, ['season', 'venue', 'team'], null=null, replicates=RESAMPLES,
+                                    seed=RESAMPLE_SEED, workers=RESAMPLE_WORKERS, confidence=CI_LEVEL)
+    table.to_csv(os.path.join(OUTPUT_DIR, f"{name}_ci.csv"), index=False)
+    return ci_records(table)
 
 # ------------- Load CSV -------------
-if not os.path.exists(FILE_PATH):
+if BATCH and INCREMENTAL:
+    raise ValueError("BATCH and INCREMENTAL cannot both be set")
+if BATCH:
+    paths = expand_paths(FILE_PATH)
+elif os.path.exists(FILE_PATH):
+    paths = [FILE_PATH]
+else:
     raise FileNotFoundError(f"CSV file not found: {FILE_PATH}\nPlease put the correct path in FILE_PATH.")
 
-print("Loading CSV:", FILE_PATH)
-df = pd.read_csv(FILE_PATH)
-print("Loaded. Shape:", df.shape)
-
-# ------------- Auto-detect type -------------
-cols_lower = [c.lower() for c in df.columns]
+# ------------- Auto-detect type (from the header only) -------------
+section("detect")
+header = common_header(paths)
+cols_lower = [c.lower() for c in header.columns]
 is_deliveries = any(x in cols_lower for x in ('batsman','bowler','inning','ball','batsman_runs','total_runs','match_id'))
 is_matches = any(x in cols_lower for x in ('season','team1','team2','winner','toss_winner','venue','date','id','match_id'))
 
@@ -80,57 +146,202 @@ else:
     mode = "generic"
 
 print("Auto-detected dataset mode:", mode)
+section("load")
+
+# streamed: the sections below read from `state` instead of `df`
+streamed = STREAMING or INCREMENTAL or BATCH
+if INCREMENTAL:
+    print("Updating EDA state:", FILE_PATH)
+    incremental = IncrementalEda(FILE_PATH, mode, OUTPUT_DIR, CHUNK_SIZE)
+    state = incremental.update()
+    if incremental.up_to_date:
+        print("Outputs in", os.path.abspath(OUTPUT_DIR), "are up to date.")
+        sys.exit(0)
+    print("Updated. Shape:", state.shape(), f"({incremental.new_rows} new rows)")
+    add_rows(incremental.new_rows)
+    columns = state.columns
+elif BATCH:
+    # one chunked pass per run of files, in parallel, then merged in file order
+    print(f"Batch mode over {len(paths)} CSV files:", FILE_PATH)
+    state = batch_eda(paths, mode, OUTPUT_DIR, CHUNK_SIZE, BATCH_WORKERS)
+    print("Merged. Shape:", state.shape())
+    add_rows(state.n_rows)
+    columns = state.columns
+elif STREAMING:
+    # one chunked pass
+    print(f"Streaming CSV in chunks of {CHUNK_SIZE} rows:", FILE_PATH)
+    state = stream_eda(FILE_PATH, mode, OUTPUT_DIR, CHUNK_SIZE)
+    print("Streamed. Shape:", state.shape())
+    add_rows(state.n_rows)
+    columns = state.columns
+else:
+    print("Loading CSV:", FILE_PATH)
+    df = load_ipl_csv(FILE_PATH, usecols=EDA_COLUMNS, cache=DatasetCache() if USE_DATASET_CACHE else None)
+    print("Loaded. Shape:", df.shape)
+    add_rows(len(df))
+    columns = df.columns
 
 # Normalize column name access (map to lowercase->original)
-col_map = {c.lower(): c for c in df.columns}
+col_map = {c.lower(): c for c in columns}
+
+# Detect match_id column name
+match_id_col = None
+for cand in ('match_id','id','matchid','matchId'):
+    if cand in col_map:
+        match_id_col = col_map[cand]
+        break
+
+# ------------- ANALYSIS GRAPH -------------
+# Every aggregate the outputs below use is a node (common/analysis_graph.py).
+# The nodes shared with ipl_visualization.py come from common/ipl_metrics.py,
+# so whichever script runs first computes them for both.
+section("analysis graph")
+def batsmen_table(runs):
+    br = uncategorize(runs.reset_index())
+    br.columns = ['batsman','total_runs']
+    return br
+
+def cube_batsmen(cube):
+    return cube.top("runs")[['player', 'runs']].set_axis(['batsman', 'total_runs'], axis=1)
+
+def cube_bowlers(cube, bowler_col):
+    return cube.top("wickets")[['player', 'wickets']].rename(columns={'player': bowler_col})
+
+def known_seasons(sizes, season_col):
+    return sizes[sizes[season_col].notna()].reset_index(drop=True)
+
+graph = AnalysisGraph(workers=GRAPH_WORKERS, use_cache=USE_ANALYSIS_CACHE)
+has_batting = 'batsman' in col_map and 'batsman_runs' in col_map
+has_bowling = 'bowler' in col_map and 'dismissal_kind' in col_map
+cube = None
+if streamed:
+    # the streamed state already holds the aggregates; they enter the graph as sources
+    if 'winner' in col_map:
+        graph.source("wins", state.wins.most_common())
+    if 'season' in col_map:
+        graph.source("season_counts", state.season_counts())
+    if 'toss_winner' in col_map and 'winner' in col_map:
+        graph.source("toss", (state.toss_successes, state.toss_n))
+        if state.toss_outcomes_by_match() is not None:
+            graph.source("toss_by_match", state.toss_outcomes_by_match())
+    if BATCH and USE_PLAYER_CUBE and (has_batting or has_bowling):
+        # the cached cubes of the files, summed
+        cube = PlayerCube.for_csvs(paths, workers=BATCH_WORKERS)
+        if has_batting:
+            graph.source("top_batsmen", cube_batsmen(cube))
+        if has_bowling:
+            graph.source("top_bowlers", cube_bowlers(cube, col_map['bowler']))
+    else:
+        if has_batting:
+            graph.source("top_batsmen", state.top_batsmen())
+        if has_bowling:
+            graph.source("top_bowlers", state.top_bowlers())
+    if match_id_col is not None:
+        graph.source("match_aggregates", state.match_aggregates())
+    if state.match_attributes() is not None:
+        graph.source("match_attributes", state.match_attributes())
+    graph.source("correlation", state.correlation())
+else:
+    all_columns = list(df.columns)
+    graph.source("data", df, file_fingerprint(FILE_PATH))
+    # overview and missing rows: one isnull() pass, shared by all three missing-row files
+    graph.add("parsed", with_parsed_dates, "data", cache=False, columns=all_columns, date_col='date')
+    graph.add("nulls", null_summary, "data", cache=False, columns=all_columns)
+    graph.add("parsed_nulls", parsed_null_summary, "nulls", "data", "parsed", cache=False, date_col='date')
+    graph.add("profile", profile_frame, "parsed", mode=PROFILE_MODE, sample_size=PROFILE_SAMPLE_SIZE)
+    if 'winner' in col_map:
+        graph.add("wins", category_counts, "data", col=col_map['winner'])
+    if 'season' in col_map:
+        graph.add("season_sizes", group_sizes, "data", col=col_map['season'])
+        graph.add("season_counts", known_seasons, "season_sizes", cache=False, season_col=col_map['season'])
+    if 'toss_winner' in col_map and 'winner' in col_map:
+        graph.add("toss", toss_outcomes, "data", toss_winner_col=col_map['toss_winner'], winner_col=col_map['winner'])
+        graph.add("toss_by_match", toss_outcomes_by_match, "data", cache=False, toss_winner_col=col_map['toss_winner'],
+                  winner_col=col_map['winner'], season_col=col_map.get('season'), venue_col=col_map.get('venue'))
+    if USE_PLAYER_CUBE and (has_batting or has_bowling):
+        # index lookups in the cached cube instead of a groupby over every delivery
+        cube = PlayerCube.for_csv(FILE_PATH)
+        if has_batting:
+            graph.source("top_batsmen", cube_batsmen(cube))
+        if has_bowling:
+            graph.source("top_bowlers", cube_bowlers(cube, col_map['bowler']))
+    else:
+        if has_batting:
+            graph.add("batsman_runs", runs_by_player, "data", player_col=col_map['batsman'], runs_col=col_map['batsman_runs'])
+            graph.add("top_batsmen", batsmen_table, "batsman_runs", cache=False)
+        if has_bowling:
+            graph.add("top_bowlers", wickets_by_bowler, "data", bowler_col=col_map['bowler'], dismissal_col=col_map['dismissal_kind'])
+    if match_id_col is not None:
+        # per-match and per-innings aggregates in one grouped pass (aggregates.py)
+        graph.add("match_aggregates", match_aggregates, "data", match_id_col=match_id_col,
+                  inning_col=col_map.get('inning'),
+                  batsman_runs_col=col_map.get('batsman_runs'),
+                  extra_runs_col=col_map.get('extra_runs'),
+                  total_runs_col=col_map.get('total_runs'),
+                  dismissal_col=col_map.get('dismissal_kind'))
+    if mode == "deliveries" and match_id_col is not None and 'inning' in col_map:
+        # season, venue and team batting first of each match, for the innings CIs
+        graph.add("match_attributes", match_attributes, "data", match_id_col=match_id_col,
+                  inning_col=col_map['inning'], season_col=col_map.get('season'), venue_col=col_map.get('venue'),
+                  team_col=col_map.get('batting_team'))
+    graph.add("correlation", numeric_correlation, "data", columns=list(df.select_dtypes(include=[np.number]).columns))
+    if 'total_runs' in col_map or 'batsman_runs' in col_map:
+        col = col_map.get('total_runs', col_map.get('batsman_runs'))
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            graph.add("outliers", iqr_outliers, "data", col=col, columns=all_columns)
+
+results = graph.run()
+if not streamed:
+    print(f"Analysis graph: {len(graph.computed)} nodes computed, {len(graph.loaded)} from cache")
+
+def overview(name):
+    if streamed:
+        state_overview(state, name)
+    else:
+        parsed = results['parsed']
+        write_overview(name, parsed.shape, parsed.columns, results['parsed_nulls'][0], results['profile'], parsed.head(8))
 
 # ------------- MATCH-LEVEL EDA -------------
+section("match-level EDA")
 summary = {}
+plots = []   # figures, rendered together below
 if mode in ("matches", "generic"):
-    matches = df.copy()
-    matches = try_parse_dates(matches, ['date'])
-    df_overview(matches, "matches")
+    overview("matches")
 
     # Basic info
-    summary['n_rows'] = int(matches.shape[0])
+    summary['n_rows'] = state.n_rows if streamed else int(df.shape[0])
     if 'season' in col_map:
-        summary['n_seasons'] = int(matches[col_map['season']].nunique())
+        summary['n_seasons'] = len(state.seasons.result()) if streamed else int(df[col_map['season']].nunique())
     # Teams detected
-    teams = set()
+    teams = set(state.teams) if streamed else set()
     for k in ('team1','team2','winner','toss_winner'):
-        if k in col_map:
-            teams.update(matches[col_map[k]].dropna().unique().tolist())
+        if k in col_map and not streamed:
+            teams.update(df[col_map[k]].dropna().unique().tolist())
     summary['teams'] = sorted(list(teams))
 
     # Top teams by wins
-    if 'winner' in col_map:
-        wins = matches[col_map['winner']].value_counts().reset_index()
+    if 'wins' in results:
+        wins = results['wins'].reset_index()
         wins.columns = ['team','wins']
         wins.to_csv(os.path.join(OUTPUT_DIR,"top_teams_by_wins.csv"), index=False)
         # plot
-        plt.figure(figsize=(10,6))
-        sns.barplot(data=wins.head(10), x='wins', y='team')
-        plt.title("Top 10 Teams by Wins")
-        save_fig(plt, "top10_teams_wins.png")
+        plots.append(PlotJob("top10_teams_wins.png", "barplot", wins.head(10), x='wins', y='team',
+                             title="Top 10 Teams by Wins"))
         summary['top_teams'] = wins.head(5).to_dict(orient='records')
 
     # Matches per season
-    if 'season' in col_map:
-        season_counts = matches.groupby(col_map['season']).size().reset_index(name='matches')
+    if 'season_counts' in results:
+        season_counts = results['season_counts']
         season_counts.to_csv(os.path.join(OUTPUT_DIR,"matches_per_season.csv"), index=False)
-        plt.figure(figsize=(10,5))
-        sns.lineplot(data=season_counts, x=col_map['season'], y='matches', marker='o')
-        plt.title("Matches per Season")
-        save_fig(plt, "matches_per_season.png")
+        plots.append(PlotJob("matches_per_season.png", "lineplot", season_counts, x=col_map['season'], y='matches',
+                             figsize=(10,5), title="Matches per Season", marker='o'))
 
     # Toss advantage (proportion)
-    if 'toss_winner' in col_map and 'winner' in col_map:
-        toss_win_and_won = (matches[col_map['toss_winner']] == matches[col_map['winner']]).astype(int)
-        frac = float(toss_win_and_won.mean())
-        successes = int(toss_win_and_won.sum())
-        n = int(len(toss_win_and_won))
+    if 'toss' in results:
+        successes, n = results['toss']
+        frac = successes / n
         try:
-            pval = stats.binom_test(successes, n, 0.5, alternative='two-sided')
+            pval = stats.binomtest(successes, n, 0.5, alternative='two-sided').pvalue
         except Exception:
             pval = None
         with open(os.path.join(OUTPUT_DIR,"toss_advantage.txt"), "w") as f:
@@ -138,119 +349,121 @@ if mode in ("matches", "generic"):
         print("Toss advantage fraction:", frac, "pval:", pval)
         summary['toss_advantage_fraction'] = frac
         summary['toss_advantage_p'] = pval
-
-    # Save rows with missing values for inspection
-    matches[matches.isnull().any(axis=1)].to_csv(os.path.join(OUTPUT_DIR,"matches_rows_with_missing.csv"), index=False)
+        if 'toss_by_match' in results:
+            summary['toss_advantage_ci'] = resampled_cis(results['toss_by_match'], 'won', 0.5, "toss_advantage")
 
 # ------------- DELIVERIES-LEVEL EDA -------------
+section("deliveries-level EDA")
 if mode == "deliveries":
-    deliveries = df.copy()
-    deliveries = try_parse_dates(deliveries, ['date'])
-    df_overview(deliveries, "deliveries")
-
-    # Detect match_id column name
-    match_id_col = None
-    for cand in ('match_id','id','matchid','matchId'):
-        if cand in col_map:
-            match_id_col = col_map[cand]
-            break
+    overview("deliveries")
 
     # Top batsmen
-    if 'batsman' in col_map and 'batsman_runs' in col_map:
-        br = deliveries.groupby(col_map['batsman'])[col_map['batsman_runs']].sum().sort_values(ascending=False).reset_index()
-        br.columns = ['batsman','total_runs']
+    if 'top_batsmen' in results:
+        br = results['top_batsmen']
         br.to_csv(os.path.join(OUTPUT_DIR,"top_batsmen.csv"), index=False)
-        plt.figure(figsize=(10,6))
-        sns.barplot(data=br.head(10), x='total_runs', y='batsman')
-        plt.title("Top 10 Batsmen by Runs")
-        save_fig(plt, "top10_batsmen.png")
+        plots.append(PlotJob("top10_batsmen.png", "barplot", br.head(10), x='total_runs', y='batsman',
+                             title="Top 10 Batsmen by Runs"))
         summary['top_batsmen'] = br.head(5).to_dict(orient='records')
 
     # Top bowlers by wickets (exclude run outs)
-    if 'bowler' in col_map and 'dismissal_kind' in col_map:
-        w_df = deliveries[deliveries[col_map['dismissal_kind']].notnull() & (deliveries[col_map['dismissal_kind']] != 'run out')]
-        bw = w_df.groupby(col_map['bowler']).size().sort_values(ascending=False).reset_index(name='wickets')
+    if 'top_bowlers' in results:
+        bw = results['top_bowlers']
         bw.to_csv(os.path.join(OUTPUT_DIR,"top_bowlers.csv"), index=False)
-        plt.figure(figsize=(10,6))
-        sns.barplot(data=bw.head(10), x='wickets', y='bowler')
-        plt.title("Top 10 Bowlers by Wickets")
-        save_fig(plt, "top10_bowlers.png")
+        plots.append(PlotJob("top10_bowlers.png", "barplot", bw.head(10), x='wickets', y='bowler',
+                             title="Top 10 Bowlers by Wickets"))
         summary['top_bowlers'] = bw.head(5).to_dict(orient='records')
 
+    # Top 5 of every season, from the player cube (other breakdowns: python -m common.player_cube)
+    if cube is not None and len(cube.labels['season']) > 0:
+        if 'top_batsmen' in results:
+            cube.top("runs", 5, per="season").to_csv(os.path.join(OUTPUT_DIR,"top_batsmen_by_season.csv"), index=False)
+        if 'top_bowlers' in results:
+            cube.top("wickets", 5, per="season").to_csv(os.path.join(OUTPUT_DIR,"top_bowlers_by_season.csv"), index=False)
+        print("Saved top 5 batsmen/bowlers per season.")
+
+    # Per-match and per-innings aggregates; the runs per match, runs vs
+    # wickets and innings test outputs below all read from these
+    per_match, per_innings = results.get('match_aggregates', (None, None))
+    if per_match is not None:
+        per_match.to_csv(os.path.join(OUTPUT_DIR, "match_aggregates.csv"), index=False)
+        per_innings.to_csv(os.path.join(OUTPUT_DIR, "innings_aggregates.csv"), index=False)
+
     # Runs per match distribution
-    if match_id_col is not None:
-        if 'total_runs' in col_map:
-            rpm = deliveries.groupby(match_id_col)[col_map['total_runs']].sum()
-        else:
-            # sum batsman_runs + extras if extras exist
-            if 'extra_runs' in col_map and 'batsman_runs' in col_map:
-                rpm = deliveries.groupby(match_id_col).apply(lambda g: g[col_map['batsman_runs']].sum() + g[col_map['extra_runs']].sum())
-            elif 'batsman_runs' in col_map:
-                rpm = deliveries.groupby(match_id_col)[col_map['batsman_runs']].sum()
-            else:
-                rpm = None
-
-        if rpm is not None:
-            rpm_df = rpm.reset_index().rename(columns={0:'total_runs'}) if isinstance(rpm, pd.Series) else rpm.reset_index(name='total_runs')
-            rpm_df.to_csv(os.path.join(OUTPUT_DIR, "runs_per_match.csv"), index=False)
-            plt.figure(figsize=(10,6))
-            sns.histplot(rpm_df['total_runs'], bins=40)
-            plt.xlabel("Total runs per match")
-            plt.title("Distribution of Total Runs per Match")
-            save_fig(plt, "runs_per_match_hist.png")
-            # outliers
-            rpm_df.sort_values('total_runs', ascending=False).head(20).to_csv(os.path.join(OUTPUT_DIR,"top_run_matches.csv"), index=False)
-            summary['runs_per_match_summary'] = rpm_df['total_runs'].describe().to_dict()
-
-            # Wickets per match if dismissal present
-            if 'dismissal_kind' in col_map:
-                wpm = deliveries.groupby(match_id_col)[col_map['dismissal_kind']].apply(lambda s: s.notnull().sum()).reset_index(name='total_wickets')
-                rp = rpm_df.merge(wpm, left_on=match_id_col, right_on=match_id_col, how='left')
-                plt.figure(figsize=(8,6))
-                sns.scatterplot(data=rp, x='total_runs', y='total_wickets')
-                plt.title("Runs vs Wickets per match")
-                save_fig(plt, "runs_vs_wickets.png")
+    if per_match is not None and 'total_runs' in per_match.columns:
+        rpm_df = per_match[[match_id_col, 'total_runs']]
+        rpm_df.to_csv(os.path.join(OUTPUT_DIR, "runs_per_match.csv"), index=False)
+        plots.append(PlotJob("runs_per_match_hist.png", "histplot", rpm_df[['total_runs']], x='total_runs',
+                             title="Distribution of Total Runs per Match", xlabel="Total runs per match", bins=40))
+        # outliers
+        rpm_df.sort_values('total_runs', ascending=False).head(20).to_csv(os.path.join(OUTPUT_DIR,"top_run_matches.csv"), index=False)
+        summary['runs_per_match_summary'] = rpm_df['total_runs'].describe().to_dict()
+
+        # Wickets per match if dismissal present
+        if 'total_wickets' in per_match.columns:
+            rp = per_match[[match_id_col, 'total_runs', 'total_wickets']]
+            plots.append(PlotJob("runs_vs_wickets.png", "scatterplot", rp[['total_runs', 'total_wickets']],
+                                 x='total_runs', y='total_wickets', figsize=(8,6), title="Runs vs Wickets per match"))
 
     # Innings level paired test (inning1 vs inning2)
-    if 'inning' in col_map and match_id_col is not None and 'batsman_runs' in col_map:
-        innings = deliveries.groupby([match_id_col, col_map['inning']])[col_map['batsman_runs']].sum().reset_index()
-        pivot = innings.pivot(index=match_id_col, columns=col_map['inning'], values=col_map['batsman_runs']).dropna()
+    if 'inning' in col_map and per_innings is not None and 'batsman_runs' in per_innings.columns:
+        pivot = per_innings.pivot(index=match_id_col, columns=col_map['inning'], values='batsman_runs').dropna()
         if 1 in pivot.columns and 2 in pivot.columns:
             tstat, pval = stats.ttest_rel(pivot[1], pivot[2])
             with open(os.path.join(OUTPUT_DIR,"t_test_inning1_vs_inning2.txt"), "w") as f:
                 f.write(f"paired t-test inning1 vs inning2: t={tstat}, p={pval}\n")
             print("Saved paired t-test for innings (1 vs 2).")
             summary['inning_paired_ttest'] = {'t': float(tstat), 'p': float(pval)}
-
-    deliveries[deliveries.isnull().any(axis=1)].to_csv(os.path.join(OUTPUT_DIR,"deliveries_rows_with_missing.csv"), index=False)
+            diffs = innings_differences(pivot, results.get('match_attributes'))
+            summary['inning_difference_ci'] = resampled_cis(diffs, 'diff', 0.0, "inning1_minus_inning2")
 
 # ------------- GENERIC NUMERIC CORRELATION -------------
+section("correlation")
 # Use numeric correlation heatmap if many numeric columns exist
-num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-if len(num_cols) >= 2:
-    corr = df[num_cols].corr()
+corr = results['correlation']
+if len(corr.columns) >= 2:
     corr.to_csv(os.path.join(OUTPUT_DIR,"numeric_correlation.csv"))
-    plt.figure(figsize=(10,8))
-    sns.heatmap(corr, annot=True, fmt=".2f")
-    plt.title("Numeric correlation heatmap")
-    save_fig(plt, "numeric_correlation_heatmap.png")
+    plots.append(PlotJob("numeric_correlation_heatmap.png", "heatmap", corr, figsize=(10,8),
+                         title="Numeric correlation heatmap", annot=True, fmt=".2f"))
 
 # ------------- MISSING & ANOMALIES -------------
-df[df.isnull().any(axis=1)].to_csv(os.path.join(OUTPUT_DIR,"rows_with_missing.csv"), index=False)
+section("missing & anomalies")
+# Rows with missing values for inspection (streaming wrote them chunk by chunk).
+# The per-mode file holds the rows with parsed dates; without a date column
+# it is the same rows, so it is copied rather than selected and written again.
+if not streamed:
+    rows_path = os.path.join(OUTPUT_DIR, "rows_with_missing.csv")
+    df[results['nulls'][1]].to_csv(rows_path, index=False)
+    mode_path = os.path.join(OUTPUT_DIR, f"{'deliveries' if mode == 'deliveries' else 'matches'}_rows_with_missing.csv")
+    parsed = results['parsed']
+    if parsed is df:
+        shutil.copyfile(rows_path, mode_path)
+    else:
+        parsed[results['parsed_nulls'][1]].to_csv(mode_path, index=False)
 # simple outlier detect for a numeric column if present
 if 'total_runs' in col_map or 'batsman_runs' in col_map:
     col = col_map.get('total_runs', col_map.get('batsman_runs'))
-    if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
-        q1 = df[col].quantile(0.25)
-        q3 = df[col].quantile(0.75)
-        iqr = q3 - q1
-        upper = q3 + 1.5*iqr
-        outliers = df[df[col] > upper]
-        outliers.head(20).to_csv(os.path.join(OUTPUT_DIR, f"outliers_by_{col}.csv"), index=False)
+    if streamed:
+        # quartiles from the streamed sketch, rows from a second (early-stopping) pass
+        if state.column_kind(col) == "numeric" and INCREMENTAL:
+            incremental.write_outliers(col)
+        elif state.column_kind(col) == "numeric":
+            write_outliers(paths, state, col, OUTPUT_DIR, CHUNK_SIZE)
+    elif 'outliers' in results:
+        results['outliers'].to_csv(os.path.join(OUTPUT_DIR, f"outliers_by_{col}.csv"), index=False)
+
+# ------------- RENDER PLOTS -------------
+section("render plots")
+render_plots(plots, OUTPUT_DIR, workers=PLOT_WORKERS, aggregate=AGGREGATE_PLOTS)
 
 # ------------- SAVE SUMMARY JSON -------------
+stage_timings = finish()
+if stage_timings is not None:
+    summary['stage_timings'] = stage_timings
 with open(os.path.join(OUTPUT_DIR,"summary.json"), "w") as f:
     json.dump(summary, f, indent=2, default=str)
+# last, so that an interrupted run is redone in full
+if INCREMENTAL:
+    incremental.save()
 
 print("\nEDA finished. All outputs are in:", os.path.abspath(OUTPUT_DIR))
 print("Key outputs: .csv summaries, .png plots, summary.json")
@@ -0,0 +1,159 @@
+"""
+profiling.py
+Column profile of a frame in the layout of df.describe(include='all').T,
+in an exact or a fast mode.
+
+    desc = profile_frame(df, mode="fast", sample_size=100_000)
+
+exact: df.describe(include='all').T (categorical top/freq with the tie order
+       of an object column)
+fast:  statistics that cost a single vectorized reduction stay exact:
+       count, mean, std, min, max, and unique/top/freq of categorical
+       columns (counted from their integer codes). The rest is computed
+       from a uniform sample of `sample_size` rows, so its cost depends on
+       the sample size, not on the number of rows:
+       - quantiles (25%/50%/75%) of numeric and date columns
+       - unique of text columns: estimated from how often each value occurs
+         in the sample (Haas et al.'s hybrid: a chi-square test on those
+         counts picks Shlosser's estimator for skewed columns and a
+         uniform method-of-moments fit otherwise; key columns come out
+         exact, typical errors are 1-35%)
+       - top/freq of text columns: most frequent value in the sample, its
+         frequency scaled up to the full column
+       An extra `approximate` column lists the statistics of each row that
+       were estimated. With no more rows than `sample_size` every value is
+       exact and equal to the exact mode's.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import optimize, stats
+
+from common.ipl_loader import value_counts
+
+PROFILE_MODES = ("exact", "fast")
+
+
+def sample_rows(df, sample_size, seed=0):
+    """
+    Uniform sample of rows without replacement, kept in frame order (the
+    frame is in memory, so positions are drawn directly instead of running
+    a reservoir over it).
+    """
+    if len(df) <= sample_size:
+        return df
+    positions = np.sort(np.random.default_rng(seed).choice(len(df), sample_size, replace=False))
+    return df.iloc[positions]
+
+
+def _shlosser(freq_of_freq, n_total, q):
+    i = np.arange(len(freq_of_freq))
+    num = (freq_of_freq * (1 - q) ** i)[1:].sum()
+    den = (freq_of_freq * i * q * (1 - q) ** (i - 1))[1:].sum()
+    return freq_of_freq[1:].sum() + freq_of_freq[1] * num / den
+
+
+def _uniform_moments(d, n_total, q):
+    # D equal-sized values give d = D * (1 - (1 - q) ** (N / D)) distinct ones in the sample
+    gap = lambda D: D * (1 - (1 - q) ** (n_total / D)) - d
+    return optimize.brentq(gap, d, n_total) if gap(n_total) > 0 else n_total
+
+
+def estimate_distinct(sample_counts, n_total):
+    """
+    Distinct values in a column of n_total non-null values, estimated from
+    the value counts of a uniform sample of it.
+    """
+    counts = np.asarray(sample_counts, dtype=np.int64)
+    counts = counts[counts > 0]
+    n, d = int(counts.sum()), len(counts)
+    if d < 2 or n >= n_total:
+        return d
+    q = n / n_total
+    chi2 = ((counts - n / d) ** 2).sum() / (n / d)
+    if chi2 > stats.chi2.ppf(0.975, d - 1):
+        estimate = _shlosser(np.bincount(counts), n_total, q)
+    elif d == n:
+        estimate = n_total
+    else:
+        estimate = _uniform_moments(d, n_total, q)
+    return int(round(min(max(estimate, d), n_total)))
+
+
+def category_summary(s):
+    """
+    (unique, top, freq) of a categorical Series from its codes, with ties
+    for top broken by first appearance (as value_counts() on object values).
+    """
+    codes = s.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(s.cat.categories))
+    unique = int((counts > 0).sum())
+    if unique == 0:
+        return 0, np.nan, np.nan
+    freq = counts.max()
+    tied = np.flatnonzero(counts == freq)
+    top = tied[0] if len(tied) == 1 else codes[np.argmax(np.isin(codes, tied))]
+    return unique, s.cat.categories[top], int(freq)
+
+
+def exact_describe(df):
+    desc = df.describe(include='all').T
+    # categorical columns: take top/freq with object-column tie order
+    for col in df.select_dtypes(include='category').columns:
+        counts = value_counts(df[col])
+        if len(counts):
+            desc.loc[col, 'top'], desc.loc[col, 'freq'] = counts.index[0], counts.iloc[0]
+    return desc
+
+
+def fast_describe(df, sample_size=100_000, seed=0):
+    sample = sample_rows(df, sample_size, seed)
+    sampled = len(sample) < len(df)
+    desc = exact_describe(sample)
+    quantiles = [c for c in desc.columns if c.endswith('%')]
+    approx = {col: [] for col in df.columns}
+
+    counts = df.count()
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            # numeric describe holds floats only
+            for stat, value in (('count', counts[col]), ('mean', s.mean()), ('std', s.std()),
+                                ('min', s.min()), ('max', s.max())):
+                desc.at[col, stat] = float(value)
+            if sampled:
+                approx[col] += quantiles
+        elif pd.api.types.is_datetime64_any_dtype(s):
+            for stat, value in (('count', counts[col]), ('mean', s.mean()), ('min', s.min()), ('max', s.max())):
+                desc.at[col, stat] = value
+            if sampled:
+                approx[col] += quantiles
+        else:
+            desc.at[col, 'count'] = counts[col]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                unique, top, freq = category_summary(s)
+                desc.at[col, 'unique'] = unique
+                if unique:
+                    desc.at[col, 'top'], desc.at[col, 'freq'] = top, freq
+            elif sampled:
+                # heavy hitter: the sample's most frequent value, count scaled up
+                vc = value_counts(sample[col])
+                desc.at[col, 'unique'] = estimate_distinct(vc, counts[col])
+                if len(vc):
+                    desc.at[col, 'top'] = vc.index[0]
+                    desc.at[col, 'freq'] = max(int(round(vc.iloc[0] * counts[col] / vc.sum())), 1)
+                approx[col] += ['unique', 'top', 'freq']
+
+    desc['approximate'] = [" ".join(approx[col]) for col in desc.index]
+    return desc
+
+
+def profile_frame(df, mode="exact", sample_size=100_000, seed=0):
+    """
+    describe(include='all').T-style profile of df (see module docstring).
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"profile mode must be one of {PROFILE_MODES}, got {mode!r}")
+    if mode == "exact":
+        return exact_describe(df)
+    return fast_describe(df, sample_size, seed)
@@ -0,0 +1,205 @@
+"""
+resampling.py
+Bootstrap confidence intervals and sign-flip permutation tests of group
+means, computed for many subgroups at once.
+
+    table = resample_breakdowns(frame, "won", ["season", "venue", "team"], null=0.5,
+                                replicates=10_000, seed=0)
+
+Every (breakdown, group) - plus the whole frame as breakdown "all" - is
+one stratum of a single stacked array, sorted by stratum. A block of
+replicates is drawn as whole matrices: bootstrap indices (each value
+resampled from its own stratum), and random signs for the permutation
+test of "mean == null" (values - null flipped at random, which under H0
+of a distribution symmetric about `null` is as likely as the data; for a
+0/1 outcome against null=0.5 this is the exact binomial test). Stratum
+means of all replicates in the block come from one np.add.reduceat, so
+the cost is a few array passes over replicates x values cells, not a
+Python loop per group or replicate.
+
+Replicates are split into tasks of TASK_REPLICATES, each with its own
+child of SeedSequence(seed), and the tasks run on a process pool (forked;
+threads where processes cannot be forked). The task layout depends only
+on `replicates`, so results are identical for any number of workers.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+TASK_REPLICATES = 1_000
+# replicates x values drawn at once inside a task (small enough to stay in cache)
+BLOCK_CELLS = 262_144
+
+
+def _stratum_layout(codes, n_strata):
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes, minlength=n_strata)
+    starts = np.cumsum(counts) - counts
+    return order, starts, counts
+
+
+def _resample_task(values, starts, counts, null, replicates, seed):
+    """
+    (bootstrap means [replicates x strata], permutation counts of |mean -
+    null| at least the observed one [strata]) for one task.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(values)
+    own_start = np.repeat(starts, counts).astype(np.uint64)
+    own_count = np.repeat(counts, counts).astype(np.uint64)
+    centered = values - null
+    total = np.add.reduceat(centered, starts)
+    observed = np.abs(total) * (1 - 1e-12)
+    boot = np.empty((replicates, len(counts)))
+    extreme = np.zeros(len(counts), dtype=np.int64)
+    step = max(1, BLOCK_CELLS // max(n, 1))
+    buffer = np.empty((step, n), dtype=np.uint64)
+    for first in range(0, replicates, step):
+        b = min(step, replicates - first)
+        # bootstrap: index = stratum start + (32 random bits * stratum size) >> 32
+        idx = buffer[:b]
+        np.multiply(np.frombuffer(rng.bytes(4 * b * n), dtype=np.uint32).reshape(b, n), own_count, out=idx)
+        idx >>= np.uint64(32)
+        idx += own_start
+        boot[first:first + b] = np.add.reduceat(values[idx.view(np.intp)], starts, axis=1) / counts
+        # sign flips from random bits: flipped sum = total - 2 * (sum of the flipped values)
+        flips = np.unpackbits(np.frombuffer(rng.bytes(b * ((n + 7) // 8)), dtype=np.uint8).reshape(b, -1),
+                              axis=1, count=n)
+        permuted = total - 2 * np.add.reduceat(flips * centered, starts, axis=1)
+        extreme += (np.abs(permuted) >= observed).sum(axis=0)
+    return boot, extreme
+
+
+def _executor(workers):
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    # no fork (Windows): spawned workers would re-run the calling script
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def resample_means(values, codes, n_strata, null=0.0, replicates=10_000, seed=0, workers=None, confidence=0.95):
+    """
+    Bootstrap percentile CI of the mean of each stratum (codes 0..n_strata-1,
+    none empty) and the two-sided sign-flip p-value of mean == null.
+    Returns a DataFrame indexed by stratum code: n, mean, ci_low, ci_high, p_value.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    order, starts, counts = _stratum_layout(np.asarray(codes, dtype=np.int64), n_strata)
+    if (counts == 0).any():
+        raise ValueError("every stratum needs at least one value")
+    values = values[order]
+    seeds = np.random.SeedSequence(seed).spawn(-(-replicates // TASK_REPLICATES))
+    sizes = [min(TASK_REPLICATES, replicates - i * TASK_REPLICATES) for i in range(len(seeds))]
+    args = [(values, starts, counts, null, size, s) for size, s in zip(sizes, seeds)]
+
+    workers = min(workers or os.cpu_count() or 1, len(args))
+    if workers <= 1:
+        results = [_resample_task(*a) for a in args]
+    else:
+        with _executor(workers) as pool:
+            results = list(pool.map(_resample_task, *zip(*args)))
+
+    boot = np.concatenate([r[0] for r in results])
+    extreme = sum(r[1] for r in results)
+    alpha = 1 - confidence
+    low, high = np.quantile(boot, [alpha / 2, 1 - alpha / 2], axis=0)
+    return pd.DataFrame({
+        "n": counts,
+        "mean": np.add.reduceat(values, starts) / counts,
+        "ci_low": low,
+        "ci_high": high,
+        "p_value": (extreme + 1) / (replicates + 1),
+    })
+
+
+def resample_breakdowns(frame, value_col, by=(), null=0.0, replicates=10_000, seed=0, workers=None,
+                        confidence=0.95, min_size=5):
+    """
+    resample_means() of `value_col` over the whole frame and within each
+    group of every column in `by` (groups smaller than `min_size` and
+    missing keys left out), in one stacked run. Returns one table:
+    breakdown ("all" or the column), group, n, mean, ci_low, ci_high, p_value.
+    """
+    frame = frame[frame[value_col].notna()]
+    parts, labels = [np.zeros(len(frame), dtype=np.int64)], [("all", None)]
+    for col in by:
+        if col not in frame.columns:
+            continue
+        sizes = frame[col].value_counts()
+        kept = sorted(sizes[sizes >= min_size].index, key=str)
+        codes = pd.Categorical(frame[col], categories=kept).codes.astype(np.int64)
+        parts.append(np.where(codes >= 0, codes + len(labels), -1))
+        labels += [(col, key) for key in kept]
+    values = np.tile(frame[value_col].to_numpy(dtype=np.float64), len(parts))
+    codes = np.concatenate(parts)
+    values, codes = values[codes >= 0], codes[codes >= 0]
+
+    table = resample_means(values, codes, len(labels), null, replicates, seed, workers, confidence)
+    table.insert(0, "breakdown", [col for col, _ in labels])
+    table.insert(1, "group", [key for _, key in labels])
+    return table
+
+
+def ci_records(table):
+    """
+    resample_breakdowns() output as JSON-friendly dicts for summary.json:
+    {"all": {...}, "by_<column>": [{<column>: group, n, mean, ...}, ...]}.
+    """
+    records = {}
+    for breakdown, rows in table.groupby("breakdown", sort=False):
+        rows = rows.drop(columns="breakdown").astype({"n": int})
+        if breakdown == "all":
+            records["all"] = rows.drop(columns="group").to_dict(orient="records")[0]
+        else:
+            records[f"by_{breakdown}"] = rows.rename(columns={"group": breakdown}).to_dict(orient="records")
+    return records
+
+
+# ---------- per-match inputs of the IPL tests ----------
+def toss_outcomes_by_match(df, toss_winner_col, winner_col, season_col=None, venue_col=None):
+    """
+    One row per match: won (1 when the toss winner won the match, else 0,
+    as in ipl_metrics.toss_outcomes), season, venue and team (the toss winner).
+    """
+    out = pd.DataFrame({"won": (df[toss_winner_col] == df[winner_col]).astype(np.float64),
+                        "team": df[toss_winner_col].astype(object)})
+    if season_col is not None:
+        out["season"] = df[season_col].astype(object)
+    if venue_col is not None:
+        out["venue"] = df[venue_col].astype(object)
+    return out.reset_index(drop=True)
+
+
+def innings_differences(pivot, attributes=None):
+    """
+    One row per match: diff (inning 1 minus inning 2 runs, from the
+    match x inning pivot of the t-test), joined with per-match `attributes`
+    (season, venue, team) when given.
+    """
+    out = pd.DataFrame({"diff": (pivot[1] - pivot[2]).astype(np.float64)})
+    if attributes is not None:
+        out = out.join(attributes)
+    return out.reset_index(drop=True)
+
+
+def match_attributes(df, match_id_col, inning_col=None, season_col=None, venue_col=None, team_col=None):
+    """
+    season, venue and team (batting first) of each match of a deliveries
+    frame, from the columns that exist; None when there are none.
+    """
+    cols = {name: col for name, col in (("season", season_col), ("venue", venue_col)) if col is not None}
+    parts = []
+    if cols:
+        first = df.groupby(match_id_col, observed=True)[list(cols.values())].first()
+        parts.append(first.rename(columns={v: k for k, v in cols.items()}))
+    if team_col is not None and inning_col is not None:
+        first_innings = df[df[inning_col] == 1]
+        parts.append(first_innings.groupby(match_id_col, observed=True)[team_col].first().rename("team").to_frame())
+    if not parts:
+        return None
+    out = pd.concat(parts, axis=1)
+    return out.astype(object)
@@ -0,0 +1,462 @@
+"""
+streaming_eda.py
+Out-of-core EDA: reads the CSV in chunks and feeds mergeable accumulators
+(accumulators.py), so memory is bounded by the chunk size and the number
+of groups (teams, players, matches, distinct values), not by the file size.
+
+    state = stream_eda(FILE_PATH, mode, OUTPUT_DIR, chunk_size=500_000)
+
+EdaState holds everything ipl_eda.py needs to write its tables and plots:
+describe/head/missing counts, wins, matches per season, toss counts and
+per-match toss outcomes, top batsmen and bowlers, per-match/per-innings
+aggregates and match attributes (for the resampled CIs) and the numeric
+correlation matrix. Two states built from different parts of the data can
+be merged (batch_eda.py). Row-level outputs (rows with missing values, IQR
+outliers) are written to disk while streaming.
+
+Results match the in-memory EDA within the bounds listed in
+accumulators.py: counts, sums, groupings, min/max and (up to
+`quantile_capacity` distinct values per column) quantiles are exact; mean,
+std and correlations agree to floating-point rounding.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from accumulators import CoMoments, GroupedSum, Moments, QuantileSketch
+from aggregates import finalize_aggregates, innings_partials
+from resampling import match_attributes, toss_outcomes_by_match
+
+DESCRIBE_PERCENTILES = (0.25, 0.5, 0.75)
+HEAD_ROWS = 8
+MATCH_ID_CANDIDATES = ('match_id', 'id', 'matchid', 'matchId')
+NUMERIC_KINDS = set("iuf")
+
+
+def parse_dates(chunk):
+    # same as ipl_eda.try_parse_dates(df, ['date'])
+    if 'date' in chunk.columns:
+        try:
+            chunk = chunk.assign(date=pd.to_datetime(chunk['date'], errors='coerce'))
+        except Exception:
+            pass
+    return chunk
+
+
+def _as_float(s):
+    # datetime column -> float ticks of its own unit (what pandas averages), NaT -> NaN
+    values = s.to_numpy().view("int64").astype(np.float64)
+    return pd.Series(np.where(s.isna().to_numpy(), np.nan, values), index=s.index, name=s.name)
+
+
+def _format_signature(rows):
+    """
+    What decides how to_csv formats these rows: column dtypes and, for
+    datetimes, whether every value is a plain date.
+    """
+    sig = []
+    for col in rows.columns:
+        s = rows[col]
+        dates_only = None
+        if pd.api.types.is_datetime64_any_dtype(s):
+            t = s.dropna()
+            dates_only = bool((t == t.dt.normalize()).all())
+        sig.append((col, s.dtype.kind, dates_only))
+    return tuple(sig)
+
+
+def _extend_head(head, rows):
+    # first HEAD_ROWS rows, also when a chunk or file has fewer
+    if head is None:
+        return rows.head(HEAD_ROWS)
+    if len(head) < HEAD_ROWS and len(rows):
+        return pd.concat([head, rows.head(HEAD_ROWS - len(head))])
+    return head
+
+
+class RowWriter:
+    """
+    Appends rows chunk by chunk to one CSV (same file as a single to_csv of
+    all rows, as long as every chunk formats its columns the same way).
+    """
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self.rows = 0
+        self.signatures = set()
+
+    def write(self, rows):
+        if len(rows) == 0:
+            return
+        rows.to_csv(self.path, mode="a" if self.rows else "w", header=self.rows == 0, index=False)
+        self.rows += len(rows)
+        self.signatures.add(_format_signature(rows))
+
+    def close(self):
+        if self.rows == 0:
+            pd.DataFrame(columns=self.columns).to_csv(self.path, index=False)
+
+    def consistent(self):
+        return len(self.signatures) <= 1
+
+    def date_format(self):
+        """
+        Explicit datetime format for a rewrite when chunks disagreed on dates-only.
+        """
+        flags = {dates_only for sig in self.signatures for _, _, dates_only in sig if dates_only is not None}
+        return "%Y-%m-%d %H:%M:%S" if flags == {True, False} else None
+
+
+class EdaState:
+    """
+    Mergeable accumulators for one EDA run over a CSV with `columns`.
+    """
+
+    def __init__(self, columns, mode, quantile_capacity=100_000):
+        self.columns = list(columns)
+        self.mode = mode
+        self.quantile_capacity = quantile_capacity
+        self.col_map = {c.lower(): c for c in self.columns}
+        self.match_id_col = next((self.col_map[c] for c in MATCH_ID_CANDIDATES if c in self.col_map), None)
+
+        self.n_rows = 0
+        self.head = None
+        self.missing = GroupedSum()
+        self.kinds = {c: set() for c in self.columns}   # dtype kinds of non-empty chunks
+        self.moments = Moments()                        # numeric + datetime columns (parsed frame)
+        self.datetime_units = {}
+        self.sketches = {}
+        self.value_counts = {}                          # everything else (describe top/freq/unique)
+        self.comoments = None                           # raw numeric columns
+        self.wins = GroupedSum()
+        self.seasons = GroupedSum()
+        self.teams = set()
+        self.toss_successes = 0
+        self.toss_n = 0
+        self.toss_rows = []                             # per-match toss outcomes, one frame per chunk
+        self.batsmen = GroupedSum()
+        self.bowlers = GroupedSum()
+        self.innings = GroupedSum()
+        self.match_attrs = None                         # season/venue/team batting first per match
+
+    # ---------- update ----------
+    def update(self, raw, parsed=None):
+        """
+        Fold one chunk (as read by pd.read_csv, dates not parsed) into the state.
+        """
+        c = self.col_map
+        if parsed is None:
+            parsed = parse_dates(raw)
+        self.head = _extend_head(self.head, parsed)
+        self.n_rows += len(raw)
+        self.missing.add(raw.isnull().sum())
+
+        for col in self.columns:
+            s = parsed[col]
+            if s.notna().any():
+                self.kinds[col].add(s.dtype.kind)
+        self._update_describe(parsed)
+        self._update_corr(raw)
+
+        if self.mode in ("matches", "generic"):
+            for k in ('team1', 'team2', 'winner', 'toss_winner'):
+                if k in c:
+                    self.teams.update(raw[c[k]].dropna().unique().tolist())
+            if 'winner' in c:
+                self.wins.add(raw.groupby(c['winner'], sort=False).size())
+            if 'season' in c:
+                self.seasons.add(raw.groupby(c['season'], sort=False).size())
+            if 'toss_winner' in c and 'winner' in c:
+                self.toss_successes += int((raw[c['toss_winner']] == raw[c['winner']]).sum())
+                self.toss_n += len(raw)
+                self.toss_rows.append(toss_outcomes_by_match(raw, c['toss_winner'], c['winner'],
+                                                             c.get('season'), c.get('venue')))
+
+        if self.mode == "deliveries":
+            if 'batsman' in c and 'batsman_runs' in c:
+                self.batsmen.add(raw.groupby(c['batsman'], sort=False)[c['batsman_runs']].sum())
+            if 'bowler' in c and 'dismissal_kind' in c:
+                kind = raw[c['dismissal_kind']]
+                w_df = raw[kind.notnull() & (kind != 'run out')]
+                self.bowlers.add(w_df.groupby(c['bowler'], sort=False).size())
+            if self.match_id_col is not None:
+                self.innings.add(innings_partials(
+                    raw, self.match_id_col, c.get('inning'), c.get('batsman_runs'),
+                    c.get('extra_runs'), c.get('total_runs'), c.get('dismissal_kind')))
+                if 'inning' in c:
+                    self._add_attributes(match_attributes(raw, self.match_id_col, c['inning'], c.get('season'),
+                                                          c.get('venue'), c.get('batting_team')))
+        return self
+
+    def _add_attributes(self, attrs):
+        # first non-missing value per match and column, as groupby().first() over all rows
+        if attrs is not None:
+            self.match_attrs = attrs if self.match_attrs is None else self.match_attrs.combine_first(attrs)
+
+    def _update_describe(self, parsed):
+        numeric = [col for col in self.columns
+                   if parsed[col].dtype.kind in NUMERIC_KINDS or parsed[col].dtype.kind == "M"]
+        if numeric:
+            for col in numeric:
+                if parsed[col].dtype.kind == "M":
+                    self.datetime_units.setdefault(col, np.datetime_data(parsed[col].dtype)[0])
+            frame = pd.DataFrame({col: _as_float(parsed[col]) if parsed[col].dtype.kind == "M" else parsed[col]
+                                  for col in numeric})
+            self.moments.update(frame)
+            for col in numeric:
+                sketch = self.sketches.setdefault(col, QuantileSketch(self.quantile_capacity))
+                sketch.update(frame[col])
+        for col in self.columns:
+            if col not in numeric:
+                counts = parsed.groupby(col, sort=False).size()
+                self.value_counts.setdefault(col, GroupedSum()).add(counts)
+
+    def _update_corr(self, raw):
+        if self.comoments is None:
+            self.comoments = CoMoments(raw.select_dtypes(include=[np.number]).columns)
+        cols = self.comoments.columns
+        frame = raw[cols]
+        if not all(frame[col].dtype.kind in NUMERIC_KINDS for col in cols):
+            frame = frame.apply(pd.to_numeric, errors="coerce")
+        self.comoments.update(frame)
+
+    def merge(self, other):
+        """
+        Combine with a state built from another part of the same data
+        (this state's part must come first for head and tie order).
+        """
+        self.n_rows += other.n_rows
+        if other.head is not None:
+            self.head = _extend_head(self.head, other.head)
+        self.missing.merge(other.missing)
+        for col, kinds in other.kinds.items():
+            self.kinds.setdefault(col, set()).update(kinds)
+        self.moments.merge(other.moments)
+        for col, unit in other.datetime_units.items():
+            self.datetime_units.setdefault(col, unit)
+        for col, sketch in other.sketches.items():
+            self.sketches.setdefault(col, QuantileSketch(self.quantile_capacity)).merge(sketch)
+        for col, counts in other.value_counts.items():
+            self.value_counts.setdefault(col, GroupedSum()).merge(counts)
+        if self.comoments is None:
+            self.comoments = other.comoments
+        elif other.comoments is not None:
+            self.comoments.merge(other.comoments)
+        for name in ("wins", "seasons", "batsmen", "bowlers", "innings"):
+            getattr(self, name).merge(getattr(other, name))
+        self.teams |= other.teams
+        self.toss_successes += other.toss_successes
+        self.toss_n += other.toss_n
+        self.toss_rows += other.toss_rows
+        self._add_attributes(other.match_attrs)
+        return self
+
+    # ---------- results ----------
+    def column_kind(self, col):
+        """
+        'numeric', 'datetime' or 'object' - the dtype a full read would give.
+        """
+        kinds = self.kinds.get(col, set())
+        if kinds == {"M"}:
+            return "datetime"
+        if kinds <= NUMERIC_KINDS:
+            return "numeric"
+        return "object"
+
+    def mixed_columns(self):
+        return [col for col, kinds in self.kinds.items()
+                if len(kinds) > 1 and not kinds <= NUMERIC_KINDS]
+
+    def shape(self):
+        return (self.n_rows, len(self.columns))
+
+    def missing_counts(self):
+        return self.missing.result().reindex(self.columns, fill_value=0)
+
+    def quantiles(self, col):
+        sketch = self.sketches.get(col)
+        return [sketch.quantile(q) if sketch else np.nan for q in DESCRIBE_PERCENTILES]
+
+    def describe(self):
+        """
+        Same layout as df.describe(include='all') on the (date-parsed) frame.
+        """
+        labels = [f"{int(q * 100)}%" for q in DESCRIBE_PERCENTILES]
+        mean, std = self.moments.mean(), self.moments.std()
+        ldesc = []
+        for col in self.columns:
+            kind = self.column_kind(col)
+            if kind == "numeric":
+                d = [self.moments.n.get(col, 0), mean.get(col, np.nan), std.get(col, np.nan),
+                     self.moments.min.get(col, np.nan), *self.quantiles(col), self.moments.max.get(col, np.nan)]
+                ldesc.append(pd.Series(d, index=["count", "mean", "std", "min", *labels, "max"],
+                                       name=col, dtype=float))
+            elif kind == "datetime":
+                unit = self.datetime_units.get(col, "ns")
+                ts = lambda v: pd.NaT if pd.isna(v) else pd.Timestamp(int(round(v)), unit=unit)
+                d = [int(self.moments.n[col]), ts(mean[col]), ts(self.moments.min[col]),
+                     *[ts(v) for v in self.quantiles(col)], ts(self.moments.max[col])]
+                ldesc.append(pd.Series(d, index=["count", "mean", "min", *labels, "max"], name=col))
+            else:
+                counts = self.value_counts.get(col, GroupedSum()).most_common()
+                if len(counts):
+                    top, freq, dtype = counts.index[0], counts.iloc[0], None
+                else:
+                    top, freq, dtype = np.nan, np.nan, "object"
+                d = [int(counts.sum()), len(counts), top, freq]
+                ldesc.append(pd.Series(d, index=["count", "unique", "top", "freq"], name=col, dtype=dtype))
+
+        names = []
+        for index in sorted((x.index for x in ldesc), key=len):
+            names.extend(n for n in index if n not in names)
+        desc = pd.concat([x.reindex(names) for x in ldesc], axis=1, ignore_index=True, sort=False)
+        desc.columns = self.columns
+        return desc
+
+    def season_counts(self):
+        season_col = self.col_map['season']
+        return self.seasons.result(sort_index=True).rename_axis(season_col).reset_index(name='matches')
+
+    def top_batsmen(self):
+        br = self.batsmen.result(sort_index=True).sort_values(ascending=False).reset_index()
+        br.columns = ['batsman', 'total_runs']
+        return br
+
+    def top_bowlers(self):
+        bowler_col = self.col_map['bowler']
+        return (self.bowlers.result(sort_index=True).sort_values(ascending=False)
+                .rename_axis(bowler_col).reset_index(name='wickets'))
+
+    def toss_outcomes_by_match(self):
+        """
+        resampling.toss_outcomes_by_match() of all rows, or None.
+        """
+        return pd.concat(self.toss_rows, ignore_index=True) if self.toss_rows else None
+
+    def match_attributes(self):
+        """
+        resampling.match_attributes() of all rows, or None.
+        """
+        return self.match_attrs
+
+    def match_aggregates(self):
+        if self.match_id_col is None or self.innings.values is None:
+            return None, None
+        return finalize_aggregates(self.innings.result(), self.match_id_col, self.col_map.get('inning'))
+
+    def correlation(self):
+        numeric = [col for col in self.comoments.columns if self.column_kind(col) == "numeric"]
+        return self.comoments.corr().loc[numeric, numeric]
+
+
+def read_chunks(path, chunk_size, offset=0, columns=None, **kwargs):
+    """
+    pd.read_csv in chunks. With `offset`, reading starts at that byte (the
+    start of a data line) and `columns` are used as the column names. A
+    list of paths (batch mode) is read file after file.
+    """
+    if isinstance(path, (list, tuple)):
+        return (chunk for p in path for chunk in read_chunks(p, chunk_size, **kwargs))
+    if not offset:
+        return pd.read_csv(path, chunksize=chunk_size, **kwargs)
+    return _read_from(path, chunk_size, offset, list(columns), **kwargs)
+
+
+def _read_from(path, chunk_size, offset, columns, **kwargs):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        yield from pd.read_csv(f, chunksize=chunk_size, header=None, names=columns, **kwargs)
+
+
+def open_row_writers(output_dir, mode, columns):
+    name = "deliveries" if mode == "deliveries" else "matches"
+    return {
+        "parsed": RowWriter(os.path.join(output_dir, f"{name}_rows_with_missing.csv"), columns),
+        "raw": RowWriter(os.path.join(output_dir, "rows_with_missing.csv"), columns),
+    }
+
+
+def fold_chunks(state, chunks, writers, verbose=True):
+    """
+    Update `state` with each chunk and append the chunk's rows with missing
+    values to the row writers.
+    """
+    for i, chunk in enumerate(chunks):
+        parsed = parse_dates(chunk)
+        state.update(chunk, parsed)
+        missing = chunk.isnull().any(axis=1)
+        writers["raw"].write(chunk[missing])
+        writers["parsed"].write(parsed[missing])
+        if verbose:
+            print(f"  chunk {i + 1}: {state.n_rows} rows")
+    return state
+
+
+def finish_row_writers(path, state, writers, chunk_size=500_000):
+    for w in writers.values():
+        w.close()
+    mixed = state.mixed_columns()
+    if mixed:
+        print(f"⚠ columns with mixed text/number values across chunks (describe may differ): {mixed}")
+    if not all(w.consistent() for w in writers.values()):
+        # a column was int in some chunks and float in others: rewrite with full-file dtypes
+        print("Rewriting rows-with-missing outputs with consistent column types...")
+        _rewrite_missing_rows(path, state, writers, chunk_size)
+
+
+def stream_eda(path, mode, output_dir, chunk_size=500_000, quantile_capacity=100_000):
+    """
+    One pass over the CSV: returns the EdaState and writes the
+    rows-with-missing-values CSVs to output_dir.
+    """
+    columns = pd.read_csv(path, nrows=0).columns
+    state = EdaState(columns, mode, quantile_capacity)
+    writers = open_row_writers(output_dir, mode, columns)
+    fold_chunks(state, read_chunks(path, chunk_size), writers)
+    finish_row_writers(path, state, writers, chunk_size)
+    return state
+
+
+def full_file_dtypes(state):
+    # integer in some chunks, float (missing values) in others -> float, as in a full read
+    return {col: "float64" for col, kinds in state.kinds.items() if "f" in kinds and kinds <= NUMERIC_KINDS}
+
+
+def _rewrite_missing_rows(path, state, writers, chunk_size):
+    dtypes = full_file_dtypes(state)
+    date_formats = {key: w.date_format() for key, w in writers.items()}
+    for w in writers.values():
+        w.rows = 0
+    for chunk in read_chunks(path, chunk_size, dtype=dtypes):
+        missing = chunk.isnull().any(axis=1)
+        for key, frame in (("raw", chunk[missing]), ("parsed", parse_dates(chunk)[missing])):
+            w = writers[key]
+            if len(frame):
+                frame.to_csv(w.path, mode="a" if w.rows else "w", header=w.rows == 0, index=False,
+                             date_format=date_formats[key])
+                w.rows += len(frame)
+
+
+def write_outliers(path, state, col, output_dir, chunk_size=500_000, limit=20):
+    """
+    First `limit` rows with col > Q3 + 1.5 * IQR (quartiles from the sketch),
+    read in a second pass that stops as soon as enough rows are found.
+    Returns the number of rows written.
+    """
+    q1, _, q3 = state.quantiles(col)
+    upper = q3 + 1.5 * (q3 - q1)
+    found = []
+    n = 0
+    for chunk in read_chunks(path, chunk_size, dtype=full_file_dtypes(state)):
+        rows = chunk[chunk[col] > upper]
+        found.append(rows)
+        n += len(rows)
+        if n >= limit:
+            break
+    outliers = pd.concat(found) if found else pd.DataFrame(columns=state.columns)
+    outliers = outliers.head(limit)
+    outliers.to_csv(os.path.join(output_dir, f"outliers_by_{col}.csv"), index=False)
+    return len(outliers)
@@ -1,45 +1,73 @@
 import os
+import sys
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import numpy as np
 import warnings
 warnings.filterwarnings("ignore")
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.analysis_graph import AnalysisGraph, file_fingerprint
+from common.dataset_cache import DatasetCache
+from common.instrumentation import add_rows, configure, finish, section
+from common.ipl_loader import COLUMN_ALIASES, load_ipl_csv, pick_column, uncategorize
+from common.ipl_metrics import category_counts, group_sizes, runs_by_player
+from common.map_reduce import (common_header, expand_paths, grouped_partials, map_files, most_common, sorted_sizes,
+                               sum_counts)
+from common.player_cube import PlayerCube
+from common.plot_render import PlotJob, render_plots
+
 # ---------------- CONFIG ----------------
 FILE_PATH = r"C:\Users\Asus\Desktop\IPL.csv"   # <<< YOUR FILE PATH
 OUTPUT_DIR = "output_visuals"
+# Batch mode: FILE_PATH is a directory or glob pattern of CSVs with the same
+# header, plotted as if concatenated in name order. Runs of files are counted
+# in BATCH_WORKERS processes (None = all cores) and the counts summed (see
+# common/map_reduce.py)
+BATCH = False
+BATCH_WORKERS = None
+# Reuse the parsed dataset from .ipl_cache/ (shared with ipl_eda.py; needs pyarrow)
+USE_DATASET_CACHE = True
+# Processes for rendering the figures (None = all cores, 1 = this process);
+# figures whose data did not change since the last run are not redrawn
+PLOT_WORKERS = None
+# Pre-aggregate large figures in NumPy before drawing them: binned histograms,
+# hexbin counts instead of big scatters, min/max-downsampled long lines
+# (see common/plot_aggregate.py)
+AGGREGATE_PLOTS = True
+# Threads for the analysis graph (None = all cores), and whether its results
+# are cached in .ipl_cache/analysis/ (shared with Task2_EDA/ipl_eda.py)
+GRAPH_WORKERS = None
+USE_ANALYSIS_CACHE = True
+# Top batsmen from the player cube in .ipl_cache/cube/ (shared with
+# Task2_EDA/ipl_eda.py; see common/player_cube.py) instead of a groupby
+USE_PLAYER_CUBE = True
+# Per-stage timing/memory trace in OUTPUT_DIR/trace.jsonl (also switched on
+# by TASK_TRACE=1; see common/instrumentation.py)
+TRACE = False
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+configure("ipl_visualization", OUTPUT_DIR, enabled=TRACE)
 
-# ---------------- LOAD DATA ----------------
-print("Loading CSV (low_memory=False to reduce dtype warnings)...")
-df = pd.read_csv(FILE_PATH, low_memory=False)
-print("Loaded. Shape:", df.shape)
-print("Columns:", df.columns.tolist())
+# ---------------- READ HEADER ----------------
+# Columns are resolved from the header alone, then only those are loaded.
+section("detect")
+paths = expand_paths(FILE_PATH) if BATCH else [FILE_PATH]
+header = common_header(paths)
+print("Columns:", header.columns.tolist())
 
-# ---------------- helper to pick column name if multiple variants exist ----------------
-def pick_column(df, candidates):
-    """
-    Given a list of candidate column names (case-insensitive),
-    return the first one that exists in df.columns, or None.
-    """
-    cols_lc = {c.lower(): c for c in df.columns}
-    for cand in candidates:
-        if cand and cand.lower() in cols_lc:
-            return cols_lc[cand.lower()]
-    return None
-
-# Map likely columns
-winner_col = pick_column(df, ["winner", "match_won_by", "match_winner", "win_team", "team_won"])
-season_col = pick_column(df, ["season", "year", "Year"])
-toss_decision_col = pick_column(df, ["toss_decision", "tossdecision", "toss_decision "])
-venue_col = pick_column(df, ["venue", "stadium", "ground"])
+# Map likely columns (pick_column aliases live in common/ipl_loader.py)
+winner_col = pick_column(header, COLUMN_ALIASES["winner"])
+season_col = pick_column(header, COLUMN_ALIASES["season"])
+toss_decision_col = pick_column(header, COLUMN_ALIASES["toss_decision"])
+venue_col = pick_column(header, COLUMN_ALIASES["venue"])
 # For batsman/batter and runs
-batsman_col = pick_column(df, ["batsman", "batter", "player"])
-batsman_runs_col = pick_column(df, ["batsman_runs", "batter_runs", "runs_batter", "runs_batsman", "batsmanrun", "batsman_run"])
+batsman_col = pick_column(header, COLUMN_ALIASES["batsman"])
+batsman_runs_col = pick_column(header, COLUMN_ALIASES["batsman_runs"])
 # Some files may have 'batsman_runs' at deliveries-level; check also 'runs_total' or 'runs' fallback
-total_runs_col = pick_column(df, ["runs_total", "total_runs", "runs", "runs_total "])
-toss_winner_col = pick_column(df, ["toss_winner", "tosswinner"])
+total_runs_col = pick_column(header, COLUMN_ALIASES["total_runs"])
+toss_winner_col = pick_column(header, COLUMN_ALIASES["toss_winner"])
+# Fallbacks for the top batsmen plot
+alt_batter = pick_column(header, ["batter", "batsman", "player_out", "player_of_match"])
+alt_runs = pick_column(header, ["batter_runs", "runs_batter", "runs_total", "runs", "runs_batsman"])
 
 print("Detected columns mapping:")
 print(" winner_col:", winner_col)
@@ -51,23 +79,115 @@ print(" batsman_runs_col:", batsman_runs_col)
 print(" total_runs_col:", total_runs_col)
 print(" toss_winner_col:", toss_winner_col)
 
-sns.set_style("whitegrid")
+# ---------------- LOAD DATA ----------------
+# Only the columns the plots below use; the rest of the file is never parsed.
+section("load")
+# the player cube reads the batting columns itself
+use_cube = USE_PLAYER_CUBE and batsman_col is not None and batsman_runs_col is not None
+if use_cube:
+    batting_cols = []
+elif batsman_col is not None and batsman_runs_col is not None:
+    batting_cols = [batsman_col, batsman_runs_col]
+else:
+    batting_cols = [alt_batter, alt_runs] if alt_batter and alt_runs else []
+needed = [winner_col, season_col, toss_decision_col, venue_col] + batting_cols
+if BATCH:
+    # per-file counts and sums in parallel, no frame of the whole dataset
+    groups = {name: (col, None) for name, col in (("wins", winner_col), ("season_sizes", season_col),
+                                                   ("toss_decisions", toss_decision_col), ("venues", venue_col))
+              if col is not None}
+    if len(batting_cols) == 2:
+        groups["batsman_runs"] = tuple(batting_cols)
+    print(f"Counting {len(paths)} CSV files (only the columns used below)...")
+    partials = list(map_files(grouped_partials, paths, BATCH_WORKERS, groups=groups,
+                              usecols=[c for c in needed if c is not None], cache=USE_DATASET_CACHE))
+    merged = {name: sum_counts(p[name] for p in partials) for name in groups}
+    n_rows = sum(p["rows"] for p in partials)
+    print("Counted. Rows:", n_rows)
+    add_rows(n_rows)
+else:
+    print("Loading CSV (only the columns used below)...")
+    df = load_ipl_csv(FILE_PATH, usecols=needed, cache=DatasetCache() if USE_DATASET_CACHE else None, low_memory=False)
+    print("Loaded. Shape:", df.shape)
+    add_rows(len(df))
+
+STYLE = "whitegrid"
+plots = []   # figures, rendered together at the end
+
+# ---------------- ANALYSIS GRAPH ----------------
+# The aggregates behind the plots are nodes (common/analysis_graph.py). Wins,
+# matches per season and runs per batsman are the same nodes as in
+# Task2_EDA/ipl_eda.py, so a run of either script caches them for the other.
+section("analysis graph")
+def season_line(sizes, season_col):
+    """
+    Matches per season for the line plot, from the per-season row counts:
+    numeric seasons where any value is a number, else season labels as text.
+    """
+    s_num = pd.to_numeric(sizes[season_col], errors='coerce')
+    if s_num.notnull().sum() > 0:
+        # use numeric where available
+        counts = sizes.assign(_season_numeric=s_num).dropna(subset=['_season_numeric'])
+        counts = counts.groupby('_season_numeric')['matches'].sum().reset_index().sort_values('_season_numeric')
+        x_vals = counts['_season_numeric'].astype(int).astype(str).tolist()
+        y_vals = counts['matches'].tolist()
+    else:
+        # fallback: treat all as strings and sort lexicographically
+        counts = sizes.groupby(sizes[season_col].astype(str))['matches'].sum().sort_index()
+        x_vals = counts.index.tolist()
+        y_vals = counts.values.tolist()
+    return pd.DataFrame({'season': x_vals, 'matches': y_vals})
+
+def merged_runs(runs):
+    # runs_by_player() of the concatenated files, from the summed partials
+    return runs[runs.index.notna()].sort_index().sort_values(ascending=False)
+
+graph = AnalysisGraph(workers=GRAPH_WORKERS, use_cache=USE_ANALYSIS_CACHE)
+if BATCH:
+    # the summed partials enter the graph as sources
+    for name in ("wins", "toss_decisions", "venues"):
+        if name in merged:
+            graph.source(name, most_common(merged[name]))
+    if "season_sizes" in merged:
+        graph.source("season_sizes", sorted_sizes(merged["season_sizes"], season_col))
+        graph.add("season_line", season_line, "season_sizes", cache=False, season_col=season_col)
+    if use_cube:
+        cube = PlayerCube.for_csvs(paths, workers=BATCH_WORKERS)
+        graph.source("batsman_runs", cube.top("runs", 10).set_index("player")["runs"])
+    elif "batsman_runs" in merged:
+        graph.source("batsman_runs", merged_runs(merged["batsman_runs"]))
+else:
+    graph.source("data", df, file_fingerprint(FILE_PATH))
+    if winner_col is not None:
+        graph.add("wins", category_counts, "data", col=winner_col)
+    if season_col is not None:
+        graph.add("season_sizes", group_sizes, "data", col=season_col)
+        graph.add("season_line", season_line, "season_sizes", cache=False, season_col=season_col)
+    if toss_decision_col is not None:
+        graph.add("toss_decisions", category_counts, "data", col=toss_decision_col)
+    if venue_col is not None:
+        graph.add("venues", category_counts, "data", col=venue_col)
+    if use_cube:
+        cube = PlayerCube.for_csv(FILE_PATH)
+        graph.source("batsman_runs", cube.top("runs", 10).set_index("player")["runs"])
+    elif batsman_col is not None and batsman_runs_col is not None:
+        graph.add("batsman_runs", runs_by_player, "data", player_col=batsman_col, runs_col=batsman_runs_col)
+    elif alt_batter and alt_runs and alt_batter in df.columns and alt_runs in df.columns:
+        graph.add("batsman_runs", runs_by_player, "data", player_col=alt_batter, runs_col=alt_runs)
+
+# a failing aggregate only skips its plot
+graph.run(raise_errors=False)
+print(f"Analysis graph: {len(graph.computed)} nodes computed, {len(graph.loaded)} from cache")
 
 # ---------------- 1) Wins by Team ----------------
+section("plot data")
 if winner_col is not None:
     try:
-        win_count = df[winner_col].value_counts().dropna()
+        win_count = graph["wins"].dropna()
         if len(win_count) > 0:
-            plt.figure(figsize=(12,6))
-            sns.barplot(x=win_count.values, y=win_count.index)
-            plt.title("Total Wins by IPL Teams", fontsize=15)
-            plt.xlabel("Number of Wins")
-            plt.ylabel("Team Name")
-            plt.tight_layout()
-            outp = os.path.join(OUTPUT_DIR, "wins_by_team.png")
-            plt.savefig(outp, bbox_inches='tight')
-            plt.close()
-            print("Saved:", outp)
+            plots.append(PlotJob("wins_by_team.png", "barplot", win_count.rename_axis('team').reset_index(name='wins'),
+                                 x='wins', y='team', figsize=(12,6), title="Total Wins by IPL Teams", title_size=15,
+                                 xlabel="Number of Wins", ylabel="Team Name", style=STYLE))
     except Exception as e:
         print("Failed to plot wins_by_team:", e)
 else:
@@ -75,51 +195,25 @@ else:
 
 # ---------------- 2) Matches per Season ----------------
 if season_col is not None:
-    # Coerce season to numeric where possible, otherwise treat as string but sort safely
-    s = df[season_col].copy()
-    # attempt numeric conversion
-    s_num = pd.to_numeric(s, errors='coerce')
-    if s_num.notnull().sum() > 0:
-        # use numeric where available
-        df['_season_numeric'] = s_num
-        season_counts = df.dropna(subset=['_season_numeric']).groupby('_season_numeric').size().reset_index(name='matches')
-        season_counts = season_counts.sort_values('_season_numeric')
-        x_vals = season_counts['_season_numeric'].astype(int).astype(str).tolist()
-        y_vals = season_counts['matches'].tolist()
-    else:
-        # fallback: treat all as strings and sort lexicographically
-        season_counts = df[season_col].astype(str).value_counts().sort_index()
-        x_vals = season_counts.index.tolist()
-        y_vals = season_counts.values.tolist()
-
-    if len(y_vals) > 0:
-        plt.figure(figsize=(10,5))
-        sns.lineplot(x=x_vals, y=y_vals, marker="o")
-        plt.title("Matches Played per Season", fontsize=15)
-        plt.xlabel("Season")
-        plt.ylabel("Number of Matches")
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        outp = os.path.join(OUTPUT_DIR, "matches_per_season.png")
-        plt.savefig(outp, bbox_inches='tight')
-        plt.close()
-        print("Saved:", outp)
+    try:
+        season_line_df = graph["season_line"]
+        if len(season_line_df) > 0:
+            plots.append(PlotJob("matches_per_season.png", "lineplot", season_line_df,
+                                 x='season', y='matches', figsize=(10,5), title="Matches Played per Season",
+                                 title_size=15, xlabel="Season", ylabel="Number of Matches", xtick_rotation=45,
+                                 style=STYLE, marker="o"))
+    except Exception as e:
+        print("Failed to plot matches_per_season:", e)
 else:
     print("Season column not found; skipping Matches per Season plot.")
 
 # ---------------- 3) Toss Decision Distribution ----------------
 if toss_decision_col is not None:
     try:
-        counts = df[toss_decision_col].value_counts().dropna()
+        counts = graph["toss_decisions"].dropna()
         if counts.sum() > 0:
-            plt.figure(figsize=(7,7))
-            counts.plot(kind="pie", autopct="%1.1f%%", startangle=90)
-            plt.title("Toss Decision: Bat or Field?")
-            plt.ylabel("")
-            outp = os.path.join(OUTPUT_DIR, "toss_decision_pie.png")
-            plt.savefig(outp, bbox_inches='tight')
-            plt.close()
-            print("Saved:", outp)
+            plots.append(PlotJob("toss_decision_pie.png", "pie", counts, figsize=(7,7), title="Toss Decision: Bat or Field?",
+                                 ylabel="", tight_layout=False, style=STYLE, autopct="%1.1f%%", startangle=90))
     except Exception as e:
         print("Failed to plot toss_decision_pie:", e)
 else:
@@ -128,63 +222,35 @@ else:
 # ---------------- 4) Venue Match Count ----------------
 if venue_col is not None:
     try:
-        venue_counts = df[venue_col].value_counts().head(15)
+        venue_counts = graph["venues"].head(15)
         if len(venue_counts) > 0:
-            plt.figure(figsize=(10,7))
-            sns.barplot(y=venue_counts.index, x=venue_counts.values)
-            plt.title("Top 15 Venues by Match Count")
-            plt.xlabel("Matches Held")
-            plt.ylabel("Venue")
-            plt.tight_layout()
-            outp = os.path.join(OUTPUT_DIR, "venue_match_count.png")
-            plt.savefig(outp, bbox_inches='tight')
-            plt.close()
-            print("Saved:", outp)
+            plots.append(PlotJob("venue_match_count.png", "barplot", venue_counts.rename_axis('venue').reset_index(name='matches'),
+                                 x='matches', y='venue', figsize=(10,7), title="Top 15 Venues by Match Count",
+                                 xlabel="Matches Held", ylabel="Venue", style=STYLE))
     except Exception as e:
         print("Failed to plot venue_match_count:", e)
 else:
     print("Venue column not found; skipping venue plot.")
 
 # ---------------- 5) Top Batsmen (if dataset has batting-level info) ----------------
-# Your file shows 'batter' and 'batter_runs' or 'batsman' and 'batsman_runs' variants.
-# We'll try a few possibilities.
-if batsman_col is not None and batsman_runs_col is not None:
+# Your file shows 'batter' and 'batter_runs' or 'batsman' and 'batsman_runs' variants;
+# the graph node above uses whichever pair is present.
+if "batsman_runs" in graph:
+    filename = "top_batsmen.png" if batsman_col is not None and batsman_runs_col is not None else "top_batsmen_alt.png"
     try:
-        br = df.groupby(batsman_col)[batsman_runs_col].sum().sort_values(ascending=False).head(10)
+        br = uncategorize(graph["batsman_runs"].head(10))
         if br.sum() > 0:
-            plt.figure(figsize=(10,6))
-            sns.barplot(x=br.values, y=br.index)
-            plt.title("Top 10 Batsmen by Total Runs")
-            plt.xlabel("Total Runs")
-            plt.ylabel("Batsman")
-            plt.tight_layout()
-            outp = os.path.join(OUTPUT_DIR, "top_batsmen.png")
-            plt.savefig(outp, bbox_inches='tight')
-            plt.close()
-            print("Saved:", outp)
+            plots.append(PlotJob(filename, "barplot", br.rename_axis('batsman').reset_index(name='runs'),
+                                 x='runs', y='batsman', title="Top 10 Batsmen by Total Runs",
+                                 xlabel="Total Runs", ylabel="Batsman", style=STYLE))
     except Exception as e:
-        print("Failed to plot top_batsmen:", e)
+        print(f"Failed to plot {os.path.splitext(filename)[0]}:", e)
 else:
-    # attempt with alternative names that appeared in your columns
-    alt_batter = pick_column(df, ["batter", "batsman", "player_out", "player_of_match"])
-    alt_runs = pick_column(df, ["batter_runs", "runs_batter", "runs_total", "runs", "runs_batsman"])
-    if alt_batter and alt_runs and alt_batter in df.columns and alt_runs in df.columns:
-        try:
-            br = df.groupby(alt_batter)[alt_runs].sum().sort_values(ascending=False).head(10)
-            if br.sum() > 0:
-                plt.figure(figsize=(10,6))
-                sns.barplot(x=br.values, y=br.index)
-                plt.title("Top 10 Batsmen by Total Runs")
-                plt.xlabel("Total Runs")
-                plt.ylabel("Batsman")
-                plt.tight_layout()
-                outp = os.path.join(OUTPUT_DIR, "top_batsmen_alt.png")
-                plt.savefig(outp, bbox_inches='tight')
-                plt.close()
-                print("Saved:", outp)
-        except Exception as e:
-            print("Failed to plot alt top_batsmen:", e)
-    else:
-        print("Batsman or batsman_runs columns not found; skipping top batsmen plot.")
+    print("Batsman or batsman_runs columns not found; skipping top batsmen plot.")
+
+# ---------------- RENDER ----------------
+section("render plots")
+render_plots(plots, OUTPUT_DIR, workers=PLOT_WORKERS, aggregate=AGGREGATE_PLOTS)
+finish()
 
 print("\nAll done — check the folder:", os.path.abspath(OUTPUT_DIR))
@@ -0,0 +1,122 @@
+"""
+compare_engines.py
+Agreement and throughput check: fast (vectorized) engine vs TextBlob.
+
+    python compare_engines.py                 # uses reviews.csv
+    python compare_engines.py big_reviews.csv --limit 100000
+    python compare_engines.py --cases-only    # handcrafted cases only
+
+First scores RULE_CASES, handcrafted phrases for the negation, modifier
+and exclamation rules, with both engines: every case must be within
+--tolerance of TextBlob. Then reports documents/second for both engines
+(single process) on the file and how closely the fast engine matches
+TextBlob(text).sentiment: mean absolute error, share of documents within
+the tolerance, and label agreement; at least --min-agreement of the
+documents must be within the tolerance. Exits with status 1 otherwise.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from sentiment_engine import clean_text, detect_review_column, get_batch_scorer
+
+
+# Phrases where PatternAnalyzer's negation/modifier/"!" state matters
+RULE_CASES = (
+    "good", "not good", "not bad", "never good", "no good :)",
+    "very good", "very very good", "not very good", "not very very good", "not very",
+    "not really good", "never really great", "not extremely bad", "not so good",
+    "extremely not good", "really not bad", "really really not good", "very not good",
+    "totally not worth it", "not a good movie", "not a very good movie", "it is not a bad film",
+    "a not good a", "never ever good", "isn't good", "the acting was not very convincing",
+    "good!", "not bad at all!", "absolutely not terrible!!", "good! not bad! great", "!good",
+    "not good. very bad!", "awful :( but not terrible", "not",
+)
+# Share of the file's documents that must be within the tolerance
+MIN_AGREEMENT = 0.99
+
+
+def within(exact, fast, tolerance):
+    # per document: polarity and subjectivity both within the tolerance
+    exact = np.array([r[:2] for r in exact]).reshape(-1, 2)
+    fast = np.array([r[:2] for r in fast]).reshape(-1, 2)
+    return (np.abs(exact - fast) <= tolerance).all(axis=1)
+
+
+def check_cases(tolerance):
+    """
+    Score RULE_CASES with both engines; True if all agree within `tolerance`.
+    """
+    exact = get_batch_scorer("textblob")(list(RULE_CASES))
+    fast = get_batch_scorer("fast")(list(RULE_CASES))
+    ok = within(exact, fast, tolerance)
+    for text, a, b in ((t, a, b) for t, a, b, good in zip(RULE_CASES, exact, fast, ok) if not good):
+        print(f"  ✗ {text!r}: textblob ({a[0]:.4f}, {a[1]:.4f}), fast ({b[0]:.4f}, {b[1]:.4f})")
+    print(f"Rule cases within {tolerance}: {ok.sum()}/{len(ok)}")
+    return bool(ok.all())
+
+
+def timed(engine, texts, batch_size):
+    scorer = get_batch_scorer(engine)
+    scorer(texts[:10])   # warm up (lexicon load)
+    start = time.perf_counter()
+    results = []
+    for i in range(0, len(texts), batch_size):
+        results.extend(scorer(texts[i:i + batch_size]))
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", nargs="?", default="reviews.csv")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument("--min-agreement", type=float, default=MIN_AGREEMENT)
+    parser.add_argument("--cases-only", action="store_true", help="check RULE_CASES only")
+    args = parser.parse_args()
+
+    passed = check_cases(args.tolerance)
+    if args.cases_only:
+        sys.exit(0 if passed else 1)
+
+    df = pd.read_csv(args.file, nrows=args.limit)
+    review_col = detect_review_column(df.columns)
+    if review_col is None:
+        raise ValueError("No column found containing text reviews.")
+    texts = df[review_col].apply(clean_text).tolist()
+    print(f"{len(texts)} reviews from {args.file}")
+
+    exact, t_exact = timed("textblob", texts, args.batch_size)
+    fast, t_fast = timed("fast", texts, args.batch_size)
+
+    print(f"\n{'engine':<10}{'seconds':>10}{'docs/sec':>12}")
+    for name, t in (("textblob", t_exact), ("fast", t_fast)):
+        print(f"{name:<10}{t:>10.2f}{len(texts) / max(t, 1e-9):>12.0f}")
+    print(f"speedup: {t_exact / max(t_fast, 1e-9):.1f}x")
+
+    if not texts:
+        sys.exit(0 if passed else 1)
+    agreement = within(exact, fast, args.tolerance).mean()
+    labels_equal = np.mean([a[2] == b[2] for a, b in zip(exact, fast)])
+    exact = np.array([r[:2] for r in exact])
+    fast = np.array([r[:2] for r in fast])
+    print("\nAgreement with TextBlob(text).sentiment:")
+    for i, name in enumerate(("polarity", "subjectivity")):
+        err = np.abs(exact[:, i] - fast[:, i])
+        print(f"  {name:<13} MAE={err.mean():.4f}  within {args.tolerance}: {np.mean(err <= args.tolerance):.1%}  "
+              f"exact: {np.mean(err < 1e-12):.1%}")
+    print(f"  label agreement: {labels_equal:.1%}")
+    if agreement < args.min_agreement:
+        print(f"✗ {agreement:.1%} of documents within {args.tolerance}, below --min-agreement {args.min_agreement:.0%}")
+        passed = False
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
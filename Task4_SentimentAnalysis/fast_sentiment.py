@@ -0,0 +1,178 @@
+"""
+fast_sentiment.py
+Vectorized lexicon-based sentiment engine (the "fast" engine).
+
+Uses the same lexicon as TextBlob's PatternAnalyzer (polarity,
+subjectivity, intensity, adverb modifiers, negations, emoticons), compiled
+into NumPy arrays. A batch of reviews is tokenized into one flat array of
+lexicon indices with a document id per token, and the rules are applied
+with array operations over the whole batch:
+
+- a known adverb directly before a known word scales it by its intensity
+  ("very good") and is folded into that word's assessment; an -ly adverb
+  does so across a negation too ("extremely not good")
+- "no" / "not" / "never" directly before a known word, or across a
+  one-letter word ("not a good"), flips the assessment holding that word
+  to p * -0.5; a negated adverb also divides the next word by its
+  intensity ("not very good" = -0.5 * good / 1.3)
+- each "!" boosts the polarity of the last assessment before it by 1.25
+- document scores are the mean over assessed words (np.bincount)
+
+PatternAnalyzer also carries a modifier across short unknown words
+("really is a good") and a negation across several one-letter words, so
+a few documents score differently. compare_engines.py checks the rules
+on handcrafted phrases (RULE_CASES) and measures the agreement with
+TextBlob(text).sentiment and the throughput of both engines.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+from textblob._text import EMOTICONS
+from textblob.en import sentiment as pattern_sentiment
+
+from sentiment_engine import classify_sentiment
+
+NEGATIONS = ("no", "not", "never")
+EXCLAMATION_BOOST = 1.25
+# Bumped when the rules change, so sentiment_cache.py drops earlier fast scores
+RULES_VERSION = 2
+
+_lexicon = None
+
+
+class CompiledLexicon:
+    def __init__(self):
+        if dict.__len__(pattern_sentiment) == 0:
+            pattern_sentiment.load()
+
+        words, p, s, i, mod = [], [], [], [], []
+        for w, senses in dict.items(pattern_sentiment):
+            pv, sv, iv = senses[None]   # averaged over part-of-speech tags, as for plain text
+            words.append(w)
+            p.append(pv)
+            s.append(sv)
+            i.append(iv)
+            mod.append(any(m in senses for m in pattern_sentiment.modifiers))
+
+        # Emoticons (and "(!)" for irony) only count when not already a lexicon word
+        known = set(words)
+        emoticons = {"(!)": 0.0}
+        for (_, polarity), forms in EMOTICONS.items():
+            for e in forms:
+                emoticons.setdefault(e.lower(), polarity)
+        for e, polarity in emoticons.items():
+            if e not in known and not e.isalpha():
+                words.append(e)
+                p.append(polarity)
+                s.append(1.0)
+                i.append(1.0)
+                mod.append(False)
+
+        self.index = pd.Index(words)
+        self.polarity = np.array(p, dtype=np.float64)
+        self.subjectivity = np.array(s, dtype=np.float64)
+        self.intensity = np.array(i, dtype=np.float64)
+        self.modifier = np.array(mod, dtype=bool)
+        # modifiers that also apply across a negation (PatternAnalyzer's modifier(): "-ly")
+        self.ly_modifier = self.modifier & np.array([w.endswith("ly") for w in words])
+
+        # Emoticons first (longest first), then words, then single symbols.
+        # Apostrophes split words, as in TextBlob's tokenizer ("isn't" -> is n ' t).
+        symbols = sorted((e for e in emoticons if not e.isalpha()), key=len, reverse=True)
+        self.token_re = re.compile("|".join([re.escape(e) for e in symbols]
+                                            + [r"[^\W_]+(?:-[^\W_]+)*", r"[^\w\s]"]))
+
+
+def get_lexicon():
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = CompiledLexicon()
+    return _lexicon
+
+
+def _prev(mask, same_doc):
+    # mask shifted one token to the right, never crossing documents
+    out = np.zeros_like(mask)
+    out[1:] = mask[:-1]
+    return out & same_doc
+
+
+def score_arrays(texts):
+    """
+    Score a batch of cleaned texts; returns (polarity, subjectivity) arrays.
+    """
+    lex = get_lexicon()
+    n_docs = len(texts)
+    tokens = pd.Series(list(texts), dtype=object).str.lower().str.findall(lex.token_re).explode()
+    tokens = tokens.dropna()
+    doc = tokens.index.to_numpy(dtype=np.int64)
+    tok = tokens.to_numpy(dtype=object)
+    n = len(tok)
+    if n == 0:
+        return np.zeros(n_docs), np.zeros(n_docs)
+
+    tid = lex.index.get_indexer(tok)
+    known = tid >= 0
+    safe = np.where(known, tid, 0)
+    p = np.where(known, lex.polarity[safe], 0.0)
+    s = np.where(known, lex.subjectivity[safe], 0.0)
+    intensity = np.where(known, lex.intensity[safe], 1.0)
+    modifier = known & lex.modifier[safe]
+
+    tok_s = pd.Series(tok)
+    negation = tok_s.isin(NEGATIONS).to_numpy()
+    exclamation = tok_s.eq("!").to_numpy()
+    one_letter = (tok_s.str.strip("'").str.len() <= 1).to_numpy()
+
+    same_doc = np.zeros(n, dtype=bool)
+    same_doc[1:] = doc[1:] == doc[:-1]
+
+    # Negation pending at a token: right before it, or across an unknown one-letter word
+    reach = _prev(negation, same_doc)
+    reach |= _prev(_prev(negation, same_doc) & one_letter & ~known, same_doc)
+    # Modifier + known word -> one assessment, scaled by the modifier's intensity,
+    # directly or across a negation after an -ly modifier ("extremely not good")
+    ly_modifier = known & lex.ly_modifier[safe]
+    before = _prev(modifier, same_doc) & known
+    across = _prev(_prev(ly_modifier, same_doc) & negation, same_doc) & known & ~before
+    merged = before | across
+    # A negated modifier inverts its intensity ("not very good")
+    intensity = np.where(modifier & reach & ~across, 1.0 / intensity, intensity)
+    position = np.arange(n)
+    mod_pos = np.where(before, position - 1, np.where(across, position - 2, position))
+    p = np.where(merged, np.clip(p * intensity[mod_pos], -1.0, 1.0), p)
+    s = np.where(merged, np.clip(s * intensity[mod_pos], -1.0, 1.0), s)
+    folded = np.zeros(n, dtype=bool)
+    folded[mod_pos[merged]] = True
+    assessed = known & ~folded
+
+    # Exclamation marks boost the last assessment before them
+    last_word = np.maximum.accumulate(np.where(assessed, position, -1))
+    excl_idx = np.flatnonzero(exclamation & (last_word >= 0))
+    targets = last_word[excl_idx]
+    targets = targets[doc[targets] == doc[excl_idx]]
+    boosts = np.bincount(targets, minlength=n)
+    p = np.clip(p * EXCLAMATION_BOOST ** boosts, -1.0, 1.0)
+
+    # Negation of any word of an assessment ("not very very good"); a chain of
+    # merged words starts at the last known word that was not merged
+    head = np.maximum.accumulate(np.where(known & ~merged, position, 0))
+    chain_negated = np.bincount(head[known], weights=reach[known], minlength=n) > 0
+    negated = chain_negated[head]
+    p = np.where(negated, p * -0.5, p)
+
+    d = doc[assessed]
+    counts = np.bincount(d, minlength=n_docs)
+    polarity = np.bincount(d, weights=p[assessed], minlength=n_docs) / np.maximum(counts, 1)
+    subjectivity = np.bincount(d, weights=s[assessed], minlength=n_docs) / np.maximum(counts, 1)
+    return polarity, subjectivity
+
+
+def score_batch(texts):
+    """
+    Same interface as sentiment_engine.score_batch
+    """
+    polarity, subjectivity = score_arrays(texts)
+    return [(float(p), float(s), classify_sentiment(p)) for p, s in zip(polarity, subjectivity)]
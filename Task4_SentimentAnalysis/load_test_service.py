@@ -0,0 +1,89 @@
+"""
+load_test_service.py
+Localhost load test for sentiment_service.py.
+
+    python sentiment_service.py &
+    python load_test_service.py --concurrency 64 --requests 5000
+
+Opens --concurrency keep-alive connections, each sending POST /score
+requests back to back (--texts-per-request reviews each, taken from
+reviews.csv or --file), then prints client-side requests/second and
+latency percentiles followed by the service's own /stats.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import pandas as pd
+
+from sentiment_engine import detect_review_column
+from sentiment_service import percentile
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def worker(host, port, texts, n_requests, per_request, latencies, errors, offset):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(n_requests):
+            start = (offset + i * per_request) % len(texts)
+            batch = (texts[start:] + texts[:start])[:per_request]
+            t0 = time.perf_counter()
+            status, _ = await request(reader, writer, "POST", "/score", {"texts": batch})
+            latencies.append(time.perf_counter() - t0)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def main(args):
+    df = pd.read_csv(args.file)
+    texts = df[detect_review_column(df.columns)].astype(str).tolist()
+
+    latencies, errors = [], []
+    per_worker = [args.requests // args.concurrency + (i < args.requests % args.concurrency)
+                  for i in range(args.concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(args.host, args.port, texts, n, args.texts_per_request, latencies, errors, i)
+                           for i, n in enumerate(per_worker) if n))
+    elapsed = time.perf_counter() - start
+
+    lat = sorted(latencies)
+    print(f"{len(lat)} requests ({len(lat) * args.texts_per_request} texts) in {elapsed:.2f}s, "
+          f"{len(errors)} errors")
+    print(f"requests/s: {len(lat) / elapsed:.0f}   texts/s: {len(lat) * args.texts_per_request / elapsed:.0f}")
+    print("latency ms: " + "  ".join(f"p{q}={percentile(lat, q) * 1000:.2f}" for q in (50, 90, 95, 99)))
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, stats = await request(reader, writer, "GET", "/stats")
+    writer.close()
+    print("service stats:", json.dumps(stats))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for sentiment_service.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--file", default="reviews.csv")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--texts-per-request", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -5,96 +5,125 @@ Performs text cleaning + sentiment scoring + classification + visualization.
 
 import pandas as pd
 import matplotlib.pyplot as plt
-from textblob import TextBlob
 import seaborn as sns
 import os
+import sys
+from sentiment_engine import detect_review_column, score_frame
+from sentiment_stream import plot_aggregates, stream_score
+from sentiment_cache import SentimentCache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.instrumentation import add_rows, configure, finish, section
 
 # ---------------- CONFIG ----------------
 FILE_PATH = r"C:\Users\Asus\Desktop\reviews.csv"   # Your dataset of reviews
 OUTPUT_DIR = "sentiment_output"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-print("Loading dataset...")
-df = pd.read_csv(FILE_PATH)
-print("Dataset loaded. Shape:", df.shape)
-
-# ---------------- Clean Column Detection ----------------
-review_col = None
-for c in df.columns:
-    if "review" in c.lower() or "comment" in c.lower() or "text" in c.lower():
-        review_col = c
-        break
-
-if review_col is None:
-    raise ValueError("No column found containing text reviews. Please rename your text column to 'review'.")
-
-print("Using text column:", review_col)
-
-# ---------------- STEP 1 — Text Cleaning ----------------
-def clean_text(text):
-    if pd.isnull(text):
-        return ""
-    text = str(text)
-    text = text.replace("\n", " ")
-    text = text.replace("\t", " ")
-    return text.strip()
-
-df["cleaned_text"] = df[review_col].apply(clean_text)
-
-# ---------------- STEP 2 — Polarity & Subjectivity ----------------
-def get_polarity(text):
-    return TextBlob(text).sentiment.polarity
-
-def get_subjectivity(text):
-    return TextBlob(text).sentiment.subjectivity
-
-df["polarity"] = df["cleaned_text"].apply(get_polarity)
-df["subjectivity"] = df["cleaned_text"].apply(get_subjectivity)
-
-# ---------------- STEP 3 — Sentiment Label ----------------
-def classify_sentiment(score):
-    if score > 0.05:
-        return "Positive"
-    elif score < -0.05:
-        return "Negative"
-    else:
-        return "Neutral"
-
-df["sentiment"] = df["polarity"].apply(classify_sentiment)
-
-# Save processed file
-df.to_csv(os.path.join(OUTPUT_DIR, "sentiment_results.csv"), index=False)
-print("Saved: sentiment_results.csv")
-
-# ---------------- STEP 4 — Visualization ----------------
-# 1. Sentiment distribution
-plt.figure(figsize=(7,5))
-sns.countplot(data=df, x="sentiment", palette="coolwarm")
-plt.title("Sentiment Distribution")
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, "sentiment_distribution.png"))
-plt.close()
-print("Saved: sentiment_distribution.png")
-
-# 2. Polarity histogram
-plt.figure(figsize=(8,5))
-sns.histplot(df["polarity"], bins=40)
-plt.title("Polarity Score Distribution")
-plt.xlabel("Polarity")
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, "polarity_histogram.png"))
-plt.close()
-print("Saved: polarity_histogram.png")
-
-# 3. Subjectivity histogram
-plt.figure(figsize=(8,5))
-sns.histplot(df["subjectivity"], bins=40)
-plt.title("Subjectivity Score Distribution")
-plt.xlabel("Subjectivity")
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, "subjectivity_histogram.png"))
-plt.close()
-print("Saved: subjectivity_histogram.png")
-
-print("\n🎉 Sentiment Analysis Completed Successfully!")
-print("Check the folder:", OUTPUT_DIR)
+WORKERS = None       # scoring processes (None = all cores)
+CHUNK_SIZE = 2000    # reviews per batch sent to a worker
+ENGINE = "textblob"  # "textblob" (exact) or "fast" (vectorized approximation, see fast_sentiment.py)
+# Streaming mode for files that don't fit in memory: reviews are read,
+# scored and appended to the output STREAM_CHUNK_SIZE rows at a time
+STREAMING = False
+STREAM_CHUNK_SIZE = 50_000
+# Persistent score cache: duplicate and previously seen reviews are not re-scored
+USE_CACHE = True
+CACHE_PATH = "sentiment_cache.sqlite"
+CACHE_MAX_ENTRIES = 5_000_000
+NORMALIZE_CACHE_KEYS = False   # also match on case/whitespace (scores may then differ slightly)
+# Per-stage timing/memory trace in OUTPUT_DIR/trace.jsonl (also switched on
+# by TASK_TRACE=1; see common/instrumentation.py)
+TRACE = False
+
+
+def main():
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    configure("sentiment_analysis", OUTPUT_DIR, enabled=TRACE)
+    cache = SentimentCache(CACHE_PATH, CACHE_MAX_ENTRIES, NORMALIZE_CACHE_KEYS, ENGINE) if USE_CACHE else None
+    try:
+        run(cache)
+    finally:
+        if cache is not None:
+            print("Score cache:", cache.report())
+            cache.close()
+        finish()
+
+
+def run(cache):
+    if STREAMING:
+        print(f"Streaming dataset in chunks of {STREAM_CHUNK_SIZE} rows...")
+        section("stream score")
+        aggregates = stream_score(FILE_PATH, os.path.join(OUTPUT_DIR, "sentiment_results.csv"),
+                                  chunk_size=STREAM_CHUNK_SIZE, workers=WORKERS, batch_size=CHUNK_SIZE,
+                                  cache=cache, engine=ENGINE)
+        print(f"Saved: sentiment_results.csv ({aggregates.n_rows} rows)")
+        add_rows(aggregates.n_rows)
+        section("plot aggregates")
+        plot_aggregates(aggregates, OUTPUT_DIR)
+        print("\n🎉 Sentiment Analysis Completed Successfully!")
+        print("Check the folder:", OUTPUT_DIR)
+        return
+
+    print("Loading dataset...")
+    section("load")
+    df = pd.read_csv(FILE_PATH)
+    print("Dataset loaded. Shape:", df.shape)
+    add_rows(len(df))
+
+    # ---------------- Clean Column Detection ----------------
+    section("detect")
+    review_col = detect_review_column(df.columns)
+
+    if review_col is None:
+        raise ValueError("No column found containing text reviews. Please rename your text column to 'review'.")
+
+    print("Using text column:", review_col)
+
+    # ---------------- STEP 1-3 — Cleaning, Polarity & Subjectivity, Label ----------------
+    # One analyzer pass per review, batched across a process pool
+    section("score", rows=len(df))
+    df = score_frame(df, review_col, workers=WORKERS, chunk_size=CHUNK_SIZE, cache=cache, engine=ENGINE)
+
+    # Save processed file
+    section("write results", rows=len(df))
+    df.to_csv(os.path.join(OUTPUT_DIR, "sentiment_results.csv"), index=False)
+    print("Saved: sentiment_results.csv")
+
+    # ---------------- STEP 4 — Visualization ----------------
+    # 1. Sentiment distribution
+    section("plot sentiment_distribution.png")
+    plt.figure(figsize=(7,5))
+    sns.countplot(data=df, x="sentiment", palette="coolwarm")
+    plt.title("Sentiment Distribution")
+    plt.tight_layout()
+    plt.savefig(os.path.join(OUTPUT_DIR, "sentiment_distribution.png"))
+    plt.close()
+    print("Saved: sentiment_distribution.png")
+
+    # 2. Polarity histogram
+    section("plot polarity_histogram.png")
+    plt.figure(figsize=(8,5))
+    sns.histplot(df["polarity"], bins=40)
+    plt.title("Polarity Score Distribution")
+    plt.xlabel("Polarity")
+    plt.tight_layout()
+    plt.savefig(os.path.join(OUTPUT_DIR, "polarity_histogram.png"))
+    plt.close()
+    print("Saved: polarity_histogram.png")
+
+    # 3. Subjectivity histogram
+    section("plot subjectivity_histogram.png")
+    plt.figure(figsize=(8,5))
+    sns.histplot(df["subjectivity"], bins=40)
+    plt.title("Subjectivity Score Distribution")
+    plt.xlabel("Subjectivity")
+    plt.tight_layout()
+    plt.savefig(os.path.join(OUTPUT_DIR, "subjectivity_histogram.png"))
+    plt.close()
+    print("Saved: subjectivity_histogram.png")
+
+    print("\n🎉 Sentiment Analysis Completed Successfully!")
+    print("Check the folder:", OUTPUT_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+sentiment_cache.py
+Persistent memoization of sentiment scores (SQLite).
+
+Scores are keyed by a hash of the cleaned text, optionally after
+lower-casing and collapsing whitespace (normalize=True; faster hit rate,
+but case can change the score of emoticons and some words, so results are
+then no longer guaranteed identical). Each batch is deduplicated before
+lookup, only unseen texts are scored, and the cache is trimmed to
+`max_entries` least recently used rows as soon as a batch's new scores
+take it past that limit (and again on close()).
+
+The cache is tied to the scorer version (engine, TextBlob version and a
+hash of its sentiment lexicon) and cleared automatically when that changes.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from importlib import metadata
+
+import textblob
+
+from sentiment_engine import classify_sentiment, score_texts
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def scorer_version(engine="textblob"):
+    lexicon = os.path.join(os.path.dirname(textblob.__file__), "en", "en-sentiment.xml")
+    with open(lexicon, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:12]
+    if engine == "fast":
+        from fast_sentiment import RULES_VERSION
+        engine = f"fast{RULES_VERSION}"
+    return f"{engine}-textblob-{metadata.version('textblob')}-{digest}"
+
+
+class SentimentCache:
+    def __init__(self, path="sentiment_cache.sqlite", max_entries=5_000_000, normalize=False, engine="textblob"):
+        self.path = path
+        self.engine = engine
+        self.max_entries = max_entries
+        self.normalize = normalize
+        self.stats = {"texts": 0, "unique": 0, "hits": 0, "scored": 0}
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS scores (
+                key TEXT PRIMARY KEY,
+                polarity REAL,
+                subjectivity REAL,
+                last_used REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_scores_last_used ON scores(last_used);
+        """)
+        # Invalidate on scorer/lexicon change (normalization changes keys too)
+        version = f"{scorer_version(engine)}|normalize={normalize}"
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != version:
+            with self._db:
+                self._db.execute("DELETE FROM scores")
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        self._rows = self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def key(self, text):
+        if self.normalize:
+            text = WHITESPACE_RE.sub(" ", text).strip().lower()
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _lookup(self, keys):
+        found = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            rows = self._db.execute(
+                f"SELECT key, polarity, subjectivity FROM scores WHERE key IN ({','.join('?' * len(part))})",
+                part).fetchall()
+            found.update((k, (p, s)) for k, p, s in rows)
+        return found
+
+    def score_texts(self, texts, workers=None, chunk_size=2000, pool=None, engine=None):
+        """
+        Same result as sentiment_engine.score_texts, but duplicates are
+        scored once and previously seen texts come from the cache. The
+        texts are scored with this cache's engine; ValueError for another.
+        """
+        if engine is not None and engine != self.engine:
+            raise ValueError(f"This cache holds {self.engine!r} scores, not {engine!r}; "
+                             f"open a SentimentCache with engine={engine!r}")
+        texts = list(texts)
+        keys = [self.key(t) for t in texts]
+        unique = {}
+        for k, t in zip(keys, texts):
+            unique.setdefault(k, t)
+
+        scores = self._lookup(unique)
+        now = time.time()
+        missing = [k for k in unique if k not in scores]
+        if missing:
+            polarity, subjectivity, _ = score_texts([unique[k] for k in missing], workers, chunk_size, pool,
+                                                    self.engine)
+            new = list(zip(missing, polarity, subjectivity))
+            scores.update((k, (p, s)) for k, p, s in new)
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)",
+                                     [(k, p, s, now) for k, p, s in new])
+            self._rows += len(new)
+        missing_set = set(missing)
+        hits = [k for k in unique if k not in missing_set]
+        with self._db:
+            self._db.executemany("UPDATE scores SET last_used = ? WHERE key = ?", [(now, k) for k in hits])
+        if self._rows > self.max_entries:
+            self.evict()   # after the hits' last_used update, so this batch's rows are kept
+
+        self.stats["texts"] += len(texts)
+        self.stats["unique"] += len(unique)
+        self.stats["hits"] += len(hits)
+        self.stats["scored"] += len(missing)
+
+        polarities = [scores[k][0] for k in keys]
+        subjectivities = [scores[k][1] for k in keys]
+        return polarities, subjectivities, [classify_sentiment(p) for p in polarities]
+
+    def evict(self):
+        """
+        Trim the cache to max_entries, dropping least recently used rows.
+        """
+        count = self._db.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        if count > self.max_entries:
+            with self._db:
+                self._db.execute(
+                    "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,))
+            count = self.max_entries
+        self._rows = count
+
+    def report(self):
+        s = self.stats
+        saved = s["texts"] - s["scored"]
+        rate = saved / s["texts"] if s["texts"] else 0.0
+        return (f"{s['texts']} texts, {s['unique']} unique, {s['hits']} cache hits, "
+                f"{s['scored']} scored ({rate:.1%} of scoring avoided)")
+
+    def close(self):
+        self.evict()
+        self._db.close()
@@ -0,0 +1,120 @@
+"""
+sentiment_engine.py
+Single-pass, batched sentiment scoring shared by the sentiment scripts.
+
+Each document is analysed once: the TextBlob PatternAnalyzer gives both
+polarity and subjectivity from the same pass, and the label is derived
+from the polarity. This is exactly what TextBlob(text).sentiment does,
+so the scores are identical to the previous per-column .apply() calls.
+
+Batches can be spread over a process pool (workers / chunk_size).
+engine="fast" swaps in the vectorized approximation from fast_sentiment.py.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from textblob.en.sentiments import PatternAnalyzer
+
+_analyzer = None
+
+
+def get_analyzer():
+    # One warm analyzer per process (the lexicon is loaded on first use)
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = PatternAnalyzer()
+    return _analyzer
+
+
+# ---------------- Text cleaning & labels ----------------
+def detect_review_column(columns):
+    for c in columns:
+        if "review" in c.lower() or "comment" in c.lower() or "text" in c.lower():
+            return c
+    return None
+
+
+def clean_text(text):
+    if pd.isnull(text):
+        return ""
+    text = str(text)
+    text = text.replace("\n", " ")
+    text = text.replace("\t", " ")
+    return text.strip()
+
+
+def classify_sentiment(score):
+    if score > 0.05:
+        return "Positive"
+    elif score < -0.05:
+        return "Negative"
+    else:
+        return "Neutral"
+
+
+# ---------------- Scoring ----------------
+def score_text(text):
+    """
+    (polarity, subjectivity, sentiment) for one cleaned text
+    """
+    polarity, subjectivity = get_analyzer().analyze(text)
+    return polarity, subjectivity, classify_sentiment(polarity)
+
+
+def score_batch(texts):
+    return [score_text(t) for t in texts]
+
+
+def get_batch_scorer(engine="textblob"):
+    if engine == "fast":
+        from fast_sentiment import score_batch as fast_score_batch
+        return fast_score_batch
+    if engine != "textblob":
+        raise ValueError(f"Unknown sentiment engine: {engine!r} (use 'textblob' or 'fast')")
+    return score_batch
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def score_texts(texts, workers=None, chunk_size=2000, pool=None, engine="textblob"):
+    """
+    Score a list of cleaned texts; returns (polarities, subjectivities, labels).
+
+    workers=None uses all cores, workers=1 scores in this process.
+    Small inputs (one chunk or less) are always scored in-process.
+    Pass an existing ProcessPoolExecutor as `pool` to reuse it across calls.
+    """
+    texts = list(texts)
+    batch_scorer = get_batch_scorer(engine)
+    workers = workers or os.cpu_count() or 1
+    if (workers == 1 and pool is None) or len(texts) <= chunk_size:
+        results = batch_scorer(texts)
+    elif pool is not None:
+        results = [r for batch in pool.map(batch_scorer, _chunks(texts, chunk_size)) for r in batch]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [r for batch in pool.map(batch_scorer, _chunks(texts, chunk_size)) for r in batch]
+
+    if not results:
+        return [], [], []
+    polarities, subjectivities, labels = map(list, zip(*results))
+    return polarities, subjectivities, labels
+
+
+def score_frame(df, text_col, workers=None, chunk_size=2000, pool=None, cache=None, engine="textblob"):
+    """
+    Add cleaned_text, polarity, subjectivity and sentiment columns to `df`
+    (through a SentimentCache when given, see sentiment_cache.py)
+    """
+    df["cleaned_text"] = df[text_col].apply(clean_text)
+    score = cache.score_texts if cache is not None else score_texts
+    polarity, subjectivity, sentiment = score(df["cleaned_text"].tolist(), workers, chunk_size, pool, engine)
+    df["polarity"] = polarity
+    df["subjectivity"] = subjectivity
+    df["sentiment"] = sentiment
+    return df
@@ -0,0 +1,209 @@
+"""
+sentiment_service.py
+Long-running local sentiment scoring service with micro-batching.
+
+    python sentiment_service.py --port 8765 --max-batch 256 --max-latency-ms 5
+
+Keeps the analyzer warm and scores with the same clean_text / polarity /
+subjectivity / classify_sentiment logic as sentiment_analysis.py.
+Concurrent requests are queued and coalesced into micro-batches: a batch
+is scored as soon as it holds --max-batch texts or the oldest request has
+waited --max-latency-ms.
+
+Endpoints (HTTP/1.1, keep-alive, stdlib asyncio only):
+    POST /score   {"text": "..."} or {"texts": ["...", ...]}
+                  -> {"results": [{"polarity", "subjectivity", "sentiment"}, ...]}
+    GET  /stats   throughput, batch sizes and latency percentiles
+    GET  /health  "ok"
+
+See load_test_service.py for a localhost load-test client.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from sentiment_engine import clean_text, get_batch_scorer
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class MicroBatcher:
+    def __init__(self, engine="textblob", max_batch=256, max_latency=0.005, window=10_000):
+        self.score_batch = get_batch_scorer(engine)
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.queue = asyncio.Queue()
+        # Scoring runs off the event loop so requests keep being accepted
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.started = time.monotonic()
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+
+    async def score(self, texts):
+        future = asyncio.get_running_loop().create_future()
+        start = time.perf_counter()
+        await self.queue.put(([clean_text(t) for t in texts], future))
+        results = await future
+        self.latencies.append(time.perf_counter() - start)
+        self.requests += 1
+        return results
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.score_batch(["warm up"])
+        while True:
+            pending = [await self.queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_latency
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            # a request whose handler was cancelled (client gone) has a done future
+            pending = [item for item in pending if not item[1].done()]
+            if not pending:
+                continue
+            texts = [t for item_texts, _ in pending for t in item_texts]
+            try:
+                scored = await loop.run_in_executor(self.executor, self.score_batch, texts)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(texts)
+            self.batch_sizes.append(len(texts))
+
+            pos = 0
+            for item_texts, future in pending:
+                chunk = scored[pos:pos + len(item_texts)]
+                pos += len(item_texts)
+                if future.done():   # cancelled while the batch was scored
+                    continue
+                future.set_result([{"polarity": p, "subjectivity": s, "sentiment": label}
+                                   for p, s, label in chunk])
+
+    def stats(self):
+        lat = sorted(self.latencies)
+        uptime = time.monotonic() - self.started
+        return {
+            "uptime_s": round(uptime, 1),
+            "requests": self.requests,
+            "texts": self.texts,
+            "batches": self.batches,
+            "texts_per_s": round(self.texts / uptime, 1) if uptime else 0.0,
+            "avg_batch_size": round(sum(self.batch_sizes) / len(self.batch_sizes), 1) if self.batch_sizes else 0.0,
+            "latency_ms": {f"p{q}": round(percentile(lat, q) * 1000, 2) for q in (50, 90, 95, 99)},
+        }
+
+
+def request_texts(data):
+    """
+    The texts of a /score body: {"text": str} or {"texts": [str, ...]};
+    ValueError for anything else.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('expected a JSON object with "text" or "texts"')
+    if "texts" in data:
+        texts = data["texts"]
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            raise ValueError('"texts" must be a list of strings')
+        return texts
+    if "text" in data:
+        if not isinstance(data["text"], str):
+            raise ValueError('"text" must be a string')
+        return [data["text"]]
+    raise ValueError('expected "text" or "texts"')
+
+
+async def handle(batcher, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            status, payload = 200, None
+            if method == "POST" and path == "/score":
+                try:
+                    data = json.loads(body or b"{}")
+                    texts = request_texts(data)
+                    payload = {"results": await batcher.score(texts)}
+                except (ValueError, KeyError, TypeError) as e:
+                    status, payload = 400, {"error": f"bad request: {e}"}
+            elif method == "GET" and path == "/stats":
+                payload = batcher.stats()
+            elif method == "GET" and path == "/health":
+                payload = "ok"
+            else:
+                status, payload = 404, {"error": "not found"}
+
+            out = json.dumps(payload).encode("utf-8")
+            keep_alive = headers.get("connection", "").lower() != "close"
+            writer.write(
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(out)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + out)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, engine="textblob", max_batch=256, max_latency_ms=5.0):
+    batcher = MicroBatcher(engine, max_batch, max_latency_ms / 1000)
+    server = await asyncio.start_server(lambda r, w: handle(batcher, r, w), host, port)
+    batch_task = asyncio.create_task(batcher.run())
+    print(f"Sentiment service on http://{host}:{port} (engine={engine}, "
+          f"max_batch={max_batch}, max_latency={max_latency_ms}ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching sentiment scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--engine", default="textblob", choices=["textblob", "fast"])
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.engine, args.max_batch, args.max_latency_ms))
+    except KeyboardInterrupt:
+        pass
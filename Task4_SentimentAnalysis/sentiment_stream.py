@@ -0,0 +1,123 @@
+"""
+sentiment_stream.py
+Constant-memory streaming mode for very large review files.
+
+Reviews are read in chunks, scored, and appended to sentiment_results.csv
+chunk by chunk. Only running aggregates are kept: label counts and
+fixed-bin histograms of polarity and subjectivity. The three charts are
+drawn from those aggregates, so peak memory depends on the chunk size,
+not on the size of the file.
+
+Note: the histograms use fixed bins over the full score range
+(polarity -1..1, subjectivity 0..1) instead of seaborn's data-driven
+range, since the data range is not known until the end of the file.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from sentiment_engine import detect_review_column, score_frame
+
+N_BINS = 40
+POLARITY_RANGE = (-1.0, 1.0)
+SUBJECTIVITY_RANGE = (0.0, 1.0)
+
+
+class SentimentAggregates:
+    """
+    Mergeable running aggregates of scored reviews.
+    """
+
+    def __init__(self, bins=N_BINS):
+        self.n_rows = 0
+        self.label_counts = {}
+        self.polarity_edges = np.linspace(*POLARITY_RANGE, bins + 1)
+        self.subjectivity_edges = np.linspace(*SUBJECTIVITY_RANGE, bins + 1)
+        self.polarity_hist = np.zeros(bins, dtype=np.int64)
+        self.subjectivity_hist = np.zeros(bins, dtype=np.int64)
+
+    def update(self, df):
+        self.n_rows += len(df)
+        for label, count in df["sentiment"].value_counts(sort=False).items():
+            self.label_counts[label] = self.label_counts.get(label, 0) + int(count)
+        self.polarity_hist += np.histogram(df["polarity"], bins=self.polarity_edges)[0]
+        self.subjectivity_hist += np.histogram(df["subjectivity"], bins=self.subjectivity_edges)[0]
+
+    def merge(self, other):
+        self.n_rows += other.n_rows
+        for label, count in other.label_counts.items():
+            self.label_counts[label] = self.label_counts.get(label, 0) + count
+        self.polarity_hist += other.polarity_hist
+        self.subjectivity_hist += other.subjectivity_hist
+        return self
+
+
+def stream_score(file_path, output_path, chunk_size=50_000, workers=None, batch_size=2000, cache=None,
+                 engine="textblob"):
+    """
+    Score `file_path` chunk by chunk, appending results to `output_path`.
+    Returns the SentimentAggregates of the whole file.
+    """
+    aggregates = SentimentAggregates()
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    review_col = None
+    try:
+        for i, chunk in enumerate(pd.read_csv(file_path, chunksize=chunk_size)):
+            if review_col is None:
+                review_col = detect_review_column(chunk.columns)
+                if review_col is None:
+                    raise ValueError("No column found containing text reviews. Please rename your text column to 'review'.")
+                print("Using text column:", review_col)
+
+            chunk = score_frame(chunk, review_col, workers=workers, chunk_size=batch_size, pool=pool, cache=cache,
+                                engine=engine)
+            chunk.to_csv(output_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+            aggregates.update(chunk)
+            print(f"  Scored {aggregates.n_rows} reviews...")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return aggregates
+
+
+# ---------------- Charts from aggregates ----------------
+def plot_sentiment_distribution(aggregates, path):
+    labels = list(aggregates.label_counts)
+    plt.figure(figsize=(7,5))
+    sns.barplot(x=labels, y=[aggregates.label_counts[l] for l in labels], palette="coolwarm")
+    plt.title("Sentiment Distribution")
+    plt.xlabel("sentiment")
+    plt.ylabel("count")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def plot_binned_histogram(counts, edges, title, xlabel, path):
+    plt.figure(figsize=(8,5))
+    plt.hist(edges[:-1], bins=edges, weights=counts, edgecolor="white")
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel("Count")
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def plot_aggregates(aggregates, output_dir):
+    plot_sentiment_distribution(aggregates, os.path.join(output_dir, "sentiment_distribution.png"))
+    print("Saved: sentiment_distribution.png")
+    plot_binned_histogram(aggregates.polarity_hist, aggregates.polarity_edges,
+                          "Polarity Score Distribution", "Polarity",
+                          os.path.join(output_dir, "polarity_histogram.png"))
+    print("Saved: polarity_histogram.png")
+    plot_binned_histogram(aggregates.subjectivity_hist, aggregates.subjectivity_edges,
+                          "Subjectivity Score Distribution", "Subjectivity",
+                          os.path.join(output_dir, "subjectivity_histogram.png"))
+    print("Saved: subjectivity_histogram.png")
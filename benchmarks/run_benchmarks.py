@@ -0,0 +1,284 @@
+"""
+run_benchmarks.py
+Benchmark suite for the task scripts: generates seeded synthetic datasets
+(synthetic_data.py), runs ipl_eda.py, ipl_visualization.py and
+sentiment_analysis.py on them with per-stage timing and peak memory
+(stage_runner.py) and writes the results to a JSON file that later runs
+can be compared against.
+
+    python run_benchmarks.py                                  # 1M deliveries, 20k reviews
+    python run_benchmarks.py --rows 10000000 --scripts eda viz --out results/10m.json
+    python run_benchmarks.py --set eda:STREAMING=True --set eda:CHUNK_SIZE=250000
+    python run_benchmarks.py --compare results/before.json   # exit status 1 on a regression
+
+Datasets are written to --data-dir once per size/seed and reused. Every
+run starts a fresh interpreter in an empty working directory, with the
+dataset caches (.ipl_cache, the sentiment score cache) turned off so each
+run measures a cold start. With --repeat N the reported times are the
+medians of N runs.
+
+--compare matches stages by script and name and flags a stage whose wall
+time grew by more than --threshold (and by at least MIN_DELTA_SECONDS), or
+a script whose peak memory grew by more than --threshold.
+"""
+
+import argparse
+import ast
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic_data
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+SUITE_VERSION = 1
+MIN_DELTA_SECONDS = 0.1
+PACKAGES = ("numpy", "pandas", "scipy", "matplotlib", "seaborn", "pyarrow", "textblob", "psutil")
+
+# script -> (path, dataset format, overrides, probes)
+COLD = {"USE_DATASET_CACHE": False, "USE_ANALYSIS_CACHE": False, "USE_PLAYER_CUBE": False}
+SCRIPTS = {
+    "eda": ("Task2_EDA/ipl_eda.py", "deliveries", COLD,
+            ["load_ipl_csv", "AnalysisGraph.run", "render_plots"]),
+    "eda_matches": ("Task2_EDA/ipl_eda.py", "matches", COLD,
+                    ["load_ipl_csv", "AnalysisGraph.run", "render_plots"]),
+    "viz": ("Task3_DataVisualization/ipl_visualization.py", "ipl", COLD,
+            ["load_ipl_csv", "AnalysisGraph.run", "render_plots"]),
+    "sentiment": ("Task4_SentimentAnalysis/sentiment_analysis.py", "reviews", {"USE_CACHE": False},
+                  ["pd.read_csv", "detect_review_column", "score_frame", "stream_score",
+                   "pd.DataFrame.to_csv", "plot_aggregates", "plt.savefig"]),
+}
+
+
+# ---------- datasets ----------
+def dataset_path(data_dir, fmt, rows, teams, seasons, players, seed):
+    if fmt == "reviews":
+        return os.path.join(data_dir, f"reviews-{rows}-seed{seed}.csv")
+    return os.path.join(data_dir, f"{fmt}-{rows}-t{teams}-s{seasons}-p{players}-seed{seed}.csv")
+
+
+def ensure_dataset(args, fmt):
+    """
+    Path and description of the dataset in format `fmt`, generating it if
+    it does not exist yet.
+    """
+    rows = args.reviews if fmt == "reviews" else args.rows
+    path = dataset_path(args.data_dir, fmt, rows, args.teams, args.seasons, args.players, args.seed)
+    info = {"format": fmt, "path": path, "generate_s": None}
+    if not os.path.exists(path):
+        os.makedirs(args.data_dir, exist_ok=True)
+        print(f"Generating {fmt} dataset ({rows} rows)...")
+        tmp = f"{path}.tmp"
+        start = time.perf_counter()
+        synthetic_data.generate(fmt, tmp, rows, args.teams, args.seasons, args.players, args.seed)
+        os.replace(tmp, path)
+        info["generate_s"] = round(time.perf_counter() - start, 2)
+    with open(path, "rb") as f:
+        info["rows"] = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b"")) - 1
+    info["bytes"] = os.path.getsize(path)
+    return info
+
+
+# ---------- runs ----------
+def run_once(script, overrides, probes):
+    """
+    One stage_runner.py run of `script` in a fresh interpreter and an empty
+    working directory; returns its result dict.
+    """
+    workdir = tempfile.mkdtemp(prefix="ipl-bench-")
+    try:
+        spec_path, result_path = os.path.join(workdir, "spec.json"), os.path.join(workdir, "result.json")
+        with open(spec_path, "w", encoding="utf-8") as f:
+            json.dump({"script": script, "overrides": overrides, "probes": probes}, f)
+        env = dict(os.environ, MPLBACKEND="Agg", PYTHONHASHSEED="0")
+        proc = subprocess.run([sys.executable, os.path.join(BENCH_DIR, "stage_runner.py"), spec_path, result_path],
+                              cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if not os.path.exists(result_path):
+            return {"status": "error", "error": proc.stderr[-4000:] or f"exit code {proc.returncode}"}
+        with open(result_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 4) if values else None
+
+
+def summarize(runs):
+    """
+    Median total, peak memory and per-stage figures over repeated runs.
+    """
+    ok = [r for r in runs if r["status"] in ("ok", "exit")]
+    if not ok:
+        return {"status": "error", "error": runs[-1].get("error")}
+    stages = {}
+    for run in ok:
+        for stage in run["stages"]:
+            stages.setdefault(stage["name"], []).append(stage)
+    return {
+        "status": "ok",
+        "wall_s": _median([r["total"]["wall_s"] for r in ok]),
+        "cpu_s": _median([r["total"]["cpu_s"] for r in ok]),
+        "peak_rss_mb": _median([r["peak_rss_mb"] for r in ok]),
+        "stages": [{"name": name, "kind": entries[0]["kind"], "calls": entries[0]["calls"],
+                    **{key: _median([e[key] for e in entries])
+                       for key in ("wall_s", "cpu_s", "peak_rss_mb", "rss_delta_mb")}}
+                   for name, entries in stages.items()],
+        "unused_overrides": ok[0]["unused_overrides"],
+        "unused_probes": ok[0]["unused_probes"],
+    }
+
+
+def parse_settings(items):
+    """
+    {script: {NAME: value}} from --set script:NAME=value (value as a Python literal).
+    """
+    settings = {}
+    for item in items:
+        try:
+            target, assignment = item.split(":", 1)
+            name, value = assignment.split("=", 1)
+        except ValueError:
+            raise SystemExit(f"--set expects script:NAME=value, got {item!r}")
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            pass   # plain string
+        settings.setdefault(target, {})[name.strip()] = value
+    return settings
+
+
+# ---------- environment ----------
+def machine_info():
+    versions = {}
+    for name in PACKAGES:
+        try:
+            versions[name] = getattr(__import__(name), "__version__", "?")
+        except ImportError:
+            versions[name] = None
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count(),
+            "packages": versions}
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                             capture_output=True, text=True, timeout=30)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if out.returncode != 0:
+        return None
+    return out.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+
+
+# ---------- compare ----------
+def compare(old, new, threshold):
+    """
+    Print stage-by-stage changes from `old` to `new` results; returns the
+    list of regressions.
+    """
+    regressions = []
+    print(f"\nCompared with {old.get('git_commit')} ({old.get('created')}), threshold {threshold:.0%}")
+    print(f"{'script':<12} {'stage':<40} {'old':>9} {'new':>9} {'change':>8}")
+    for script, result in new["scripts"].items():
+        before = old.get("scripts", {}).get(script)
+        if not before or before.get("status") != "ok" or result.get("status") != "ok":
+            continue
+        old_stages = {s["name"]: s for s in before["stages"]}
+        rows = [("total", before["wall_s"], result["wall_s"], "s")]
+        rows += [(s["name"], old_stages[s["name"]]["wall_s"], s["wall_s"], "s")
+                 for s in result["stages"] if s["name"] in old_stages]
+        rows.append(("peak memory", before["peak_rss_mb"], result["peak_rss_mb"], "MB"))
+        for name, a, b, unit in rows:
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else 0.0
+            regressed = b > a * (1 + threshold) and (unit == "MB" or b - a >= MIN_DELTA_SECONDS)
+            flag = "  ⚠" if regressed else ""
+            print(f"{script:<12} {name[:40]:<40} {a:>7.2f}{unit:<2} {b:>7.2f}{unit:<2} {change:>+7.0%}{flag}")
+            if regressed:
+                regressions.append((script, name, a, b))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scripts", nargs="+", choices=list(SCRIPTS), default=["eda", "eda_matches", "viz", "sentiment"])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="deliveries in the IPL datasets")
+    parser.add_argument("--reviews", type=int, default=20_000, help="rows in the reviews dataset")
+    parser.add_argument("--teams", type=int, default=10)
+    parser.add_argument("--seasons", type=int, default=18)
+    parser.add_argument("--players", type=int, default=25, help="squad size per team")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--set", dest="settings", action="append", default=[], metavar="SCRIPT:NAME=VALUE",
+                        help="override a config value of a script, e.g. eda:STREAMING=True")
+    parser.add_argument("--data-dir", default=os.path.join(BENCH_DIR, "data"))
+    parser.add_argument("--out", default=None, help="results file (default: results/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+    settings = parse_settings(args.settings)
+
+    created = datetime.datetime.now().isoformat(timespec="seconds")
+    out = args.out or os.path.join(BENCH_DIR, "results", created.replace(":", "") + ".json")
+    results = {
+        "suite_version": SUITE_VERSION,
+        "created": created,
+        "git_commit": git_commit(),
+        "machine": machine_info(),
+        "params": {k: getattr(args, k) for k in ("rows", "reviews", "teams", "seasons", "players", "seed", "repeat")},
+        "datasets": {},
+        "scripts": {},
+    }
+
+    for name in args.scripts:
+        rel_path, fmt, overrides, probes = SCRIPTS[name]
+        if fmt not in results["datasets"]:
+            results["datasets"][fmt] = ensure_dataset(args, fmt)
+        overrides = {"FILE_PATH": results["datasets"][fmt]["path"], **overrides, **settings.get(name, {})}
+        runs = []
+        for i in range(args.repeat):
+            print(f"Running {name} ({i + 1}/{args.repeat})...")
+            runs.append(run_once(os.path.join(REPO_DIR, rel_path), overrides, probes))
+        summary = summarize(runs)
+        summary.update(script=rel_path, dataset=fmt, overrides=overrides, runs=runs)
+        results["scripts"][name] = summary
+        if summary["status"] == "ok":
+            print(f"✓ {name}: {summary['wall_s']:.2f}s, peak {summary['peak_rss_mb']} MB")
+            for stage in summary["stages"]:
+                print(f"    {stage['name'][:40]:<40} {stage['wall_s']:>8.3f}s  peak {stage['peak_rss_mb']} MB")
+            if summary["unused_overrides"]:
+                print(f"⚠ {name}: overrides not found in the script: {summary['unused_overrides']}")
+        else:
+            print(f"⚠ {name} failed:\n{summary['error']}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {out}")
+
+    failed = [n for n, r in results["scripts"].items() if r["status"] != "ok"]
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        print(f"{len(regressions)} regression(s)" if regressions else "✓ no regressions")
+    sys.exit(1 if failed or regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
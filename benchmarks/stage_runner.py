@@ -0,0 +1,314 @@
+"""
+stage_runner.py
+Runs one task script with per-stage timing and memory. run_benchmarks.py
+starts it in a fresh interpreter for every run, so the peak memory it
+reports is the script's own.
+
+    python stage_runner.py spec.json result.json
+
+spec.json: {"script": path, "overrides": {NAME: value}, "probes": [dotted names]}
+
+Stages are the script's top-level sections, the unindented
+"# ------ NAME ------" header comments, plus its `if __name__ ==
+"__main__":` block: the top-level statements run one by one in one
+namespace, as the script itself would run, and are timed per section.
+`overrides` replace config values (FILE_PATH, USE_DATASET_CACHE, ...)
+right after the statement that assigns them.
+
+Work inside functions (sentiment_analysis.py does everything in main())
+is timed with probes: each dotted name (score_frame, pd.read_csv,
+AnalysisGraph.run, plt.savefig, ...) is wrapped once it exists in the
+script's namespace, and its calls are summed.
+
+Each stage and probe records wall time, CPU time (this process plus the
+worker processes it has waited for), peak RSS sampled every
+RSS_SAMPLE_SECONDS and the RSS change. RSS is read with psutil when
+installed, else from /proc; without either only the process peak
+(getrusage) is reported. Pool workers' memory is not included.
+
+The run's peak is the kernel's high-water mark of this process (VmHWM,
+Linux), else the sampled peak. getrusage's ru_maxrss is only a last
+resort: on Linux it survives fork+exec, so it would include the RSS of
+run_benchmarks.py at the time it started this process.
+"""
+
+import ast
+import builtins
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+
+try:
+    import psutil
+except ImportError:   # optional: /proc or getrusage instead
+    psutil = None
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+RSS_SAMPLE_SECONDS = 0.005
+SECTION_HEADER = re.compile(r"^# *[-=]{3,} *(.+?) *[-=]{3,} *$", re.MULTILINE)
+
+
+def current_rss():
+    """
+    Resident set size of this process in bytes, or None.
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def max_rss(who="self"):
+    """
+    Peak RSS in bytes from getrusage (this process or its waited-for children).
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    return usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def own_peak_rss():
+    """
+    Peak RSS in bytes of this process since its exec (VmHWM), or None.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def cpu_seconds():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class RssSampler:
+    """
+    Background thread tracking the peak RSS of every open window.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.windows = {}   # id(window) -> window; windows may compare equal
+        self.enabled = current_rss() is not None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        if self.enabled:
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = current_rss()
+        with self._lock:
+            for window in self.windows.values():
+                window["peak"] = max(window["peak"], rss)
+        return rss
+
+    def open(self):
+        rss = current_rss() if self.enabled else None
+        window = {"start": rss, "peak": rss}
+        if self.enabled:
+            with self._lock:
+                self.windows[id(window)] = window
+        return window
+
+    def close(self, window):
+        if not self.enabled:
+            return None, None
+        rss = self._sample()
+        with self._lock:
+            del self.windows[id(window)]
+        return window["peak"], rss - window["start"]
+
+    def stop(self):
+        self._stop.set()
+
+
+def _mb(n):
+    return None if n is None else round(n / 1e6, 1)
+
+
+class Stage:
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak = None
+        self.delta = 0
+
+    def add(self, wall, cpu, peak, delta):
+        self.calls += 1
+        self.wall += wall
+        self.cpu += cpu
+        if peak is not None:
+            self.peak = peak if self.peak is None else max(self.peak, peak)
+            self.delta += delta
+
+    def to_dict(self):
+        return {"name": self.name, "kind": self.kind, "calls": self.calls, "wall_s": round(self.wall, 4),
+                "cpu_s": round(self.cpu, 4), "peak_rss_mb": _mb(self.peak),
+                "rss_delta_mb": _mb(self.delta) if self.peak is not None else None}
+
+
+class Timer:
+    def __init__(self, sampler):
+        self.sampler = sampler
+
+    def measure(self, stage, fn, *args, **kwargs):
+        window = self.sampler.open()
+        wall, cpu = time.perf_counter(), cpu_seconds()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            peak, delta = self.sampler.close(window)
+            stage.add(time.perf_counter() - wall, cpu_seconds() - cpu, peak, delta)
+
+
+def _is_main_guard(stmt):
+    return (isinstance(stmt, ast.If) and isinstance(stmt.test, ast.Compare)
+            and isinstance(stmt.test.left, ast.Name) and stmt.test.left.id == "__name__")
+
+
+def split_sections(source, filename="<script>"):
+    """
+    [(name, [top-level statements])] for the sections of `source`; an
+    `if __name__ == "__main__":` block is a section of its own ("__main__").
+    """
+    headers = [(source.count("\n", 0, m.start()) + 1, m.group(1).strip()) for m in SECTION_HEADER.finditer(source)]
+    sections, seen = [], {}
+    for stmt in ast.parse(source, filename).body:
+        name = "__main__" if _is_main_guard(stmt) else \
+            next((n for line, n in reversed(headers) if line <= stmt.lineno), "imports")
+        if not sections or sections[-1][0] != name:
+            seen[name] = seen.get(name, 0) + 1
+            sections.append((name if seen[name] == 1 else f"{name} ({seen[name]})", []))
+        sections[-1][1].append(stmt)
+    return sections
+
+
+def _resolve(namespace, dotted):
+    """
+    (owner, attribute, value) for a dotted name in the script namespace, or None.
+    """
+    parts = dotted.split(".")
+    if parts[0] not in namespace:
+        return None
+    owner, value = namespace, namespace[parts[0]]
+    for part in parts[1:]:
+        if not hasattr(value, part):
+            return None
+        owner, value = value, getattr(value, part)
+    return owner, parts[-1], value
+
+
+def install_probe(namespace, dotted, stage, timer):
+    found = _resolve(namespace, dotted)
+    if found is None or not callable(found[2]):
+        return False
+    owner, attr, func = found
+
+    @functools.wraps(func)
+    def probe(*args, **kwargs):
+        return timer.measure(stage, func, *args, **kwargs)
+
+    if isinstance(owner, dict):
+        owner[attr] = probe
+    else:
+        setattr(owner, attr, probe)
+    return True
+
+
+def run_script(script, overrides=None, probes=()):
+    """
+    Run `script` section by section; returns the result dict (see the module docstring).
+    """
+    script = os.path.abspath(script)
+    with open(script, encoding="utf-8") as f:
+        source = f.read()
+    sampler = RssSampler()
+    timer = Timer(sampler)
+    namespace = {"__name__": "__main__", "__file__": script, "__builtins__": builtins}
+    sys.argv = [script]
+    sys.path.insert(0, os.path.dirname(script))
+    pending_overrides = dict(overrides or {})
+    probe_stages = {name: Stage(name, "probe") for name in probes}
+    installed = set()
+    stages, status, error = [], "ok", None
+    start_wall, start_cpu = time.perf_counter(), cpu_seconds()
+
+    def run_statements(statements):
+        for stmt in statements:
+            exec(compile(ast.Module(body=[stmt], type_ignores=[]), script, "exec"), namespace)
+            # overrides replace a config value right after its assignment
+            for key in [k for k in pending_overrides if k in namespace]:
+                namespace[key] = pending_overrides.pop(key)
+            for probe_name in [p for p in probe_stages if p not in installed]:
+                if install_probe(namespace, probe_name, probe_stages[probe_name], timer):
+                    installed.add(probe_name)
+
+    for name, statements in split_sections(source, script):
+        stage = Stage(name, "section")
+        stages.append(stage)
+        try:
+            timer.measure(stage, run_statements, statements)
+        except SystemExit as e:
+            status = "exit" if e.code in (None, 0) else "error"
+            error = None if status == "exit" else f"SystemExit({e.code!r})"
+            break
+        except BaseException as e:
+            status, error = "error", "".join(traceback.format_exception(type(e), e, e.__traceback__))
+            break
+
+    total = Stage("total", "total")
+    total.calls = 1
+    total.wall, total.cpu = time.perf_counter() - start_wall, cpu_seconds() - start_cpu
+    sampler.stop()
+    section_peaks = [s.peak for s in stages if s.peak is not None]
+    total.peak = own_peak_rss() or (max(section_peaks) if section_peaks else max_rss("self"))
+    return {
+        "script": script,
+        "status": status,
+        "error": error,
+        "total": total.to_dict(),
+        "peak_rss_mb": _mb(total.peak),
+        "children_peak_rss_mb": _mb(max_rss("children")),
+        "stages": [s.to_dict() for s in stages] + [s.to_dict() for s in probe_stages.values() if s.calls],
+        "unused_overrides": sorted(pending_overrides),
+        "unused_probes": sorted(set(probe_stages) - installed),
+    }
+
+
+def main():
+    spec_path, result_path = sys.argv[1:3]
+    with open(spec_path, encoding="utf-8") as f:
+        spec = json.load(f)
+    result = run_script(spec["script"], spec.get("overrides"), spec.get("probes", ()))
+    sys.stdout.flush()
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
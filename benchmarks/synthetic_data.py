@@ -0,0 +1,308 @@
+"""
+synthetic_data.py
+Seeded synthetic datasets for the benchmark suite: IPL matches and
+ball-by-ball deliveries, and product reviews for the sentiment script.
+
+    python synthetic_data.py deliveries deliveries.csv --rows 10000000
+    python synthetic_data.py ipl IPL.csv --rows 1000000 --teams 10 --seasons 18 --players 25
+    python synthetic_data.py matches matches.csv --rows 1000000   # the matches of 1M deliveries
+    python synthetic_data.py reviews reviews.csv --rows 100000
+
+IPL formats (same seed and settings give the same matches in all three):
+- deliveries: classic deliveries.csv columns (match_id, inning, batsman, ...)
+- matches:    classic matches.csv columns (id, season, winner, ...)
+- ipl:        one ball-by-ball file with the match columns repeated on every
+              ball, as in the Kaggle IPL 2008-2025 dataset (batter,
+              runs_batter, match_won_by, ...)
+
+Every match is simulated ball by ball: toss and decision, two innings of
+up to 20 overs that end at the 10th wicket (or once the target is passed),
+batters coming in by batting order, five bowlers per innings rotating by
+over, and the winner taken from the totals (ties go to a super over, about
+1% of matches have no result). Matches are spread evenly over the seasons,
+each season from April onwards. `rows` is the number of deliveries to
+aim for; whole matches are generated, so the count is approximate.
+
+Files are written in blocks of MATCHES_PER_BLOCK matches (about 1M
+deliveries), each from its own seeded generator, so memory stays flat for
+100M-row files and the output does not depend on anything but the
+arguments.
+"""
+
+import argparse
+import csv
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+
+FORMATS = ("deliveries", "matches", "ipl", "reviews")
+MATCHES_PER_BLOCK = 4_000
+REVIEWS_PER_BLOCK = 100_000
+BALLS_PER_INNINGS = 120
+AVG_BALLS_PER_MATCH = 225   # after early finishes; used to size the number of matches
+FIRST_SEASON = 2008
+
+TEAM_NAMES = [
+    "Mumbai Indians", "Chennai Super Kings", "Royal Challengers Bangalore", "Kolkata Knight Riders",
+    "Delhi Capitals", "Sunrisers Hyderabad", "Rajasthan Royals", "Punjab Kings", "Gujarat Titans",
+    "Lucknow Super Giants",
+]
+VENUE_NAMES = [
+    "Wankhede Stadium", "MA Chidambaram Stadium", "M Chinnaswamy Stadium", "Eden Gardens",
+    "Arun Jaitley Stadium", "Rajiv Gandhi International Stadium", "Sawai Mansingh Stadium",
+    "Punjab Cricket Association Stadium", "Narendra Modi Stadium", "Ekana Cricket Stadium",
+    "Brabourne Stadium", "Dr DY Patil Sports Academy", "Himachal Pradesh Cricket Association Stadium",
+    "Barsapara Cricket Stadium",
+]
+BATTER_RUNS = ([0, 1, 2, 3, 4, 6], [0.38, 0.36, 0.08, 0.01, 0.12, 0.05])
+EXTRA_RUNS = ([0, 1, 2, 4, 5], [0.925, 0.06, 0.005, 0.005, 0.005])
+WICKET_PROB = 0.05
+DISMISSALS = (["caught", "bowled", "lbw", "run out", "stumped", "caught and bowled"],
+              [0.6, 0.17, 0.1, 0.08, 0.03, 0.02])
+NO_RESULT_PROB = 0.01
+
+
+def team_names(n_teams):
+    return TEAM_NAMES[:n_teams] + [f"Team {i + 1}" for i in range(len(TEAM_NAMES), n_teams)]
+
+
+def player_names(teams, players_per_team):
+    """
+    (teams x players_per_team) array of unique player names, e.g. "MI Player 07".
+    """
+    names = []
+    for team in teams:
+        abbrev = "".join(word[0] for word in team.split()) if not team.startswith("Team ") else team.replace(" ", "")
+        names.append([f"{abbrev} Player {i + 1:02d}" for i in range(players_per_team)])
+    return np.array(names, dtype=object)
+
+
+class IplGenerator:
+    """
+    Synthetic IPL season data; see the module docstring.
+    """
+
+    def __init__(self, rows=1_000_000, teams=10, seasons=18, players=25, seed=0):
+        if teams < 2:
+            raise ValueError("need at least 2 teams")
+        if players < 11:
+            raise ValueError("need at least 11 players per team")
+        self.rows = rows
+        self.n_matches = max(rows // AVG_BALLS_PER_MATCH, 1)
+        self.seasons = seasons
+        self.seed = seed
+        self.teams = np.array(team_names(teams), dtype=object)
+        self.players = player_names(self.teams, players)
+        self.venues = np.array(VENUE_NAMES + [f"Stadium {i + 1}" for i in range(len(VENUE_NAMES), teams)],
+                               dtype=object)
+
+    def blocks(self):
+        """
+        (matches, deliveries) frames for each block of matches.
+        """
+        for start in range(0, self.n_matches, MATCHES_PER_BLOCK):
+            stop = min(start + MATCHES_PER_BLOCK, self.n_matches)
+            yield self._block(start, stop, np.random.default_rng([self.seed, start]))
+
+    def _block(self, start, stop, rng):
+        n = stop - start
+        n_teams, squad = self.players.shape
+        match_id = np.arange(start + 1, stop + 1)
+
+        # ---- match level ----
+        season_idx = np.arange(start, stop) * self.seasons // self.n_matches
+        per_season = np.bincount(np.arange(self.n_matches) * self.seasons // self.n_matches, minlength=self.seasons)
+        first_of_season = np.concatenate([[0], np.cumsum(per_season)[:-1]])
+        day = (np.arange(start, stop) - first_of_season[season_idx]) * 60 // np.maximum(per_season[season_idx], 1)
+        season = FIRST_SEASON + season_idx
+        date = [(datetime.date(int(y), 4, 1) + datetime.timedelta(days=int(d))).isoformat() for y, d in zip(season, day)]
+        team1 = rng.integers(0, n_teams, n)
+        team2 = (team1 + rng.integers(1, n_teams, n)) % n_teams
+        home = rng.random(n) < 0.8
+        venue = np.where(home, team1 % len(self.venues), rng.integers(0, len(self.venues), n))
+        toss_first = rng.random(n) < 0.5
+        toss_winner = np.where(toss_first, team1, team2)
+        bat_first = rng.random(n) < 0.4
+        toss_decision = np.where(bat_first, "bat", "field")
+        first = np.where(bat_first, toss_winner, np.where(toss_first, team2, team1))
+        second = np.where(first == team1, team2, team1)
+
+        # ---- ball by ball: (match, innings, ball) ----
+        shape = (n, 2, BALLS_PER_INNINGS)
+        batter_runs = rng.choice(BATTER_RUNS[0], shape, p=BATTER_RUNS[1])
+        extra_runs = rng.choice(EXTRA_RUNS[0], shape, p=EXTRA_RUNS[1])
+        wicket = rng.random(shape) < WICKET_PROB
+        batter_runs[wicket] = 0
+        wickets_before = np.cumsum(wicket, axis=2) - wicket
+        alive = wickets_before < 10
+        total = batter_runs + extra_runs
+        first_total = (total[:, 0] * alive[:, 0]).sum(axis=1)
+        # the chase ends on the ball that passes the target
+        runs_before = np.cumsum(total[:, 1], axis=1) - total[:, 1]
+        alive[:, 1] &= runs_before <= first_total[:, None]
+        second_total = (total[:, 1] * alive[:, 1]).sum(axis=1)
+        super_over = rng.random(n) < 0.5
+        winner = np.where(second_total > first_total, second,
+                          np.where(second_total < first_total, first, np.where(super_over, first, second)))
+        no_result = rng.random(n) < NO_RESULT_PROB
+
+        # batting orders: 11 of the squad, in order; the bowlers are the last five of the other side
+        order = np.argsort(rng.random((n, 2, squad)), axis=2)[:, :, :11]
+        batting = np.stack([first, second], axis=1)
+        striker = np.minimum(wickets_before + (rng.random(shape) < 0.45), 10)
+        batter_slot = np.take_along_axis(order, striker, axis=2)
+        over = np.broadcast_to(np.arange(BALLS_PER_INNINGS) // 6, shape)
+        bowler_slot = order[:, ::-1, 6:][np.arange(n)[:, None, None], np.arange(2)[None, :, None], over % 5]
+
+        keep = alive.ravel()
+        m_idx, inn_idx, ball_idx = np.unravel_index(np.flatnonzero(keep), shape)
+        batting_team = batting[m_idx, inn_idx]
+        bowling_team = batting[m_idx, 1 - inn_idx]
+        dismissal = np.full(len(m_idx), None, dtype=object)
+        out = wicket.ravel()[keep]
+        dismissal[out] = rng.choice(DISMISSALS[0], int(out.sum()), p=DISMISSALS[1])
+        names = self.teams
+        deliveries = pd.DataFrame({
+            "match_id": match_id[m_idx],
+            "inning": inn_idx + 1,
+            "batting_team": names[batting_team],
+            "bowling_team": names[bowling_team],
+            "over": ball_idx // 6,
+            "ball": ball_idx % 6 + 1,
+            "batsman": self.players[batting_team, batter_slot.ravel()[keep]],
+            "bowler": self.players[bowling_team, bowler_slot.ravel()[keep]],
+            "batsman_runs": batter_runs.ravel()[keep],
+            "extra_runs": extra_runs.ravel()[keep],
+            "total_runs": total.ravel()[keep],
+            "dismissal_kind": dismissal,
+        })
+        matches = pd.DataFrame({
+            "id": match_id,
+            "season": season,
+            "date": date,
+            "team1": names[team1],
+            "team2": names[team2],
+            "toss_winner": names[toss_winner],
+            "toss_decision": toss_decision,
+            "winner": np.where(no_result, None, names[winner]),
+            "venue": self.venues[venue],
+        })
+        return matches, deliveries
+
+
+def ipl_frame(matches, deliveries):
+    """
+    Kaggle-style combined ball-by-ball frame from one block.
+    """
+    merged = deliveries.merge(matches.rename(columns={"id": "match_id"}), on="match_id", how="left")
+    return pd.DataFrame({
+        "match_id": merged["match_id"],
+        "date": merged["date"],
+        "season": merged["season"],
+        "venue": merged["venue"],
+        "team1": merged["team1"],
+        "team2": merged["team2"],
+        "toss_winner": merged["toss_winner"],
+        "toss_decision": merged["toss_decision"],
+        "match_won_by": merged["winner"],
+        "innings": merged["inning"],
+        "batting_team": merged["batting_team"],
+        "bowling_team": merged["bowling_team"],
+        "over": merged["over"],
+        "ball": merged["ball"],
+        "batter": merged["batsman"],
+        "bowler": merged["bowler"],
+        "runs_batter": merged["batsman_runs"],
+        "runs_extras": merged["extra_runs"],
+        "runs_total": merged["total_runs"],
+        "wicket_kind": merged["dismissal_kind"],
+    })
+
+
+# ---------- reviews ----------
+REVIEW_PARTS = {
+    "positive": (["I love this", "Really happy with this", "Great value:", "Excellent", "Five stars for this"],
+                 ["works perfectly", "is awesome", "exceeded my expectations", "is very good", "is a great buy"]),
+    "negative": (["Worst", "Very disappointed with this", "Do not buy this", "Terrible", "I regret buying this"],
+                 ["stopped working after a week", "is bad", "was a horrible experience", "is poor quality",
+                  "broke on day one"]),
+    "neutral": (["Received the", "This is a", "Bought the", "Using the", "Got this"],
+                ["last month", "as described", "for my office", "in blue", "with the standard charger"]),
+}
+PRODUCTS = ["phone", "laptop", "headphones", "charger", "watch", "camera", "speaker", "keyboard", "tablet", "mouse"]
+TAILS = ["", "", " Battery life is decent.", " Delivery was quick.", " The screen is bright.",
+         " Customer support never replied.", " Would recommend to friends.", " Packaging was damaged."]
+
+
+def review_blocks(rows, seed=0, duplicate_ratio=0.2):
+    """
+    Frames of synthetic reviews (column `review`): positive, negative and
+    neutral template sentences about a product. About `duplicate_ratio` of
+    them repeat an earlier review verbatim, as copy-pasted reviews do.
+    """
+    for start in range(0, rows, REVIEWS_PER_BLOCK):
+        n = min(REVIEWS_PER_BLOCK, rows - start)
+        rng = np.random.default_rng([seed, start, 1])
+        kinds = rng.choice(list(REVIEW_PARTS), n, p=[0.5, 0.3, 0.2])
+        texts = []
+        for kind, a, b, p, t in zip(kinds, rng.integers(0, 5, n), rng.integers(0, 5, n),
+                                    rng.integers(0, len(PRODUCTS), n), rng.integers(0, len(TAILS), n)):
+            openers, endings = REVIEW_PARTS[kind]
+            texts.append(f"{openers[a]} {PRODUCTS[p]}, it {endings[b]}.{TAILS[t]}")
+        texts = np.array(texts, dtype=object)
+        dup = np.flatnonzero(rng.random(n) < duplicate_ratio)
+        dup = dup[dup > 0]
+        texts[dup] = texts[rng.integers(0, dup)]
+        yield pd.DataFrame({"review": texts})
+
+
+# ---------- writing ----------
+def write_csv(blocks, path):
+    """
+    Write frames to one CSV (header from the first). Returns the row count.
+    """
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        for i, frame in enumerate(blocks):
+            frame.to_csv(f, header=i == 0, index=False, quoting=csv.QUOTE_MINIMAL)
+            rows += len(frame)
+    return rows
+
+
+def generate(fmt, path, rows=1_000_000, teams=10, seasons=18, players=25, seed=0):
+    """
+    Write a synthetic dataset in format `fmt` (see FORMATS) to `path`.
+    Returns the number of data rows written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}, got {fmt!r}")
+    if fmt == "reviews":
+        return write_csv(review_blocks(rows, seed), path)
+    gen = IplGenerator(rows, teams, seasons, players, seed)
+    if fmt == "matches":
+        return write_csv((m for m, _ in gen.blocks()), path)
+    if fmt == "deliveries":
+        return write_csv((d for _, d in gen.blocks()), path)
+    return write_csv((ipl_frame(m, d) for m, d in gen.blocks()), path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("format", choices=FORMATS)
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=1_000_000,
+                        help="deliveries to aim for (IPL formats) or reviews")
+    parser.add_argument("--teams", type=int, default=10)
+    parser.add_argument("--seasons", type=int, default=18)
+    parser.add_argument("--players", type=int, default=25, help="squad size per team")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    n = generate(args.format, args.path, args.rows, args.teams, args.seasons, args.players, args.seed)
+    print(f"✓ {n} rows written to {args.path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
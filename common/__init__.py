@@ -0,0 +1,4 @@
+"""
+Shared helpers for the IPL scripts (Task2_EDA, Task3_DataVisualization);
+instrumentation.py is used by all four task scripts.
+"""
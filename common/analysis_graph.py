@@ -0,0 +1,322 @@
+"""
+analysis_graph.py
+Memoized analysis graph shared by the IPL scripts.
+
+Each result a script needs (wins per team, matches per season, runs per
+batsman, null masks, ...) is declared as a node: a function, the nodes it
+takes as inputs and the keyword parameters it is called with. Sources -
+the loaded frame - are given a fingerprint by the caller, normally
+file_fingerprint() of the CSV they were read from:
+
+    graph = AnalysisGraph()
+    graph.source("data", df, file_fingerprint(FILE_PATH))
+    graph.add("wins", category_counts, "data", col="winner")
+    results = graph.run()
+
+The fingerprint of a node hashes the source of its function's module, its
+parameters and the fingerprints of its inputs, together with the source of
+the whole common/ package (the loader and helpers the node's function
+calls, and the dtypes the source frame was loaded with) and the pandas and
+numpy versions. Parameters must therefore
+name every column a node reads (a source fingerprint identifies the file,
+not which of its columns were loaded), so ipl_eda.py and
+ipl_visualization.py get the same fingerprint for the same aggregate of
+the same file even though they load different columns.
+
+run() computes each needed node once - nodes with equal fingerprints are
+computed once between them - in dependency order, with the nodes whose
+inputs are ready running concurrently in a thread pool (threads share the
+frame without pickling it, and pandas' grouping and reduction kernels
+release the GIL for much of their work). With cache=True a node's result
+is pickled in .ipl_cache/analysis/ under its fingerprint, so an aggregate
+is computed once across runs and across the two scripts until the CSV or
+the code behind it changes. Nodes that return full-length frames or masks
+should use cache=False.
+"""
+
+import glob
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from common.dataset_cache import DEFAULT_CACHE_DIR
+from common.instrumentation import stage
+
+DEFAULT_ANALYSIS_DIR = os.path.join(DEFAULT_CACHE_DIR, "analysis")
+FORMAT_VERSION = 1
+# cached results kept per function and parameters (one per version of the CSV)
+KEEP_ENTRIES = 4
+
+
+def _digest(obj):
+    return hashlib.blake2b(repr(obj).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def file_fingerprint(path):
+    """
+    Fingerprint of a source read from `path` (its path, size and mtime).
+    """
+    st = os.stat(path)
+    return _digest(("file", os.path.abspath(path), st.st_size, st.st_mtime_ns))
+
+
+_module_digests = {}
+_environment = []
+
+
+def _environment_digest():
+    # common/ sources and library versions every node's result depends on
+    if not _environment:
+        sources = []
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+            with open(path, "rb") as f:
+                sources.append((os.path.basename(path), hashlib.blake2b(f.read(), digest_size=16).hexdigest()))
+        _environment.append(_digest((sources, pd.__version__, np.__version__)))
+    return _environment[0]
+
+
+def _code_digest(func):
+    module = sys.modules.get(func.__module__)
+    if module not in _module_digests:
+        try:
+            source = inspect.getsource(module)
+        except (OSError, TypeError):   # no source file (interactive session)
+            source = None
+        _module_digests[module] = _digest(source) if source is not None else None
+    code = _module_digests[module]
+    if code is None:
+        code = hashlib.blake2b(func.__code__.co_code, digest_size=16).hexdigest()
+    return f"{func.__module__}.{func.__qualname__}", code
+
+
+class Node:
+    def __init__(self, name, func, inputs, params, cache):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.params = params
+        self.cache = cache
+
+
+class AnalysisGraph:
+    """
+    Nodes and sources by name; see the module docstring. workers=None uses
+    all cores, workers=1 runs every node in this thread. use_cache=False
+    keeps results in memory only.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_ANALYSIS_DIR, workers=None, use_cache=True):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.use_cache = use_cache
+        self.nodes = {}
+        self.values = {}
+        self.errors = {}            # node -> exception, when run(raise_errors=False)
+        self.computed = []          # nodes computed by run()
+        self.loaded = []            # nodes read from the disk cache
+        self._fingerprints = {}
+
+    def source(self, name, value, fingerprint=None):
+        """
+        Add an input value. With fingerprint=None, nodes that depend on it
+        are neither cached nor deduplicated.
+        """
+        if name in self.nodes or name in self.values:
+            raise ValueError(f"duplicate graph name: {name}")
+        self.values[name] = value
+        self._fingerprints[name] = fingerprint
+        return name
+
+    def add(self, name, func, *inputs, cache=True, **params):
+        """
+        Add node `name` = func(*input values, **params).
+        """
+        if name in self.nodes or name in self.values:
+            raise ValueError(f"duplicate graph name: {name}")
+        for dep in inputs:
+            if dep not in self.nodes and dep not in self.values:
+                raise KeyError(f"{name}: unknown input {dep!r}")
+        self.nodes[name] = Node(name, func, inputs, params, cache)
+        return name
+
+    def __contains__(self, name):
+        return name in self.nodes or name in self.values
+
+    # ---------- fingerprints ----------
+    def fingerprint(self, name):
+        if name not in self._fingerprints:
+            node = self.nodes[name]
+            inputs = [self.fingerprint(dep) for dep in node.inputs]
+            if any(fp is None for fp in inputs):
+                self._fingerprints[name] = None
+            else:
+                params = sorted(node.params.items())
+                self._fingerprints[name] = _digest((FORMAT_VERSION, _environment_digest(), _code_digest(node.func),
+                                                       params, inputs))
+        return self._fingerprints[name]
+
+    def _cache_path(self, node):
+        label, _ = _code_digest(node.func)
+        params = _digest(sorted(node.params.items()))[:8]
+        return os.path.join(self.cache_dir, f"{label}-{params}-{self.fingerprint(node.name)}.pkl")
+
+    # ---------- disk cache ----------
+    def _load(self, node):
+        path = self._cache_path(node)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return False, None
+        os.utime(path)   # most recently used; see _prune()
+        return True, value
+
+    def _store(self, node, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(node)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:   # unpicklable result: keep it in memory only
+            print(f"⚠ analysis result {node.name} not cached: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        os.replace(tmp, path)
+        self._prune(path)
+
+    def _prune(self, path):
+        prefix = os.path.basename(path).rsplit("-", 1)[0] + "-"
+        entries = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir)
+                   if f.startswith(prefix) and f.endswith(".pkl")]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for old in entries[KEEP_ENTRIES:]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    # ---------- run ----------
+    def _needed(self, targets):
+        needed, stack = [], list(targets)
+        while stack:
+            name = stack.pop()
+            if name in needed or name in self.values or name in self.errors:
+                continue
+            if name not in self.nodes:
+                raise KeyError(f"unknown graph node: {name}")
+            needed.append(name)
+            stack.extend(self.nodes[name].inputs)
+        return needed
+
+    def _call(self, node):
+        inputs = [self.values[dep] for dep in node.inputs]
+        with stage(f"node {node.name}") as st:
+            if inputs and hasattr(inputs[0], "shape"):
+                st.rows = inputs[0].shape[0]
+            return node.func(*inputs, **node.params)
+
+    def run(self, targets=None, raise_errors=True):
+        """
+        Compute `targets` (default: every node) and what they depend on;
+        returns {name: value} for the targets - and, by default, the
+        sources - that could be computed. With
+        raise_errors=False a failing node is recorded in self.errors and the
+        nodes depending on it are skipped instead of raising.
+        """
+        targets = list(dict.fromkeys([*self.values, *self.nodes])) if targets is None else list(targets)
+        pending = set(self._needed(targets))
+        by_fingerprint = {}   # fingerprint -> first node started with it
+        duplicates = {}       # node -> node with the same fingerprint
+        workers = self.workers or os.cpu_count() or 1
+        pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        running = {}
+
+        def settle(name, value=None, error=None):
+            if error is None:
+                self.values[name] = value
+            else:
+                self.errors[name] = error
+            for dup in [d for d, orig in duplicates.items() if orig == name]:
+                del duplicates[dup]
+                settle(dup, value, error)
+
+        try:
+            while pending or running:
+                for name in sorted(pending):
+                    node = self.nodes[name]
+                    if any(dep in self.errors for dep in node.inputs):
+                        pending.discard(name)
+                        settle(name, error=self.errors[next(d for d in node.inputs if d in self.errors)])
+                        continue
+                    if not all(dep in self.values for dep in node.inputs):
+                        continue
+                    pending.discard(name)
+                    fp = self.fingerprint(name)
+                    if fp is not None and fp in by_fingerprint:
+                        orig = by_fingerprint[fp]
+                        if orig in self.values or orig in self.errors:
+                            settle(name, self.values.get(orig), self.errors.get(orig))
+                        else:
+                            duplicates[name] = orig
+                        continue
+                    if fp is not None:
+                        by_fingerprint[fp] = name
+                    if node.cache and self.use_cache and fp is not None:
+                        hit, value = self._load(node)
+                        if hit:
+                            self.loaded.append(name)
+                            settle(name, value)
+                            continue
+                    if pool is None:
+                        try:
+                            value = self._call(node)
+                        except Exception as e:
+                            if raise_errors:
+                                raise
+                            settle(name, error=e)
+                            continue
+                        self._finish(node, value)
+                        settle(name, value)
+                    else:
+                        running[pool.submit(self._call, node)] = node
+                if not running:   # nodes settled in this pass may have made others ready
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        if raise_errors:
+                            raise error
+                        settle(node.name, error=error)
+                    else:
+                        self._finish(node, future.result())
+                        settle(node.name, future.result())
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+        return {name: self.values[name] for name in targets if name in self.values}
+
+    def _finish(self, node, value):
+        self.computed.append(node.name)
+        if node.cache and self.use_cache and self.fingerprint(node.name) is not None:
+            self._store(node, value)
+
+    def __getitem__(self, name):
+        """
+        Value of a source or node, computing it if needed (re-raises the
+        error of a node that failed in run(raise_errors=False)).
+        """
+        if name in self.errors:
+            raise self.errors[name]
+        if name not in self.values:
+            self.run([name])
+        return self.values[name]
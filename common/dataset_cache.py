@@ -0,0 +1,175 @@
+"""
+dataset_cache.py
+Columnar binary cache of parsed IPL CSVs, shared by the EDA and
+visualization scripts.
+
+The first load of a CSV stores the lean, typed frame (categoricals,
+downcast integers) as an uncompressed Feather (Arrow IPC) file. Later
+loads memory-map that file and read only the requested columns, so no CSV
+parsing happens at all and numeric columns come straight from the mapped
+pages. A load of some columns stores only those; a later load that needs
+columns the entry lacks is a miss, and the loader rebuilds the entry with
+the union of both.
+
+Each entry is keyed by the CSV's absolute path and validated against its
+size, mtime and a content hash stored in a small JSON manifest:
+- size and mtime unchanged: cache hit, no hashing
+- mtime changed but same content hash (file touched/copied): hit, manifest updated
+- anything else: the entry is rebuilt from the CSV
+"""
+
+import hashlib
+import json
+import os
+
+try:
+    import pyarrow.feather as feather
+except ImportError:   # optional: without pyarrow every load parses the CSV
+    feather = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".ipl_cache")
+FORMAT_VERSION = 2
+SAMPLE_BLOCKS = 16
+BLOCK_BYTES = 1 << 16
+
+
+def file_hash(path, block_size=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def prefix_fingerprint(path, end, blocks=SAMPLE_BLOCKS, block_bytes=BLOCK_BYTES):
+    """
+    Hash of the first `end` bytes of `path`, from evenly spaced blocks plus
+    the block right before `end` (cheap even for multi-GB files). Used to
+    tell a file that only grew by appended rows from a rewritten one.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    starts = {min(end * i // blocks, max(end - block_bytes, 0)) for i in range(blocks)}
+    starts.add(max(end - block_bytes, 0))
+    with open(path, "rb") as f:
+        for start in sorted(starts):
+            f.seek(start)
+            h.update(f.read(min(block_bytes, end - start)))
+    return h.hexdigest()
+
+
+def ends_with_newline(path, end):
+    if end == 0:
+        return False
+    with open(path, "rb") as f:
+        f.seek(end - 1)
+        return f.read(1) == b"\n"
+
+
+class DatasetCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.enabled = feather is not None
+        if not self.enabled:
+            print("⚠ pyarrow not installed; dataset cache disabled (pip install pyarrow)")
+
+    def _paths(self, source):
+        key = hashlib.blake2b(os.path.abspath(source).encode("utf-8"), digest_size=8).hexdigest()
+        base = os.path.join(self.cache_dir, f"{os.path.splitext(os.path.basename(source))[0]}-{key}")
+        return base + ".feather", base + ".json"
+
+    def _read_manifest(self, manifest_path):
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest_path, manifest):
+        tmp = manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, manifest_path)
+
+    def _fresh_manifest(self, source):
+        # manifest of the entry for `source` if it matches the CSV on disk
+        if not self.enabled:
+            return None
+        data_path, manifest_path = self._paths(source)
+        manifest = self._read_manifest(manifest_path)
+        if manifest is None or manifest.get("version") != FORMAT_VERSION or not os.path.exists(data_path):
+            return None
+        st = os.stat(source)
+        if st.st_size != manifest["size"]:
+            return None
+        if st.st_mtime_ns == manifest["mtime_ns"]:
+            return manifest
+        if file_hash(source) != manifest["hash"]:
+            return None
+        manifest["mtime_ns"] = st.st_mtime_ns
+        self._write_manifest(manifest_path, manifest)
+        return manifest
+
+    def is_fresh(self, source):
+        """
+        True if the cached entry for `source` matches the CSV on disk.
+        """
+        return self._fresh_manifest(source) is not None
+
+    def cached_columns(self, source):
+        """
+        Columns of the fresh entry for `source` ([] if there is none).
+        """
+        manifest = self._fresh_manifest(source)
+        return manifest["columns"] if manifest is not None else []
+
+    def load(self, source, columns=None):
+        """
+        Cached frame for `source` (only `columns`, if given), or None when
+        there is no fresh entry or it lacks some of the columns.
+        """
+        manifest = self._fresh_manifest(source)
+        if manifest is None:
+            return None
+        if columns is None and not manifest["complete"]:
+            return None
+        if columns is not None and not manifest["complete"] and not set(columns) <= set(manifest["columns"]):
+            return None
+        data_path, _ = self._paths(source)
+        table = feather.read_table(data_path, memory_map=True)   # mapped, nothing read yet
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        return table.to_pandas(split_blocks=True)
+
+    def store(self, source, df, complete=True):
+        """
+        Write `df` as the cache entry for `source`; complete=False when it
+        holds only some of the CSV's columns. Returns False (and leaves no
+        entry) if the frame cannot be stored as Arrow.
+        """
+        if not self.enabled:
+            return False
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, manifest_path = self._paths(source)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)   # never pair a new data file with an old manifest
+        st = os.stat(source)
+        tmp = data_path + ".tmp"
+        try:
+            feather.write_feather(df.reset_index(drop=True), tmp, compression="uncompressed")
+        except Exception as e:   # e.g. object columns with mixed types
+            print(f"⚠ dataset cache not written: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+        os.replace(tmp, data_path)
+        self._write_manifest(manifest_path, {
+            "version": FORMAT_VERSION,
+            "source": os.path.abspath(source),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "hash": file_hash(source),
+            "rows": int(len(df)),
+            "columns": list(map(str, df.columns)),
+            "complete": complete,
+        })
+        return True
@@ -0,0 +1,391 @@
+"""
+instrumentation.py
+Per-stage timing and memory trace for the task scripts.
+
+    configure("ipl_eda", OUTPUT_DIR, enabled=TRACE)
+    section("load")                      # flat scripts: runs until the next section()
+    df = load(...)
+    add_rows(len(df))
+    with stage("write results") as st:   # nested stages, from any thread
+        ...
+        st.rows = len(df)
+    table = finish()                     # None when tracing is off
+
+Tracing is off unless the script's TRACE flag is set or the TASK_TRACE
+environment variable is ("1", or the path of the trace file to write).
+When off, section(), stage() and add_rows() return right away (stage()
+hands back one shared no-op context manager), so the instrumented code
+pays a function call per stage.
+
+When on, every finished stage is appended to trace.jsonl in the output
+directory as one JSON line: script, run id, name, parent stage, thread,
+start offset, wall time, CPU time, rows processed, memory and extra fields
+(the URL of a fetch, ...). CPU time is the process's for stages on the
+main thread, so it includes the worker threads of pandas and pyarrow, and
+the thread's own for stages on other threads. Memory is the peak RSS
+during the stage and its change, sampled every RSS_SAMPLE_SECONDS by a
+background thread, or with memory="tracemalloc" (TASK_TRACE_MEMORY) the
+peak and change of the allocations tracemalloc sees, numpy buffers
+included; exact, but it slows allocation-heavy code down.
+
+finish() - also run at exit - closes the open sections, appends a summary
+line per stage name (calls, total wall/CPU time, rows, peak memory),
+prints it as a table and returns it for the script's summary.json. The
+trace file is appended to, so nightly runs can be compared by run id.
+"""
+
+import atexit
+import datetime
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+try:
+    import psutil
+except ImportError:   # optional: /proc or no RSS
+    psutil = None
+
+TRACE_ENV = "TASK_TRACE"
+MEMORY_ENV = "TASK_TRACE_MEMORY"
+TRACE_FILE = "trace.jsonl"
+MEMORY_MODES = ("rss", "tracemalloc")
+RSS_SAMPLE_SECONDS = 0.005
+
+_tracer = None
+
+
+def current_rss():
+    """
+    Resident set size of this process in bytes, or None.
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _mb(n):
+    return None if n is None else round(n / 1e6, 2)
+
+
+# ---------- memory meters ----------
+class _RssMeter:
+    """
+    Background thread tracking the peak RSS of every open stage.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.enabled = current_rss() is not None
+        self.windows = {}   # id(window) -> window; windows may compare equal
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if self.enabled:
+            threading.Thread(target=self._run, args=(interval,), daemon=True).start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            self._sample()
+
+    def _sample(self):
+        rss = current_rss()
+        with self._lock:
+            for window in self.windows.values():
+                window["peak"] = max(window["peak"], rss)
+        return rss
+
+    def open(self):
+        if not self.enabled:
+            return None
+        rss = current_rss()
+        window = {"start": rss, "peak": rss}
+        with self._lock:
+            self.windows[id(window)] = window
+        return window
+
+    def close(self, window):
+        if window is None:
+            return None, None
+        rss = self._sample()
+        with self._lock:
+            del self.windows[id(window)]
+        return window["peak"], rss - window["start"]
+
+    def stop(self):
+        self._stop.set()
+
+
+class _TracemallocMeter:
+    """
+    Peak traced memory of every open stage. tracemalloc keeps one global
+    peak, so it is folded into the open stages and reset whenever a stage
+    opens or closes.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.windows = {}
+        self._lock = threading.Lock()
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+
+    def _fold(self):
+        current, peak = tracemalloc.get_traced_memory()
+        for window in self.windows.values():
+            window["peak"] = max(window["peak"], peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def open(self):
+        with self._lock:
+            current = self._fold()
+            window = {"start": current, "peak": current}
+            self.windows[id(window)] = window
+        return window
+
+    def close(self, window):
+        with self._lock:
+            current = self._fold()
+            del self.windows[id(window)]
+        return window["peak"], current - window["start"]
+
+    def stop(self):
+        if self._started:
+            tracemalloc.stop()
+
+
+# ---------- stages ----------
+class _NullStage:
+    """
+    The stage handed out when tracing is off: one shared instance that
+    ignores everything.
+    """
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    def __init__(self, tracer, name, rows=None, fields=None):
+        self.tracer = tracer
+        self.name = name
+        self.rows = rows
+        self.fields = fields or {}
+        self.parent = None
+
+    def set(self, **fields):
+        """
+        Add fields to the stage's trace line.
+        """
+        self.fields.update(fields)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self._main = threading.current_thread() is threading.main_thread()
+        self._window = self.tracer.meter.open()
+        self._start = time.perf_counter()
+        self._cpu = time.process_time() if self._main else time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._start
+        cpu = (time.process_time() if self._main else time.thread_time()) - self._cpu
+        peak, delta = self.tracer.meter.close(self._window)
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.tracer.emit(self.name, self._start, wall, cpu, self.rows, peak, delta, self.parent,
+                         error=exc_type.__name__ if exc_type else None, **self.fields)
+        return False
+
+
+class Tracer:
+    """
+    Writes the trace of one script run; see the module docstring.
+    """
+
+    def __init__(self, script, path, memory="rss"):
+        if memory not in MEMORY_MODES:
+            raise ValueError(f"trace memory mode must be one of {MEMORY_MODES}, got {memory!r}")
+        self.script = script
+        self.path = path
+        self.memory = memory
+        self.run_id = f"{datetime.datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+        self.records = []
+        self.sections = []   # open section() stages, outermost first
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self.meter = _TracemallocMeter() if memory == "tracemalloc" else _RssMeter()
+        self._write({"event": "start", "script": script, "run": self.run_id,
+                     "time": datetime.datetime.now().isoformat(timespec="seconds"), "pid": os.getpid(),
+                     "memory": memory if self.meter.enabled else None})
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _write(self, line):
+        with self._lock:
+            self._file.write(json.dumps(line, default=str) + "\n")
+            self._file.flush()
+
+    def stage(self, name, rows=None, **fields):
+        return Stage(self, name, rows, fields)
+
+    def emit(self, name, start, wall, cpu, rows=None, peak=None, delta=None, parent=None, **fields):
+        record = {"event": "stage", "script": self.script, "run": self.run_id, "name": name, "parent": parent,
+                  "thread": threading.current_thread().name, "start_s": round(start - self._t0, 6),
+                  "wall_s": round(wall, 6), "cpu_s": None if cpu is None else round(cpu, 6), "rows": rows,
+                  "peak_mb": _mb(peak), "delta_mb": _mb(delta), **fields}
+        with self._lock:
+            self.records.append(record)
+        self._write(record)
+
+    def summary(self):
+        """
+        One row per stage name, in order of first appearance.
+        """
+        table = {}
+        for r in self.records:
+            row = table.setdefault(r["name"], {"stage": r["name"], "calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                               "rows": None, "peak_mb": None, "errors": 0})
+            row["calls"] += 1
+            row["wall_s"] += r["wall_s"]
+            row["cpu_s"] += r["cpu_s"] or 0.0
+            if r["rows"] is not None:
+                row["rows"] = (row["rows"] or 0) + r["rows"]
+            if r["peak_mb"] is not None:
+                row["peak_mb"] = max(row["peak_mb"] or 0.0, r["peak_mb"])
+            row["errors"] += r.get("error") is not None
+        for row in table.values():
+            row["wall_s"], row["cpu_s"] = round(row["wall_s"], 4), round(row["cpu_s"], 4)
+        return list(table.values())
+
+    def close(self):
+        while self.sections:
+            self.sections.pop().__exit__(None, None, None)
+        table = self.summary()
+        self._write({"event": "summary", "script": self.script, "run": self.run_id,
+                     "wall_s": round(time.perf_counter() - self._t0, 4), "stages": table})
+        self.meter.stop()
+        self._file.close()
+        return table
+
+
+def print_table(table, path=None):
+    print(f"\n⏱ Stage timings{f' (trace: {path})' if path else ''}")
+    print(f"{'stage':<40} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'rows':>11} {'peak MB':>9}")
+    for row in table:
+        rows = "" if row["rows"] is None else row["rows"]
+        peak = "" if row["peak_mb"] is None else f"{row['peak_mb']:.1f}"
+        print(f"{row['stage'][:40]:<40} {row['calls']:>6} {row['wall_s']:>9.3f} {row['cpu_s']:>9.3f} "
+              f"{rows:>11} {peak:>9}")
+
+
+# ---------- module-level interface ----------
+def configure(script, output_dir=".", enabled=False, memory=None):
+    """
+    Start tracing for this run when `enabled` or TASK_TRACE is set; returns
+    the Tracer, or None when tracing is off.
+    """
+    global _tracer
+    env = os.environ.get(TRACE_ENV, "").strip()
+    if not enabled and env.lower() in ("", "0", "false", "no", "off"):
+        return None
+    if _tracer is not None:
+        finish()
+    path = env if env and env.lower() not in ("1", "true", "yes", "on") else os.path.join(output_dir, TRACE_FILE)
+    _tracer = Tracer(script, path, memory or os.environ.get(MEMORY_ENV) or "rss")
+    return _tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def stage(name, rows=None, **fields):
+    """
+    Context manager timing one stage (a shared no-op when tracing is off).
+    Set `.rows` or call `.set(field=...)` on it to add to its trace line.
+    """
+    if _tracer is None:
+        return _NULL_STAGE
+    return _tracer.stage(name, rows, **fields)
+
+
+def section(name, rows=None, **fields):
+    """
+    Start a top-level stage of a flat script; it ends at the next section()
+    call or at finish().
+    """
+    if _tracer is None:
+        return
+    while _tracer.sections:
+        _tracer.sections.pop().__exit__(None, None, None)
+    st = _tracer.stage(name, rows, **fields)
+    _tracer.sections.append(st.__enter__())
+
+
+def add_rows(n):
+    """
+    Count `n` rows as processed by the innermost open stage of this thread.
+    """
+    if _tracer is None:
+        return
+    stack = _tracer._stack()
+    if stack:
+        stack[-1].rows = (stack[-1].rows or 0) + int(n)
+
+
+def record(name, wall_s, cpu_s=None, rows=None, **fields):
+    """
+    Add a stage timed elsewhere (in a worker process, say) to the trace.
+    """
+    if _tracer is None:
+        return
+    stack = _tracer._stack()
+    _tracer.emit(name, time.perf_counter() - wall_s, wall_s, cpu_s, rows,
+                 parent=stack[-1].name if stack else None, **fields)
+
+
+def finish(show=True):
+    """
+    Close the trace; prints and returns the summary table (None when
+    tracing is off).
+    """
+    global _tracer
+    if _tracer is None:
+        return None
+    tracer, _tracer = _tracer, None
+    table = tracer.close()
+    if show:
+        print_table(table, tracer.path)
+    return table
+
+
+atexit.register(finish)
@@ -0,0 +1,200 @@
+"""
+ipl_loader.py
+Schema-driven lean loading of IPL CSVs (matches or ball-by-ball deliveries).
+
+The header is read first, column roles are resolved through the aliases the
+visualization script already used (pick_column), and only the requested
+columns are parsed. Low-cardinality text columns (teams, venues, players,
+dismissal kinds, ...) are read as categoricals and integer columns are
+downcast to the smallest integer type that holds their values. Team columns
+share one category set so they can still be compared with each other.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# role -> candidate column names (case-insensitive, first match wins)
+COLUMN_ALIASES = {
+    "match_id": ["match_id", "id", "matchid", "matchId"],
+    "season": ["season", "year", "Year"],
+    "date": ["date"],
+    "team1": ["team1"],
+    "team2": ["team2"],
+    "winner": ["winner", "match_won_by", "match_winner", "win_team", "team_won"],
+    "toss_winner": ["toss_winner", "tosswinner"],
+    "toss_decision": ["toss_decision", "tossdecision", "toss_decision "],
+    "venue": ["venue", "stadium", "ground"],
+    "batting_team": ["batting_team"],
+    "bowling_team": ["bowling_team"],
+    "inning": ["inning", "innings"],
+    "batsman": ["batsman", "batter", "player"],
+    "bowler": ["bowler"],
+    "batsman_runs": ["batsman_runs", "batter_runs", "runs_batter", "runs_batsman", "batsmanrun", "batsman_run"],
+    "extra_runs": ["extra_runs", "runs_extras", "extras"],
+    "total_runs": ["runs_total", "total_runs", "runs", "runs_total "],
+    "dismissal_kind": ["dismissal_kind", "wicket_kind"],
+    "player_out": ["player_out", "player_dismissed"],
+}
+
+# Roles holding team names; they get one shared category set
+TEAM_ROLES = ("team1", "team2", "winner", "toss_winner", "batting_team", "bowling_team")
+
+SAMPLE_ROWS = 50_000
+CATEGORY_MAX_RATIO = 0.5   # text columns with unique/non-null <= this become categoricals
+
+
+def pick_column(df, candidates):
+    """
+    Given a list of candidate column names (case-insensitive),
+    return the first one that exists in df.columns, or None.
+    """
+    cols_lc = {c.lower(): c for c in df.columns}
+    for cand in candidates:
+        if cand and cand.lower() in cols_lc:
+            return cols_lc[cand.lower()]
+    return None
+
+
+def read_header(path, **read_kwargs):
+    """
+    Column names only, as an empty DataFrame (works with pick_column).
+    """
+    return pd.read_csv(path, nrows=0, **read_kwargs)
+
+
+def resolve_columns(header, roles=None):
+    """
+    Map each role (default: all of COLUMN_ALIASES) to its column in the file, or None.
+    """
+    roles = roles or COLUMN_ALIASES
+    return {role: pick_column(header, COLUMN_ALIASES[role]) for role in roles}
+
+
+def plan_dtypes(path, usecols=None, sample_rows=SAMPLE_ROWS, **read_kwargs):
+    """
+    Read a sample and choose read_csv dtypes: 'category' for low-cardinality
+    text columns (except the date column, which the scripts parse themselves).
+    Numeric columns keep the parser's choice and are downcast after loading
+    (a sample cannot prove a column has no missing values).
+    Returns (dtypes, default bytes per row of each column) - the latter from
+    the sample with pandas' default dtypes, for the memory report.
+    """
+    sample = pd.read_csv(path, usecols=usecols, nrows=sample_rows, **read_kwargs)
+    date_col = pick_column(sample, COLUMN_ALIASES["date"])
+    dtypes = {}
+    for col in sample.columns:
+        s = sample[col]
+        if col == date_col:
+            continue
+        if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+            non_null = s.notna().sum()
+            if non_null and s.nunique() / non_null <= CATEGORY_MAX_RATIO:
+                dtypes[col] = "category"
+    per_row = sample.memory_usage(deep=True, index=False) / max(len(sample), 1)
+    return dtypes, per_row
+
+
+def downcast_integers(df):
+    """
+    Downcast int64 columns in place to the smallest integer type holding their values.
+    """
+    for col in df.columns:
+        if pd.api.types.is_integer_dtype(df[col]) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def unify_categories(df, columns):
+    """
+    Give categorical columns one shared category set (needed to compare, e.g.,
+    toss_winner == winner).
+    """
+    columns = [c for c in columns if c in df.columns and isinstance(df[c].dtype, pd.CategoricalDtype)]
+    if len(columns) < 2:
+        return df
+    categories = pd.Index(sorted(set().union(*(df[c].cat.categories for c in columns)), key=str))
+    for c in columns:
+        df[c] = df[c].cat.set_categories(categories)
+    return df
+
+
+def value_counts(s):
+    """
+    s.value_counts(), ordered as for a plain object column (ties in order of
+    first appearance; categoricals would put them in category order).
+    """
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        return s.value_counts()
+    codes = s.cat.codes.to_numpy()
+    codes = codes[codes >= 0]
+    first = pd.unique(codes)
+    counts = np.bincount(codes, minlength=len(s.cat.categories))
+    result = pd.Series(counts[first], index=pd.Index(s.cat.categories[first], name=s.name), name="count")
+    return result.sort_values(ascending=False, kind="stable")
+
+
+def uncategorize(obj):
+    """
+    Plain object labels for small result tables before plotting: seaborn draws
+    every category of a categorical axis, not just the rows passed in.
+    """
+    if isinstance(obj, pd.DataFrame):
+        obj = obj.copy()
+        for col in obj.columns:
+            if isinstance(obj[col].dtype, pd.CategoricalDtype):
+                obj[col] = obj[col].astype(object)
+    if isinstance(obj.index, pd.CategoricalIndex):
+        obj = obj.copy()
+        obj.index = obj.index.astype(object)
+    return obj
+
+
+def load_ipl_csv(path, usecols=None, verbose=True, cache=None, **read_kwargs):
+    """
+    Lean read of an IPL CSV: only `usecols` (None = all columns), categoricals
+    for names, downcast integers, shared categories for team columns.
+    With a DatasetCache, a fresh cached copy is memory-mapped instead of
+    parsing the CSV; on a miss `usecols` plus the columns the entry already
+    had are parsed and cached, so both scripts can reuse it.
+    Prints memory of the returned columns with default dtypes (estimated
+    from the sample) vs lean.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"CSV file not found: {path}\nPlease put the correct path in FILE_PATH.")
+    if usecols is not None:
+        usecols = list(dict.fromkeys(c for c in usecols if c is not None))
+
+    if cache is not None:
+        df = cache.load(path, usecols)
+        if df is not None:
+            roles = resolve_columns(df)
+            unify_categories(df, [roles[r] for r in TEAM_ROLES])
+            if verbose:
+                print(f"Loaded {len(df)} rows x {df.shape[1]} columns from dataset cache "
+                      f"({df.memory_usage(deep=True, index=False).sum() / 1e6:.1f} MB)")
+            return df
+
+    read_cols = usecols
+    if cache is not None and usecols is not None:
+        read_cols = usecols + [c for c in cache.cached_columns(path) if c not in usecols]
+    dtypes, per_row = plan_dtypes(path, read_cols, **read_kwargs)
+    df = pd.read_csv(path, usecols=read_cols, dtype=dtypes, **read_kwargs)
+    downcast_integers(df)
+    roles = resolve_columns(df)
+    unify_categories(df, [roles[r] for r in TEAM_ROLES])
+    if cache is not None:
+        cache.store(path, df, complete=usecols is None)
+    if len(read_cols or ()) != len(usecols or ()):
+        df = df[[c for c in df.columns if c in usecols]]
+
+    if verbose:
+        lean = df.memory_usage(deep=True, index=False).sum()
+        default = per_row.reindex(df.columns, fill_value=0).sum() * len(df)
+        categorical = sum(c in dtypes for c in df.columns)
+        print(f"Loaded {len(df)} rows x {df.shape[1]} columns "
+              f"({categorical} categorical, integers downcast)")
+        print(f"Memory: {default / 1e6:.1f} MB with default dtypes (est.) -> {lean / 1e6:.1f} MB "
+              f"({default / max(lean, 1):.1f}x smaller)")
+    return df
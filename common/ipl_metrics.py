@@ -0,0 +1,109 @@
+"""
+ipl_metrics.py
+Node functions for the analysis graph (analysis_graph.py) of the IPL
+scripts. Both ipl_eda.py and ipl_visualization.py build their shared
+aggregates (wins per team, matches per season, runs per batsman) from
+these functions, so the two scripts share their cached results.
+
+Every function names the columns it reads in its parameters; the ones
+that read the whole frame take the frame's `columns`.
+"""
+
+import pandas as pd
+
+from common.ipl_loader import uncategorize, value_counts
+
+
+def category_counts(df, col):
+    """
+    Rows per value of `col`, most frequent first (ipl_loader.value_counts).
+    """
+    return value_counts(df[col])
+
+
+def group_sizes(df, col):
+    """
+    Rows per value of `col`, sorted by value, with missing values as a last
+    group (callers that want them drop that row).
+    """
+    return uncategorize(df.groupby(col, observed=True, dropna=False).size().reset_index(name='matches'))
+
+
+def runs_by_player(df, player_col, runs_col):
+    """
+    Total `runs_col` per `player_col`, highest first (labels still
+    categorical: uncategorize() the rows that are kept).
+    """
+    return df.groupby(player_col, observed=True)[runs_col].sum().sort_values(ascending=False)
+
+
+def wickets_by_bowler(df, bowler_col, dismissal_col, excluded=('run out',)):
+    """
+    Dismissals credited to each bowler (not `excluded` kinds), highest first.
+    """
+    dismissal = df[dismissal_col]
+    wickets = df[dismissal.notnull() & ~dismissal.isin(excluded)]
+    return uncategorize(wickets.groupby(bowler_col, observed=True).size().sort_values(ascending=False)
+                        .reset_index(name='wickets'))
+
+
+def toss_outcomes(df, toss_winner_col, winner_col):
+    """
+    (matches won by the toss winner, matches).
+    """
+    won = df[toss_winner_col] == df[winner_col]
+    return int(won.sum()), int(len(won))
+
+
+def with_parsed_dates(df, columns, date_col=None):
+    """
+    df[columns] with `date_col` parsed to datetimes (unparseable values
+    become NaT); the frame itself when there is nothing to parse.
+    """
+    frame = df if list(columns) == list(df.columns) else df[list(columns)]
+    if date_col is None or date_col not in frame.columns:
+        return frame
+    try:
+        return frame.assign(**{date_col: pd.to_datetime(frame[date_col], errors='coerce')})
+    except Exception:
+        return frame
+
+
+def null_summary(df, columns):
+    """
+    (missing values per column, mask of rows with any missing value) from
+    one isnull() pass.
+    """
+    nulls = df[list(columns)].isnull()
+    return nulls.sum(), nulls.any(axis=1)
+
+
+def parsed_null_summary(nulls, df, parsed, date_col=None):
+    """
+    null_summary() of `parsed` (with_parsed_dates() of df) from the one of
+    df: only the dates that failed to parse are added.
+    """
+    if parsed is df or date_col is None or date_col not in parsed.columns:
+        return nulls
+    counts, mask = nulls
+    failed = parsed[date_col].isna() & df[date_col].notna()
+    counts = counts.copy()
+    counts[date_col] += int(failed.sum())
+    return counts, mask | failed
+
+
+def numeric_correlation(df, columns):
+    """
+    Pearson correlation matrix of the numeric `columns`.
+    """
+    return df[list(columns)].corr()
+
+
+def iqr_outliers(df, col, columns, limit=20):
+    """
+    First `limit` rows (with `columns`) whose `col` is above Q3 + 1.5 IQR.
+    """
+    q1 = df[col].quantile(0.25)
+    q3 = df[col].quantile(0.75)
+    upper = q3 + 1.5 * (q3 - q1)
+    return df.loc[df[col] > upper, list(columns)].head(limit)
@@ -0,0 +1,162 @@
+"""
+map_reduce.py
+Batch mode of the IPL scripts: one dataset split over many CSVs with the
+same header (one file per season or per match), given as a directory or a
+glob pattern.
+
+    paths = expand_paths("data/seasons")        # or "data/*.csv"
+    header = common_header(paths)
+    partials = list(map_files(grouped_partials, paths, workers=None, groups={"wins": ("winner", None)}))
+    wins = most_common(sum_counts(p["wins"] for p in partials))
+
+Files are taken in name order, digits compared as numbers (season_9.csv
+before season_10.csv), and every result is the one for the files
+concatenated in that order. map_files() cuts the list into runs of
+consecutive files of about TASK_BYTES each, maps each run in a process
+pool (forked; threads where processes cannot be forked, as the scripts
+have no `__main__` guard) and yields the partials in file order. The
+reducers therefore only need to be associative: keys keep their order of
+first appearance, which is the tie order of value_counts(). The runs
+depend only on the files, so results are identical for any number of
+workers.
+"""
+
+import glob
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from common.dataset_cache import DatasetCache
+from common.ipl_loader import load_ipl_csv, read_header, uncategorize
+
+# bytes of CSV per map task (about 500k deliveries)
+TASK_BYTES = 32 * 2 ** 20
+GLOB_CHARS = "*?["
+
+
+def natural_key(path):
+    """
+    Sort key of a file name with its digit runs compared as numbers.
+    """
+    return [(0, int(part), "") if part.isdigit() else (1, 0, part)
+            for part in re.split(r"(\d+)", os.path.basename(path).lower())] + [(2, 0, path)]
+
+
+def expand_paths(spec, pattern="*.csv"):
+    """
+    The CSVs of a directory (matching `pattern`), of a glob pattern or a
+    single file, in natural name order.
+    """
+    if os.path.isdir(spec):
+        paths = glob.glob(os.path.join(spec, pattern))
+    elif any(ch in spec for ch in GLOB_CHARS):
+        paths = [p for p in glob.glob(spec) if os.path.isfile(p)]
+    else:
+        paths = [spec] if os.path.isfile(spec) else []
+    if not paths:
+        raise FileNotFoundError(f"No CSV files found for: {spec}\n"
+                                f"Please put a file, directory or glob pattern in FILE_PATH.")
+    return sorted(paths, key=natural_key)
+
+
+def common_header(paths, **read_kwargs):
+    """
+    The header (an empty frame) shared by every file; ValueError naming
+    the first file whose columns differ.
+    """
+    header = read_header(paths[0], **read_kwargs)
+    for path in paths[1:]:
+        columns = list(read_header(path, **read_kwargs).columns)
+        if columns != list(header.columns):
+            raise ValueError(f"{path} has columns {columns}, but {paths[0]} has {list(header.columns)}; "
+                             f"batch mode needs the same header in every file")
+    return header
+
+
+def split_runs(paths, task_bytes=TASK_BYTES):
+    """
+    `paths` cut into runs of consecutive files of about `task_bytes` each.
+    """
+    runs, size = [[]], 0
+    for path in paths:
+        if runs[-1] and size >= task_bytes:
+            runs.append([])
+            size = 0
+        runs[-1].append(path)
+        size += os.path.getsize(path)
+    return runs
+
+
+def _executor(workers):
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    # no fork (Windows): spawned workers would re-run the calling script
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def map_files(func, paths, workers=None, task_bytes=TASK_BYTES, **kwargs):
+    """
+    Yield func(run, **kwargs) for each run of consecutive files
+    (split_runs), in file order. `func` must be a module-level function;
+    workers=None uses all cores, workers=1 runs in this process.
+    """
+    runs = split_runs(paths, task_bytes)
+    task = partial(func, **kwargs)
+    workers = min(workers or os.cpu_count() or 1, len(runs))
+    if workers <= 1:
+        yield from map(task, runs)
+        return
+    with _executor(workers) as pool:
+        yield from pool.map(task, runs)
+
+
+# ---------- associative reducers ----------
+def sum_counts(partials):
+    """
+    Per-key sums of Series partials (counts or sums per key), keys in order
+    of first appearance, missing keys kept: a groupby(sort=False,
+    dropna=False) of the concatenated data.
+    """
+    partials = [p for p in partials if p is not None and len(p)]
+    if not partials:
+        return pd.Series(dtype="int64")
+    merged = pd.concat(partials)
+    return merged.groupby(level=0, sort=False, dropna=False).sum()
+
+
+def most_common(counts):
+    """
+    Merged counts like ipl_loader.value_counts(): missing key dropped,
+    highest first, ties in order of first appearance.
+    """
+    return counts[counts.index.notna()].sort_values(ascending=False, kind="stable").rename("count")
+
+
+def sorted_sizes(counts, col):
+    """
+    Merged row counts like ipl_metrics.group_sizes(): a (col, matches)
+    frame sorted by value, missing values last.
+    """
+    return counts.sort_index(na_position="last").rename_axis(col).reset_index(name="matches")
+
+
+def grouped_partials(paths, groups, usecols=None, cache=False):
+    """
+    Map function: for each name -> (key column, value column or None) in
+    `groups`, the row counts (None) or value sums per key over `paths`,
+    keys in order of first appearance; plus "rows". Files are read with
+    load_ipl_csv (through the dataset cache with cache=True).
+    """
+    out = {"rows": 0, **{name: [] for name in groups}}
+    for path in paths:
+        df = load_ipl_csv(path, usecols=usecols, verbose=False, cache=DatasetCache() if cache else None,
+                          low_memory=False)
+        out["rows"] += len(df)
+        for name, (key, value) in groups.items():
+            grouped = df.groupby(key, sort=False, observed=True, dropna=False)
+            out[name].append(uncategorize(grouped.size() if value is None else grouped[value].sum()))
+    return {name: sum_counts(parts) if name in groups else parts for name, parts in out.items()}
@@ -0,0 +1,429 @@
+"""
+player_cube.py
+Precomputed player aggregate cube of an IPL deliveries CSV, shared by the
+EDA and visualization scripts.
+
+    cube = PlayerCube.for_csv(FILE_PATH)   # load, extend or build the cached cube
+    cube = PlayerCube.for_csvs(paths)      # batch mode: one cached cube per file, cells summed
+    cube.top("runs", 10)                   # all-time top 10 batsmen
+    cube.top("wickets", 5, season="2016", venue=["Eden Gardens", "Wankhede Stadium"])
+    cube.top("runs", 3, per="season")      # top 3 batsmen of every season
+    cube.rollup("team", season="2016")     # all measures per team in 2016
+
+Cells are (player, season, venue, team, inning), each holding
+- runs (off the bat) and balls (deliveries faced, extras included) of the
+  player as striker, with the batting team
+- wickets: dismissals credited to the player as bowler (every kind but run
+  outs, as ipl_metrics.wickets_by_bowler), with the bowling team
+- dismissals: times the player was out (the player_out column, else the
+  striker of the wicket ball), with the batting team
+Columns are found through the ipl_loader aliases. The season is the
+season column, else the year of the date; the bowling team is the
+bowling_team column, else whichever of team1/team2 is not batting.
+Dimension values are the CSV's text. Missing values are counted in totals
+but are never a filter value or a group of their own.
+
+Storage: one uncompressed .npz per CSV in .ipl_cache/cube/, a column per
+array: int32 codes per dimension (into its sorted labels), the int32
+measures and the indexes. Cells are sorted by player, then season, venue,
+team and inning, so each player's cells are one contiguous range and
+per-player totals are differences of the stored prefix sums. Each other
+dimension has a sorted index: the cell numbers ordered by its code and
+the offset where each value starts. A query takes the cells of its filter
+values from the most selective index, checks the other filters on those
+cells only and sums them per group with np.bincount. The deliveries are
+never rescanned.
+
+The cube is validated against the CSV like the dataset cache (size, mtime
+and content hash in a JSON manifest). When the CSV only grew by appended
+rows (the sampled prefix fingerprint incremental_eda.py uses), only the new
+bytes are read and their cells are added to the stored ones; any other
+change rebuilds the cube, reading the CSV's key columns in chunks.
+
+    python -m common.player_cube deliveries.csv --measure wickets --top 5 --per season --venue "Eden Gardens"
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from common.dataset_cache import DEFAULT_CACHE_DIR, ends_with_newline, file_hash, prefix_fingerprint
+from common.instrumentation import stage
+from common.ipl_loader import read_header, resolve_columns
+from common.map_reduce import map_files
+
+DEFAULT_CUBE_DIR = os.path.join(DEFAULT_CACHE_DIR, "cube")
+FORMAT_VERSION = 1
+CHUNK_SIZE = 500_000
+DIMENSIONS = ("player", "season", "venue", "team", "inning")
+MEASURES = ("runs", "balls", "wickets", "dismissals")
+# a group is ranked on a measure only where this measure is positive
+# (batsmen: faced a ball; bowlers: took a wicket)
+ELIGIBLE = {"runs": "balls", "balls": "balls", "wickets": "wickets", "dismissals": "dismissals"}
+NOT_BOWLER_WICKETS = ("run out",)
+# ipl_loader roles the cube reads
+ROLES = ("batsman", "bowler", "batsman_runs", "dismissal_kind", "player_out", "season", "date", "venue",
+         "batting_team", "bowling_team", "team1", "team2", "inning")
+
+
+# ---------- cells from deliveries ----------
+def cube_columns(header):
+    """
+    Role -> column (or None) of the cube's inputs in a CSV with `header`.
+    """
+    return resolve_columns(header, ROLES)
+
+
+def _read_chunks(path, cols, chunk_size, offset=0, names=None):
+    usecols = list(dict.fromkeys(c for c in cols.values() if c is not None))
+    dtype = {c: object for role, c in cols.items() if c is not None and role != "batsman_runs"}
+    if not offset:
+        yield from pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunk_size)
+        return
+    with open(path, "rb") as f:
+        f.seek(offset)
+        yield from pd.read_csv(f, header=None, names=names, usecols=usecols, dtype=dtype, chunksize=chunk_size)
+
+
+def _group(cells):
+    measures = cells[list(MEASURES)].fillna(0).astype(np.int64)
+    return measures.groupby([cells[d] for d in DIMENSIONS], dropna=False, sort=False).sum().reset_index()
+
+
+def delivery_cells(chunk, cols):
+    """
+    Cube cells (dimensions + measures) of a frame of deliveries whose text
+    columns were read as str.
+    """
+    def col(role):
+        if cols[role] is None:
+            return pd.Series(None, index=chunk.index, dtype=object)
+        return chunk[cols[role]]
+
+    if cols["season"] is None and cols["date"] is not None:
+        season = pd.to_datetime(chunk[cols["date"]], errors="coerce").dt.year.map("{:.0f}".format, na_action="ignore")
+    else:
+        season = col("season")
+    batting = col("batting_team")
+    if cols["bowling_team"] is not None:
+        bowling = col("bowling_team")
+    elif cols["team1"] is not None and cols["team2"] is not None:
+        team1, team2 = col("team1"), col("team2")
+        bowling = team1.where(batting == team2, team2.where(batting == team1))
+    else:
+        bowling = col("bowling_team")
+    kind = col("dismissal_kind")
+    keys = {"season": season, "venue": col("venue"), "inning": col("inning")}
+
+    parts = []
+    if cols["batsman"] is not None:
+        runs = pd.to_numeric(chunk[cols["batsman_runs"]], errors="coerce") if cols["batsman_runs"] is not None else 0
+        out = kind.notna().astype(np.int64) if cols["player_out"] is None else 0
+        parts.append(pd.DataFrame({"player": col("batsman"), "team": batting, **keys,
+                                   "runs": runs, "balls": 1, "dismissals": out}))
+    if cols["bowler"] is not None and cols["dismissal_kind"] is not None:
+        wicket = kind.notna() & ~kind.isin(NOT_BOWLER_WICKETS)
+        parts.append(pd.DataFrame({"player": col("bowler"), "team": bowling, **keys, "wickets": 1})[wicket])
+    if cols["player_out"] is not None:
+        dismissed = col("player_out").notna()
+        parts.append(pd.DataFrame({"player": col("player_out"), "team": batting, **keys, "dismissals": 1})[dismissed])
+    cells = pd.concat(parts, ignore_index=True).reindex(columns=list(DIMENSIONS) + list(MEASURES))
+    return _group(cells)
+
+
+# ---------- the cube ----------
+class PlayerCube:
+    """
+    Cells, sorted indexes and prefix sums; see the module docstring.
+    """
+
+    def __init__(self, codes, labels, measures, offsets=None, orders=None, prefix=None):
+        self.codes = codes          # dimension -> int32 code per cell (-1: missing)
+        self.labels = labels        # dimension -> sorted label array
+        self.measures = measures    # measure -> int32 value per cell
+        self.n_cells = len(measures[MEASURES[0]])
+        if offsets is None:
+            offsets, orders, prefix = self._build_indexes()
+        self.offsets = offsets      # dimension -> start of each code's cells in its index (slot 0: missing)
+        self.orders = orders        # dimension -> cell numbers ordered by code (not for player: cells are)
+        self.prefix = prefix        # measure -> running total over the cells, starting at 0
+
+    @classmethod
+    def from_cells(cls, cells):
+        """
+        Cube of a cells frame (one row per distinct dimension values).
+        """
+        codes, labels = {}, {}
+        for dim in DIMENSIONS:
+            values = cells[dim].to_numpy(dtype=object)
+            present = pd.notna(values)
+            text = values[present].astype(str)
+            labels[dim] = np.unique(text)
+            codes[dim] = np.full(len(values), -1, dtype=np.int32)
+            codes[dim][present] = np.searchsorted(labels[dim], text)
+        order = np.lexsort([codes[dim] for dim in reversed(DIMENSIONS)])
+        return cls({dim: c[order] for dim, c in codes.items()}, labels,
+                   {m: cells[m].to_numpy(dtype=np.int32)[order] for m in MEASURES})
+
+    def _build_indexes(self):
+        offsets, orders = {}, {}
+        for dim in DIMENSIONS:
+            counts = np.bincount(self.codes[dim] + 1, minlength=len(self.labels[dim]) + 1)
+            offsets[dim] = np.concatenate([[0], np.cumsum(counts)])
+            if dim != DIMENSIONS[0]:
+                orders[dim] = np.argsort(self.codes[dim], kind="stable").astype(np.int32)
+        prefix = {m: np.concatenate([[0], np.cumsum(v, dtype=np.int64)]) for m, v in self.measures.items()}
+        return offsets, orders, prefix
+
+    def cells(self):
+        """
+        The cells as a frame of labels (None where missing) and measures.
+        """
+        out = {}
+        for dim in DIMENSIONS:
+            code = self.codes[dim]
+            values = np.full(len(code), None, dtype=object)
+            values[code >= 0] = self.labels[dim].astype(object)[code[code >= 0]]
+            out[dim] = values
+        out.update({m: v.astype(np.int64) for m, v in self.measures.items()})
+        return pd.DataFrame(out)
+
+    # ---------- lookups ----------
+    def _codes(self, dim, values):
+        if dim not in DIMENSIONS:
+            raise ValueError(f"unknown dimension {dim!r}; expected one of {DIMENSIONS}")
+        values = [values] if isinstance(values, (str, int, np.integer)) else list(values)
+        text = np.array([str(v) for v in values], dtype=str)
+        labels = self.labels[dim]
+        pos = np.searchsorted(labels, text)
+        inside = pos < len(labels)
+        pos, text = pos[inside], text[inside]
+        return np.unique(pos[labels[pos] == text])   # unknown values match nothing
+
+    def _cells_of(self, dim, code):
+        start, stop = self.offsets[dim][code + 1], self.offsets[dim][code + 2]
+        if dim == DIMENSIONS[0]:
+            return np.arange(start, stop)
+        return self.orders[dim][start:stop]
+
+    def select(self, **where):
+        """
+        Cell numbers matching every filter (dimension=value or list of
+        values), or None (all cells) without filters.
+        """
+        if not where:
+            return None
+        lookups = []
+        for dim, values in where.items():
+            codes = self._codes(dim, values)
+            off = self.offsets[dim]
+            lookups.append((int((off[codes + 2] - off[codes + 1]).sum()), dim, codes))
+        lookups.sort(key=lambda lookup: lookup[0])   # most selective index first
+        _, dim, codes = lookups[0]
+        cells = np.concatenate([self._cells_of(dim, c) for c in codes]) if len(codes) else np.empty(0, np.int64)
+        for _, dim, codes in lookups[1:]:
+            cells = cells[np.isin(self.codes[dim][cells], codes)]
+        return cells
+
+    def _sums(self, dims, cells):
+        """
+        (cells, measure sums) per group of `dims`, as flat arrays over every
+        combination of codes (slot 0 of each dimension: missing).
+        """
+        shape = tuple(len(self.labels[dim]) + 1 for dim in dims)
+        if cells is None and dims == [DIMENSIONS[0]]:
+            # players are contiguous: differences of the prefix sums
+            off = self.offsets[dims[0]]
+            return np.diff(off), {m: p[off[1:]] - p[off[:-1]] for m, p in self.prefix.items()}, shape
+        codes = [self.codes[dim] if cells is None else self.codes[dim][cells] for dim in dims]
+        key = np.ravel_multi_index([c + 1 for c in codes], shape) if codes[0].size else np.empty(0, np.intp)
+        size = int(np.prod(shape))
+        sums = {}
+        for m, v in self.measures.items():
+            sums[m] = np.bincount(key, weights=v if cells is None else v[cells], minlength=size).astype(np.int64)
+        return np.bincount(key, minlength=size), sums, shape
+
+    def rollup(self, by="player", **where):
+        """
+        Measures summed per group of `by` (a dimension or a list of them)
+        over the cells matching `where`, in label order; groups without
+        cells or with a missing value are left out.
+        """
+        dims = [by] if isinstance(by, str) else list(by)
+        for dim in dims:
+            if dim not in DIMENSIONS:
+                raise ValueError(f"unknown dimension {dim!r}; expected one of {DIMENSIONS}")
+        counts, sums, shape = self._sums(dims, self.select(**where))
+        groups = np.flatnonzero(counts)
+        codes = np.unravel_index(groups, shape)
+        keep = np.logical_and.reduce([c > 0 for c in codes])
+        groups = groups[keep]
+        table = {dim: self.labels[dim].astype(object)[c[keep] - 1] for dim, c in zip(dims, codes)}
+        table.update({m: s[groups] for m, s in sums.items()})
+        return pd.DataFrame(table, columns=dims + list(MEASURES))
+
+    def top(self, measure, n=None, by="player", per=None, **where):
+        """
+        Groups of `by` with the highest `measure` over the cells matching
+        `where` (all groups when n is None); with `per`, the top n within
+        each value of that dimension. Ties are in label order; groups are
+        ranked only where ELIGIBLE[measure] is positive.
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"unknown measure {measure!r}; expected one of {MEASURES}")
+        table = self.rollup([per, by] if per else by, **where)
+        table = table[table[ELIGIBLE[measure]] > 0].sort_values(measure, ascending=False, kind="stable")
+        if per:
+            table = table.sort_values(per, kind="stable")
+            if n is not None:
+                table = table.groupby(per, sort=False).head(n)
+        elif n is not None:
+            table = table.head(n)
+        return table.reset_index(drop=True)
+
+    def total(self, **where):
+        """
+        {measure: sum} over the cells matching `where`.
+        """
+        cells = self.select(**where)
+        if cells is None:
+            return {m: int(p[-1]) for m, p in self.prefix.items()}
+        return {m: int(v[cells].sum(dtype=np.int64)) for m, v in self.measures.items()}
+
+    # ---------- storage ----------
+    def save(self, path):
+        arrays = {}
+        for dim in DIMENSIONS:
+            arrays[f"code_{dim}"] = self.codes[dim]
+            arrays[f"label_{dim}"] = self.labels[dim]
+            arrays[f"offset_{dim}"] = self.offsets[dim]
+            if dim in self.orders:
+                arrays[f"order_{dim}"] = self.orders[dim]
+        for m in MEASURES:
+            arrays[f"measure_{m}"] = self.measures[m]
+            arrays[f"prefix_{m}"] = self.prefix[m]
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({dim: data[f"code_{dim}"] for dim in DIMENSIONS},
+                       {dim: data[f"label_{dim}"] for dim in DIMENSIONS},
+                       {m: data[f"measure_{m}"] for m in MEASURES},
+                       {dim: data[f"offset_{dim}"] for dim in DIMENSIONS},
+                       {dim: data[f"order_{dim}"] for dim in DIMENSIONS[1:]},
+                       {m: data[f"prefix_{m}"] for m in MEASURES})
+
+    @classmethod
+    def for_csv(cls, path, cache_dir=DEFAULT_CUBE_DIR, chunk_size=CHUNK_SIZE, verbose=True):
+        """
+        The cube of the deliveries CSV at `path`: loaded from `cache_dir`
+        when fresh, else extended by the appended rows or rebuilt, and saved.
+        """
+        header = read_header(path)
+        cols = cube_columns(header)
+        if cols["batsman"] is None and cols["bowler"] is None:
+            raise ValueError(f"no batsman or bowler column in {path}")
+        key = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=8).hexdigest()
+        base = os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(path))[0]}-{key}")
+        data_path, manifest_path = base + ".npz", base + ".json"
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        if manifest is not None and (manifest.get("version") != FORMAT_VERSION or manifest["columns"] != cols
+                                     or not os.path.exists(data_path)):
+            manifest = None
+
+        st = os.stat(path)
+        with stage("player cube") as trace:
+            cube, new_rows = None, 0
+            if manifest is not None and st.st_size == manifest["size"]:
+                if st.st_mtime_ns == manifest["mtime_ns"] or file_hash(path) == manifest["hash"]:
+                    cube, how = cls.load(data_path), "loaded"
+            elif (manifest is not None and st.st_size > manifest["size"]
+                  and ends_with_newline(path, manifest["size"])
+                  and prefix_fingerprint(path, manifest["size"]) == manifest["fingerprint"]):
+                parts = [cls.load(data_path).cells()]
+                for chunk in _read_chunks(path, cols, chunk_size, manifest["size"], list(header.columns)):
+                    parts.append(delivery_cells(chunk, cols))
+                    new_rows += len(chunk)
+                cube, how = cls.from_cells(_group(pd.concat(parts, ignore_index=True))), "updated"
+            if cube is None:
+                parts = []
+                for chunk in _read_chunks(path, cols, chunk_size):
+                    parts.append(delivery_cells(chunk, cols))
+                    new_rows += len(chunk)
+                cube, how = cls.from_cells(_group(pd.concat(parts, ignore_index=True))), "built"
+            trace.rows = new_rows
+            trace.set(update=how, cells=cube.n_cells)
+
+            if how != "loaded" or st.st_mtime_ns != manifest["mtime_ns"]:
+                os.makedirs(cache_dir, exist_ok=True)
+                if os.path.exists(manifest_path):
+                    os.remove(manifest_path)   # never pair a new data file with an old manifest
+                if how != "loaded":
+                    cube.save(data_path)
+                tmp = manifest_path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"version": FORMAT_VERSION, "source": os.path.abspath(path), "columns": cols,
+                               "size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": file_hash(path),
+                               "fingerprint": prefix_fingerprint(path, st.st_size), "cells": cube.n_cells}, f, indent=2)
+                os.replace(tmp, manifest_path)
+        if verbose:
+            detail = f", {new_rows} new deliveries" if how == "updated" else ""
+            print(f"Player cube {how}: {cube.n_cells} cells{detail}")
+        return cube
+
+    @classmethod
+    def for_csvs(cls, paths, workers=None, cache_dir=DEFAULT_CUBE_DIR, chunk_size=CHUNK_SIZE, verbose=True):
+        """
+        The cube of several deliveries CSVs taken together (batch mode):
+        each file's cube comes from for_csv(), so it is cached and only
+        rebuilt when that file changes, and their cells are summed. Files
+        are mapped in a process pool (common/map_reduce.map_files).
+        """
+        parts = list(map_files(_cells_of_run, paths, workers, cache_dir=cache_dir, chunk_size=chunk_size))
+        cube = cls.from_cells(_group(pd.concat(parts, ignore_index=True)))
+        if verbose:
+            print(f"Player cube merged from {len(paths)} files: {cube.n_cells} cells")
+        return cube
+
+
+def _cells_of_run(paths, cache_dir, chunk_size):
+    # map task of PlayerCube.for_csvs: the summed cells of consecutive files
+    cells = [PlayerCube.for_csv(path, cache_dir, chunk_size, verbose=False).cells() for path in paths]
+    return _group(pd.concat(cells, ignore_index=True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Top-N and rollups from the player cube of an IPL deliveries CSV.")
+    parser.add_argument("csv")
+    parser.add_argument("--measure", choices=MEASURES, default="runs")
+    parser.add_argument("--top", type=int, default=10, help="groups to show (per --per value)")
+    parser.add_argument("--by", choices=DIMENSIONS, default="player")
+    parser.add_argument("--per", choices=DIMENSIONS, help="rank within each value of this dimension")
+    parser.add_argument("--rollup", action="store_true", help="every group of --by, in label order, unranked")
+    for dim in DIMENSIONS:
+        parser.add_argument(f"--{dim}", action="append", help=f"only this {dim} (repeatable)")
+    args = parser.parse_args(argv)
+
+    cube = PlayerCube.for_csv(args.csv)
+    where = {dim: getattr(args, dim) for dim in DIMENSIONS if getattr(args, dim)}
+    if args.rollup:
+        table = cube.rollup(args.by, **where)
+    else:
+        table = cube.top(args.measure, args.top, by=args.by, per=args.per, **where)
+    print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+plot_aggregate.py
+Pre-aggregation of large plot jobs (plot_render.PlotJob) in NumPy, so that
+drawing a figure costs in proportion to its bins or pixels rather than to
+the rows behind it. render_plots() applies aggregate_job() to every job
+before hashing and rendering it:
+
+- histplot: the bin counts are computed here, on the bin edges seaborn
+  would choose itself (np.histogram_bin_edges with the job's `bins` and
+  `binrange`), and drawn as one weighted value per bin: the same figure.
+- scatterplot with more than SCATTER_MAX_POINTS rows: the points are
+  counted into the hexagonal grid matplotlib's hexbin uses (HEX_GRIDSIZE
+  hexagons across) and drawn as a hexbin of the non-empty cells, one point
+  per cell, with a count colour bar.
+- lineplot with more than 4 * LINE_BUCKETS rows and one y per x: the x
+  range is cut into LINE_BUCKETS buckets (about one pixel column each) and
+  only the first, last, lowest and highest point of each is kept (M4
+  downsampling), so every spike and dip is still drawn.
+
+Jobs with options the aggregated form cannot honour (hue, kde, ...) are
+left as they are.
+"""
+
+import copy
+import math
+
+import numpy as np
+import pandas as pd
+
+SCATTER_MAX_POINTS = 20_000
+HEX_GRIDSIZE = 60
+LINE_BUCKETS = 1_000
+# options that survive aggregation (scatter marker options are dropped with the markers)
+HIST_OPTIONS = {"bins", "binrange", "color", "alpha", "element", "fill", "edgecolor", "linewidth"}
+SCATTER_OPTIONS = {"color", "alpha", "s", "marker", "edgecolor", "linewidth"}
+LINE_OPTIONS = {"marker", "color", "linewidth", "linestyle", "alpha"}
+
+
+def _numeric(frame, columns):
+    """
+    float arrays of `columns`, rows with a missing or non-numeric value dropped.
+    """
+    values = np.column_stack([pd.to_numeric(frame[c], errors="coerce").to_numpy(dtype=np.float64) for c in columns])
+    values = values[np.isfinite(values).all(axis=1)]
+    return [values[:, i] for i in range(len(columns))]
+
+
+def hist_bins(values, bins="auto", binrange=None):
+    """
+    (counts, edges) of `values` on the edges seaborn's histplot would use.
+    """
+    edges = np.histogram_bin_edges(values, bins=bins, range=binrange)
+    counts, _ = np.histogram(values, edges)
+    return counts, edges
+
+
+def hex_bins(x, y, gridsize=HEX_GRIDSIZE):
+    """
+    (centre x, centre y, count) of the non-empty cells of matplotlib's
+    hexbin grid over the data's extent, and that extent. Drawing the
+    centres with hexbin(C=count, reduce_C_function=np.sum) and the same
+    gridsize/extent puts each centre in its own cell.
+    """
+    xmin, xmax = (x.min(), x.max()) if len(x) else (0.0, 1.0)
+    ymin, ymax = (y.min(), y.max()) if len(y) else (0.0, 1.0)
+    if xmin == xmax:
+        xmin, xmax = xmin - 0.5, xmax + 0.5
+    if ymin == ymax:
+        ymin, ymax = ymin - 0.5, ymax + 0.5
+    extent = (float(xmin), float(xmax), float(ymin), float(ymax))
+
+    # matplotlib's lattice: x range padded, two grids offset by half a cell
+    nx, ny = gridsize, int(gridsize / math.sqrt(3))
+    padding = 1.e-9 * (xmax - xmin)
+    x0 = xmin - padding
+    sx, sy = (xmax + padding - x0) / nx, (ymax - ymin) / ny
+    ix, iy = (x - x0) / sx, (y - ymin) / sy
+    ix1, iy1 = np.round(ix), np.round(iy)
+    ix2, iy2 = np.floor(ix), np.floor(iy)
+    first = (ix - ix1) ** 2 + 3.0 * (iy - iy1) ** 2 < (ix - ix2 - 0.5) ** 2 + 3.0 * (iy - iy2 - 0.5) ** 2
+    # cell centres in half-cell units: integers on both grids
+    hx = np.where(first, 2 * ix1, 2 * ix2 + 1).astype(np.int64)
+    hy = np.where(first, 2 * iy1, 2 * iy2 + 1).astype(np.int64)
+    rows = 2 * ny + 2
+    counts = np.bincount(hx * rows + hy, minlength=(2 * nx + 2) * rows)
+    cells = np.flatnonzero(counts)
+    return (cells // rows * (sx / 2) + x0, cells % rows * (sy / 2) + ymin, counts[cells], extent)
+
+
+def minmax_downsample(x, y, buckets=LINE_BUCKETS):
+    """
+    Positions of the points to keep: per bucket of the x range, the first,
+    last, lowest and highest point (x sorted ascending).
+    """
+    n = len(x)
+    if n <= 4 * buckets:
+        return np.arange(n)
+    span = x[-1] - x[0]
+    bucket = np.minimum(((x - x[0]) / span * buckets).astype(np.int64), buckets - 1) if span > 0 \
+        else np.zeros(n, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    # lowest/highest of each bucket: sort by (bucket, y) once
+    order = np.lexsort((y, bucket))
+    keep = np.concatenate([starts, ends, order[starts], order[ends]])
+    return np.unique(keep)
+
+
+def _with(job, kind, data, **options):
+    new = copy.copy(job)
+    new.kind, new.data, new.options = kind, data, options
+    return new
+
+
+def aggregate_job(job):
+    """
+    The pre-aggregated version of `job`, or `job` itself when it is small
+    enough or cannot be aggregated (see the module docstring).
+    """
+    data = job.data
+    if not isinstance(data, pd.DataFrame) or job.x not in data.columns:
+        return job
+    if job.kind == "histplot" and job.y is None and set(job.options) <= HIST_OPTIONS:
+        options = dict(job.options)
+        (values,) = _numeric(data, [job.x])
+        counts, edges = hist_bins(values, options.pop("bins", "auto"), options.pop("binrange", None))
+        binned = pd.DataFrame({job.x: (edges[:-1] + edges[1:]) / 2, "count": counts})
+        return _with(job, "histplot", binned, bins=edges.tolist(), weights="count", **options)
+
+    if job.y not in data.columns:
+        return job
+    if job.kind == "scatterplot" and len(data) > SCATTER_MAX_POINTS and set(job.options) <= SCATTER_OPTIONS:
+        cx, cy, counts, extent = hex_bins(*_numeric(data, [job.x, job.y]))
+        binned = pd.DataFrame({job.x: cx, job.y: cy, "count": counts})
+        new = _with(job, "hexbin", binned, gridsize=HEX_GRIDSIZE, extent=extent)
+        new.xlabel = job.x if job.xlabel is None else job.xlabel
+        new.ylabel = job.y if job.ylabel is None else job.ylabel
+        return new
+    if (job.kind == "lineplot" and len(data) > 4 * LINE_BUCKETS and set(job.options) <= LINE_OPTIONS
+            and pd.api.types.is_numeric_dtype(data[job.x]) and pd.api.types.is_numeric_dtype(data[job.y])
+            and data[job.x].is_unique):
+        frame = data.dropna(subset=[job.x, job.y]).sort_values(job.x, kind="stable")
+        keep = minmax_downsample(frame[job.x].to_numpy(dtype=np.float64), frame[job.y].to_numpy(dtype=np.float64))
+        return _with(job, "lineplot", frame.iloc[keep], **job.options)
+    return job
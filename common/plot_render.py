@@ -0,0 +1,225 @@
+"""
+plot_render.py
+Rendering stage for the figures of the IPL scripts.
+
+Scripts describe each figure as a PlotJob (plot kind, the aggregated data
+it needs, labels and options) and hand the list to render_plots():
+
+    jobs = [PlotJob("wins.png", "barplot", wins.head(10), x="wins", y="team", title="Top 10 Teams by Wins")]
+    render_plots(jobs, OUTPUT_DIR)
+
+Large jobs are first pre-aggregated in NumPy (plot_aggregate.py: binned
+histograms, hexbin counts for big scatters, min/max-downsampled lines),
+so the workers receive and draw bins rather than rows. Each job is then
+hashed (data, spec, matplotlib/seaborn versions) and the hashes are kept
+in a manifest in the output directory: a figure whose hash matches the
+previous run and whose PNG is still there is not drawn again. The rest
+are rendered in a process pool on the Agg backend.
+
+Where processes can be forked, the pool is forked from the calling script.
+Elsewhere (Windows) pool workers would re-run the calling script, which
+has no `if __name__ == "__main__"` guard, so the pool is started from a
+helper interpreter running this module instead (for SPAWN_MIN_JOBS or
+more figures; fewer are quicker to draw in-process).
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+MANIFEST_FILE = ".plot_manifest.json"
+RENDER_VERSION = 1
+# the helper interpreter and its spawned workers take a few seconds to start;
+# fewer figures than this are drawn in-process on spawn-only platforms
+SPAWN_MIN_JOBS = 8
+
+
+class PlotJob:
+    """
+    One figure: `kind` is a seaborn function name (barplot, lineplot,
+    histplot, scatterplot, heatmap), "pie" (Series.plot) or "hexbin"
+    (pre-counted cells from plot_aggregate.hex_bins, in a "count" column).
+    `data` is the frame/Series to draw, `x`/`y` its column names; other keyword
+    arguments go to the plot function. Labels left as None are not set.
+    """
+
+    def __init__(self, filename, kind, data, x=None, y=None, figsize=(10, 6), title=None, title_size=None,
+                 xlabel=None, ylabel=None, xtick_rotation=None, tight_layout=True, style=None, **options):
+        self.filename = filename
+        self.kind = kind
+        self.data = data
+        self.x, self.y = x, y
+        self.figsize = tuple(figsize)
+        self.title, self.title_size = title, title_size
+        self.xlabel, self.ylabel = xlabel, ylabel
+        self.xtick_rotation = xtick_rotation
+        self.tight_layout = tight_layout
+        self.style = style
+        self.options = options
+
+    def spec(self):
+        return {k: v for k, v in vars(self).items() if k != "data"}
+
+    def fingerprint(self):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((RENDER_VERSION, matplotlib.__version__, sns.__version__,
+                       sorted(self.spec().items(), key=lambda kv: kv[0]))).encode("utf-8"))
+        data = self.data
+        if isinstance(data, pd.DataFrame):
+            h.update(repr((list(data.columns), [str(t) for t in data.dtypes])).encode("utf-8"))
+        elif isinstance(data, pd.Series):
+            h.update(repr((data.name, str(data.dtype), data.index.name)).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        return h.hexdigest()
+
+
+def draw(job):
+    """
+    Draw `job` on a new pyplot figure (left open).
+    """
+    if job.style:
+        sns.set_style(job.style)
+    plt.figure(figsize=job.figsize)
+    if job.kind == "pie":
+        job.data.plot(kind="pie", **job.options)
+    elif job.kind == "heatmap":
+        sns.heatmap(job.data, **job.options)
+    elif job.kind == "hexbin":
+        plt.hexbin(job.data[job.x], job.data[job.y], C=job.data["count"], reduce_C_function=np.sum, mincnt=1,
+                   **job.options)
+        plt.colorbar(label="count")
+    else:
+        getattr(sns, job.kind)(data=job.data, x=job.x, y=job.y, **job.options)
+    if job.title is not None:
+        plt.title(job.title, **({"fontsize": job.title_size} if job.title_size else {}))
+    if job.xlabel is not None:
+        plt.xlabel(job.xlabel)
+    if job.ylabel is not None:
+        plt.ylabel(job.ylabel)
+    if job.xtick_rotation is not None:
+        plt.xticks(rotation=job.xtick_rotation)
+    if job.tight_layout:
+        plt.tight_layout()
+
+
+def render_job(job, output_dir):
+    """
+    Render one job to output_dir; returns (None or the error message, wall
+    seconds, CPU seconds).
+    """
+    start, cpu = time.perf_counter(), time.process_time()
+    error = None
+    try:
+        with matplotlib.rc_context():
+            draw(job)
+            plt.savefig(os.path.join(output_dir, job.filename), bbox_inches='tight')
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        plt.close("all")
+    return error, time.perf_counter() - start, time.process_time() - cpu
+
+
+def _use_agg():
+    plt.switch_backend("Agg")
+
+
+def _render_all(jobs, output_dir, workers, mp_context=None):
+    if workers <= 1 or len(jobs) <= 1:
+        return [render_job(job, output_dir) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_use_agg) as pool:
+        return list(pool.map(render_job, jobs, [output_dir] * len(jobs)))
+
+
+def _render_in_helper(jobs, output_dir, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs_path, results_path = os.path.join(tmp, "jobs.pkl"), os.path.join(tmp, "results.pkl")
+        with open(jobs_path, "wb") as f:
+            pickle.dump((jobs, os.path.abspath(output_dir), workers), f, protocol=pickle.HIGHEST_PROTOCOL)
+        subprocess.run([sys.executable, os.path.abspath(__file__), jobs_path, results_path], check=True)
+        with open(results_path, "rb") as f:
+            return pickle.load(f)
+
+
+def _read_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def render_plots(jobs, output_dir, workers=None, start_method=None, aggregate=True):
+    """
+    Render the jobs whose figure changed since the last run. workers=None
+    uses all cores, workers=1 renders in this process; aggregate=False
+    draws every job from its full data. Returns the number of figures
+    rendered.
+    """
+    # imported here: the helper interpreter runs this file before common/ is importable
+    from common.instrumentation import record
+    from common.plot_aggregate import aggregate_job
+    rows = {job.filename: len(job.data) for job in jobs}
+    if aggregate:
+        jobs = [aggregate_job(job) for job in jobs]
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    manifest = _read_manifest(manifest_path)
+    hashes = {job.filename: job.fingerprint() for job in jobs}
+    todo = [job for job in jobs
+            if manifest.get(job.filename) != hashes[job.filename]
+            or not os.path.exists(os.path.join(output_dir, job.filename))]
+    for job in jobs:
+        if job not in todo:
+            print(f"Unchanged plot: {os.path.join(output_dir, job.filename)}")
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    start_method = start_method or ("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    if start_method != "fork" and len(todo) < SPAWN_MIN_JOBS:
+        workers = 1
+    if workers > 1 and start_method != "fork":
+        results = _render_in_helper(todo, output_dir, workers)
+    else:
+        results = _render_all(todo, output_dir, workers, multiprocessing.get_context("fork") if workers > 1 else None)
+
+    errors = []
+    for job, (error, wall, cpu) in zip(todo, results):
+        errors.append(error)
+        # drawn in a worker process: timed there (no memory figures)
+        record(f"plot {job.filename}", wall, cpu, rows=rows[job.filename], kind=job.kind, bins=len(job.data),
+               error=error)
+        path = os.path.join(output_dir, job.filename)
+        if error is None:
+            manifest[job.filename] = hashes[job.filename]
+            print(f"Saved plot: {path}")
+        else:
+            manifest.pop(job.filename, None)
+            print(f"Failed to plot {job.filename}: {error}")
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, manifest_path)
+    return sum(error is None for error in errors)
+
+
+if __name__ == "__main__":
+    # helper interpreter for spawn-only platforms: python plot_render.py jobs.pkl results.pkl
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from common.plot_render import _render_all as render_all
+    with open(sys.argv[1], "rb") as f:
+        jobs, output_dir, workers = pickle.load(f)
+    results = render_all(jobs, output_dir, workers, multiprocessing.get_context("spawn"))
+    with open(sys.argv[2], "wb") as f:
+        pickle.dump(results, f)
@@ -0,0 +1,434 @@
+"""
+dashboard_server.py
+Local web dashboard over the aggregate tables the task scripts write.
+
+    python dashboard/dashboard_server.py --port 8770
+
+Loads top_teams_by_wins.csv, matches_per_season.csv, runs_per_match.csv
+and summary.json from Task2_EDA/output/ and sentiment_results.csv from
+Task4_SentimentAnalysis/sentiment_output/ - never the raw IPL or review
+CSVs. Each file is turned once into a JSON body and the plot jobs of its
+charts (common/plot_render.PlotJob, pre-binned by common/plot_aggregate);
+the per-review sentiment rows are reduced to label counts and histograms
+on load and not kept.
+
+A background task checks the files every --poll seconds and reloads the
+ones whose size or modification time changed. ETags are hashes of the
+JSON body, so a chart is re-rendered only when the reloaded table really
+differs; rendering runs in one background thread on the Agg backend while
+the previous PNG is still served. Requests never touch the disk: they get
+the prepared JSON, the last rendered PNG, or 304 Not Modified when
+If-None-Match holds the current ETag. Responses carry
+Cache-Control: max-age=--max-age, after which browsers revalidate.
+
+Endpoints (HTTP/1.1, keep-alive, stdlib asyncio only; GET and HEAD):
+    GET /                    page with every chart and links to the JSON
+    GET /api                 sources: file, ETag, load time, charts
+    GET /api/<source>        teams, seasons, runs_per_match, sentiment, summary
+    GET /charts/<chart>.png  chart drawn from its source table
+    GET /stats               requests, 304s, renders, latency percentiles
+    GET /health              "ok"
+
+See load_test_dashboard.py for a localhost load-test client.
+"""
+
+import argparse
+import asyncio
+import datetime
+import hashlib
+import html
+import io
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from common.plot_aggregate import aggregate_job
+from common.plot_render import PlotJob, draw
+
+DEFAULT_EDA_DIR = os.path.join(REPO_DIR, "Task2_EDA", "output")
+DEFAULT_SENTIMENT_DIR = os.path.join(REPO_DIR, "Task4_SentimentAnalysis", "sentiment_output")
+HIST_BINS = 40
+SENTIMENT_COLUMNS = ["sentiment", "polarity", "subjectivity"]
+REASONS = {200: "OK", 304: "Not Modified", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _histogram(job):
+    """
+    Edges and counts of a histplot job pre-binned by aggregate_job().
+    """
+    return {"edges": job.options["bins"], "counts": job.data["count"].tolist()}
+
+
+# ---------- sources: file -> (JSON payload, {chart name: PlotJob}) ----------
+def load_teams(path):
+    wins = pd.read_csv(path)
+    return wins.to_dict(orient="records"), {
+        "top10_teams_wins": PlotJob("top10_teams_wins.png", "barplot", wins.head(10), x="wins", y="team",
+                                    title="Top 10 Teams by Wins")}
+
+
+def load_seasons(path):
+    seasons = pd.read_csv(path)
+    return seasons.to_dict(orient="records"), {
+        "matches_per_season": PlotJob("matches_per_season.png", "lineplot", seasons, x=seasons.columns[0],
+                                      y="matches", figsize=(10, 5), title="Matches per Season", marker="o")}
+
+
+def load_runs_per_match(path):
+    runs = pd.read_csv(path, usecols=["total_runs"])["total_runs"]
+    job = aggregate_job(PlotJob("runs_per_match_hist.png", "histplot", runs.to_frame(), x="total_runs",
+                                title="Distribution of Total Runs per Match", xlabel="Total runs per match",
+                                bins=HIST_BINS))
+    stats = runs.describe()
+    payload = {"matches": int(stats["count"]),
+               **{k: float(stats[k]) for k in ("mean", "std", "min", "25%", "50%", "75%", "max")},
+               "histogram": _histogram(job)}
+    return payload, {"runs_per_match_hist": job}
+
+
+def load_sentiment(path):
+    df = pd.read_csv(path, usecols=SENTIMENT_COLUMNS)
+    counts = df["sentiment"].value_counts()
+    counts = counts.rename_axis("sentiment").reset_index(name="count")
+    charts = {"sentiment_distribution": PlotJob("sentiment_distribution.png", "barplot", counts, x="sentiment",
+                                                y="count", figsize=(7, 5), title="Sentiment Distribution",
+                                                hue="sentiment", palette="coolwarm", legend=False)}
+    payload = {"reviews": len(df), "sentiment_counts": dict(zip(counts["sentiment"], counts["count"].tolist()))}
+    for col in ("polarity", "subjectivity"):
+        job = aggregate_job(PlotJob(f"{col}_histogram.png", "histplot", df[[col]], x=col, figsize=(8, 5),
+                                    title=f"{col.capitalize()} Score Distribution", xlabel=col.capitalize(),
+                                    bins=HIST_BINS))
+        charts[f"{col}_histogram"] = job
+        payload[col] = {"mean": float(df[col].mean()), "histogram": _histogram(job)}
+    return payload, charts
+
+
+def load_summary(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f), {}
+
+
+# source name -> (directory argument, file name, loader)
+SOURCES = {
+    "teams": ("eda_dir", "top_teams_by_wins.csv", load_teams),
+    "seasons": ("eda_dir", "matches_per_season.csv", load_seasons),
+    "runs_per_match": ("eda_dir", "runs_per_match.csv", load_runs_per_match),
+    "sentiment": ("sentiment_dir", "sentiment_results.csv", load_sentiment),
+    "summary": ("eda_dir", "summary.json", load_summary),
+}
+
+
+class Source:
+    """
+    One file held in memory: its JSON body, ETag and chart jobs.
+    """
+
+    def __init__(self, name, path, loader):
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self.stamp = None   # (mtime_ns, size) of the loaded file
+        self.body = None
+        self.etag = None
+        self.charts = {}
+        self.loaded_at = None
+        self.error = None
+
+    def refresh(self):
+        """
+        Reload the file if its size or mtime changed. Returns True when the
+        content (ETag) changed; on a read error the previous version is kept
+        and the file is tried again at the next check.
+        """
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self.stamp:
+            return False
+        if stamp is None:
+            self.stamp, self.error = None, "missing"
+            changed, self.body, self.etag, self.charts = self.etag is not None, None, None, {}
+            return changed
+        try:
+            payload, charts = self.loader(self.path)
+        except Exception as e:   # half-written by a running script, say
+            error = f"{type(e).__name__}: {e}"
+            if error != self.error:
+                print(f"⚠ {self.name}: could not load {self.path} ({error})")
+            self.error = error
+            return False
+        self.stamp, self.error = stamp, None
+        body = json.dumps(payload, default=str).encode("utf-8")
+        etag = _etag(body)
+        if etag == self.etag:
+            return False
+        self.body, self.etag, self.charts = body, etag, charts
+        self.loaded_at = datetime.datetime.now().isoformat(timespec="seconds")
+        return True
+
+    def info(self):
+        return {"file": self.path, "etag": self.etag, "loaded_at": self.loaded_at, "error": self.error,
+                "charts": sorted(self.charts)}
+
+
+def render_png(job):
+    """
+    PNG bytes of one plot job (run in the render thread).
+    """
+    try:
+        with matplotlib.rc_context():
+            draw(job)
+            buffer = io.BytesIO()
+            plt.savefig(buffer, format="png", bbox_inches="tight")
+    finally:
+        plt.close("all")
+    return buffer.getvalue()
+
+
+class Dashboard:
+    def __init__(self, sources, max_age=5, window=100_000):
+        self.sources = sources
+        self.cache_control = f"max-age={max_age}, must-revalidate".encode("latin-1")
+        # pyplot is not thread-safe: one render thread
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.charts = {}    # chart -> (source ETag it was drawn from, PNG, chart ETag)
+        self.pending = {}   # (chart, source ETag) -> render future
+        self.page = None    # (body, ETag)
+        self.started = time.monotonic()
+        self.statuses = Counter()
+        self.renders = 0
+        self.render_seconds = 0.0
+        self.reloads = 0
+        self.latencies = deque(maxlen=window)
+
+    def chart_source(self, chart):
+        for source in self.sources.values():
+            if chart in source.charts:
+                return source
+        return None
+
+    def render(self, chart):
+        """
+        Future of the current PNG of `chart`, rendering it unless it is
+        drawn from the current version of its table already or being drawn.
+        """
+        source = self.chart_source(chart)
+        key = (chart, source.etag)
+        cached = self.charts.get(chart)
+        if cached is not None and cached[0] == source.etag:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(cached)
+            return future
+        if key not in self.pending:
+            self.pending[key] = asyncio.ensure_future(self._render(chart, source.etag, source.charts[chart]))
+        return self.pending[key]
+
+    async def _render(self, chart, source_etag, job):
+        start = time.perf_counter()
+        try:
+            png = await asyncio.get_running_loop().run_in_executor(self.executor, render_png, job)
+        finally:
+            del self.pending[(chart, source_etag)]
+        self.renders += 1
+        self.render_seconds += time.perf_counter() - start
+        entry = (source_etag, png, f'"{source_etag[1:-1]}-{chart}"')
+        self.charts[chart] = entry
+        return entry
+
+    def refresh(self):
+        """
+        Reload changed sources and start rendering their charts.
+        """
+        changed = [source for source in self.sources.values() if source.refresh()]
+        if not changed:
+            return False
+        self.reloads += len(changed)
+        live = {chart for source in self.sources.values() for chart in source.charts}
+        for chart in list(self.charts):
+            if chart not in live:
+                del self.charts[chart]
+        for source in changed:
+            for chart in source.charts:
+                self.render(chart).add_done_callback(_log_render_error)
+        self.page = None
+        return True
+
+    async def watch(self, poll):
+        while True:
+            await asyncio.sleep(poll)
+            self.refresh()
+
+    def index_page(self):
+        if self.page is None:
+            charts = [(name, chart) for name, source in self.sources.items() for chart in source.charts]
+            items = "\n".join(f'<figure><img src="/charts/{chart}.png" alt="{html.escape(chart)}">'
+                              f'<figcaption><a href="/api/{name}">{html.escape(name)} JSON</a></figcaption>'
+                              f'</figure>' for name, chart in charts)
+            missing = ", ".join(html.escape(n) for n, s in self.sources.items() if s.etag is None) or "none"
+            body = (f"<!doctype html>\n<html><head><meta charset='utf-8'><title>IPL and sentiment dashboard</title>"
+                    f"<style>body{{font-family:sans-serif}} img{{max-width:100%}} figure{{display:inline-block;"
+                    f"width:45%;vertical-align:top}}</style></head>\n<body><h1>IPL and sentiment dashboard</h1>\n"
+                    f"{items}\n<p><a href='/api/summary'>summary.json</a> &middot; <a href='/api'>sources</a> "
+                    f"&middot; <a href='/stats'>stats</a> &middot; not loaded: {missing}</p>\n</body></html>\n"
+                    ).encode("utf-8")
+            self.page = (body, _etag(body))
+        return self.page
+
+    async def respond(self, path):
+        """
+        (status, content type, body, ETag) for a GET of `path`.
+        """
+        path = path.split("?", 1)[0]
+        if path == "/":
+            body, etag = self.index_page()
+            return 200, b"text/html; charset=utf-8", body, etag
+        if path.startswith("/api/"):
+            source = self.sources.get(path[len("/api/"):])
+            if source is not None and source.body is not None:
+                return 200, b"application/json", source.body, source.etag
+        elif path.startswith("/charts/") and path.endswith(".png"):
+            chart = path[len("/charts/"):-len(".png")]
+            if self.chart_source(chart) is not None:
+                _, png, etag = await self.render(chart)
+                return 200, b"image/png", png, etag
+        elif path == "/api":
+            return 200, b"application/json", _json({n: s.info() for n, s in self.sources.items()}), None
+        elif path == "/stats":
+            return 200, b"application/json", _json(self.stats()), None
+        elif path == "/health":
+            return 200, b"application/json", b'"ok"', None
+        return 404, b"application/json", b'{"error": "not found"}', None
+
+    def stats(self):
+        lat = sorted(self.latencies)
+        uptime = time.monotonic() - self.started
+        requests = sum(self.statuses.values())
+        return {
+            "uptime_s": round(uptime, 1),
+            "requests": requests,
+            "requests_per_s": round(requests / uptime, 1) if uptime else 0.0,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "reloads": self.reloads,
+            "renders": self.renders,
+            "render_s": round(self.render_seconds, 3),
+            "latency_ms": {f"p{q}": round(percentile(lat, q) * 1000, 3) for q in (50, 90, 99, 99.9)},
+        }
+
+
+def _json(payload):
+    return json.dumps(payload).encode("utf-8")
+
+
+def _log_render_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"⚠ render failed: {future.exception()!r}")
+
+
+async def handle(dashboard, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            start = time.perf_counter()
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if int(headers.get("content-length", 0)):
+                await reader.readexactly(int(headers["content-length"]))
+
+            etag = None
+            if method not in ("GET", "HEAD"):
+                status, content_type, body = 405, b"application/json", b'{"error": "GET or HEAD only"}'
+            else:
+                try:
+                    status, content_type, body, etag = await dashboard.respond(path)
+                except Exception as e:   # a chart that failed to render
+                    status, content_type, body = 503, b"application/json", _json({"error": repr(e)})
+            if etag is not None and etag in headers.get("if-none-match", ""):
+                status, body = 304, b""
+
+            keep_alive = headers.get("connection", "").lower() != "close"
+            head = (f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n").encode("latin-1")
+            head += b"Content-Type: " + content_type + b"\r\n"
+            if etag is not None:
+                head += b"ETag: " + etag.encode("latin-1") + b"\r\nCache-Control: " + dashboard.cache_control + b"\r\n"
+            else:
+                head += b"Cache-Control: no-store\r\n"
+            writer.write(head + b"\r\n" + (b"" if method == "HEAD" else body))
+            await writer.drain()
+            dashboard.statuses[status] += 1
+            dashboard.latencies.append(time.perf_counter() - start)
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+def build_sources(eda_dir=DEFAULT_EDA_DIR, sentiment_dir=DEFAULT_SENTIMENT_DIR):
+    dirs = {"eda_dir": eda_dir, "sentiment_dir": sentiment_dir}
+    return {name: Source(name, os.path.join(dirs[d], filename), loader)
+            for name, (d, filename, loader) in SOURCES.items()}
+
+
+async def serve(host="127.0.0.1", port=8770, eda_dir=DEFAULT_EDA_DIR, sentiment_dir=DEFAULT_SENTIMENT_DIR,
+                poll=1.0, max_age=5):
+    plt.switch_backend("Agg")
+    dashboard = Dashboard(build_sources(eda_dir, sentiment_dir), max_age)
+    dashboard.refresh()
+    for name, source in dashboard.sources.items():
+        print(f"{'✓' if source.etag else '⚠'} {name}: {source.path}{'' if source.etag else ' (not found yet)'}")
+    server = await asyncio.start_server(lambda r, w: handle(dashboard, r, w), host, port, backlog=1024)
+    watch_task = asyncio.create_task(dashboard.watch(poll))
+    print(f"Dashboard on http://{host}:{port} (checking files every {poll}s, max-age={max_age}s)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watch_task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard over the aggregate tables of the task scripts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--eda-dir", default=DEFAULT_EDA_DIR, help="output directory of ipl_eda.py")
+    parser.add_argument("--sentiment-dir", default=DEFAULT_SENTIMENT_DIR,
+                        help="output directory of sentiment_analysis.py")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds between checks for changed files")
+    parser.add_argument("--max-age", type=int, default=5, help="Cache-Control max-age of JSON and charts")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.eda_dir, args.sentiment_dir, args.poll, args.max_age))
+    except KeyboardInterrupt:
+        pass
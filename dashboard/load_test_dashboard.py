@@ -0,0 +1,118 @@
+"""
+load_test_dashboard.py
+Localhost load test for dashboard_server.py.
+
+    python dashboard/dashboard_server.py &
+    python dashboard/load_test_dashboard.py --concurrency 128 --requests 20000
+
+Opens --concurrency keep-alive connections, each sending GET requests back
+to back over the dashboard's pages (the page, every /api source and every
+chart listed by /api, in rotation). With --revalidate each connection
+sends If-None-Match with the ETag it last saw for a path, as a browser
+with a warm cache does, so most answers are 304 Not Modified. Prints
+client-side requests/second, megabytes/second, status counts and latency
+percentiles, followed by the server's own /stats.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+async def request(reader, writer, path, etag=None):
+    """
+    (status, headers, body) of one GET on a keep-alive connection.
+    """
+    extra = f"If-None-Match: {etag}\r\n" if etag else ""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n{extra}\r\n".encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, await reader.readexactly(int(headers.get("content-length", 0)))
+
+
+async def discover_paths(host, port):
+    """
+    The page, every loaded /api source and every chart.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, _, body = await request(reader, writer, "/api")
+    finally:
+        writer.close()
+    paths = ["/"]
+    for name, info in json.loads(body).items():
+        if info["etag"] is not None:
+            paths.append(f"/api/{name}")
+            paths += [f"/charts/{chart}.png" for chart in info["charts"]]
+    return paths
+
+
+async def worker(host, port, paths, n_requests, revalidate, latencies, statuses, sizes, offset):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    try:
+        for i in range(n_requests):
+            path = paths[(offset + i) % len(paths)]
+            t0 = time.perf_counter()
+            status, headers, body = await request(reader, writer, path, etags.get(path) if revalidate else None)
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] += 1
+            sizes.append(len(body))
+            if "etag" in headers:
+                etags[path] = headers["etag"]
+    finally:
+        writer.close()
+
+
+async def main(args):
+    paths = args.paths or await discover_paths(args.host, args.port)
+    print(f"paths: {' '.join(paths)}")
+
+    latencies, statuses, sizes = [], Counter(), []
+    per_worker = [args.requests // args.concurrency + (i < args.requests % args.concurrency)
+                  for i in range(args.concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(args.host, args.port, paths, n, args.revalidate, latencies, statuses, sizes, i)
+                           for i, n in enumerate(per_worker) if n))
+    elapsed = time.perf_counter() - start
+
+    lat = sorted(latencies)
+    print(f"{len(lat)} requests over {args.concurrency} connections in {elapsed:.2f}s, "
+          f"statuses: {dict(sorted(statuses.items()))}")
+    print(f"requests/s: {len(lat) / elapsed:.0f}   MB/s: {sum(sizes) / elapsed / 1e6:.1f}")
+    if lat:
+        print("latency ms: " + "  ".join(f"p{q}={percentile(lat, q) * 1000:.2f}" for q in (50, 90, 99, 99.9))
+              + f"  max={lat[-1] * 1000:.2f}")
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, _, stats = await request(reader, writer, "/stats")
+    writer.close()
+    print("server stats:", stats.decode("utf-8"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for dashboard_server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--revalidate", action="store_true",
+                        help="send If-None-Match with the last ETag seen (warm browser cache)")
+    parser.add_argument("--paths", nargs="+", help="paths to request instead of everything the dashboard serves")
+    asyncio.run(main(parser.parse_args()))